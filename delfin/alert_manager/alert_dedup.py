@@ -0,0 +1,121 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+alert_dedup_opts = [
+    cfg.IntOpt('alert_dedup_window',
+               default=60,
+               min=0,
+               help='Seconds in which alerts with the same fingerprint are '
+                    'coalesced. The first alert is exported at once, the '
+                    'repeats are exported as one alert with '
+                    'occurrence_count when the window ends. 0 disables '
+                    'coalescing.'),
+    cfg.ListOpt('alert_dedup_fingerprint',
+                default=['storage_id', 'alert_id', 'location', 'category',
+                         'severity'],
+                help='Keys of alert model identifying repeated alerts, '
+                     'e.g. "storage_id,alert_id,sequence_number" to only '
+                     'coalesce traps sent again. Alerts of different '
+                     'categories are never coalesced.'),
+    cfg.IntOpt('alert_dedup_cache_size',
+               default=10000,
+               min=1,
+               help='Maximum number of alert fingerprints kept for '
+                    'coalescing. Repeats of the oldest one are exported '
+                    'when it is exceeded.'),
+]
+
+CONF.register_opts(alert_dedup_opts)
+
+
+class AlertDeduplicator(object):
+    """Coalesce repeated alerts before they are exported."""
+
+    def __init__(self, dispatch, window, fingerprint_keys, cache_size):
+        self.dispatch = dispatch
+        self.window = window
+        # A recovery must not be folded into the repeats of its fault
+        self.fingerprint_keys = list(fingerprint_keys)
+        if 'category' not in self.fingerprint_keys:
+            self.fingerprint_keys.append('category')
+        self.cache_size = cache_size
+        # Fingerprint to first seen time, repeat count and last repeat,
+        # in the order of first seen time
+        self.records = collections.OrderedDict()
+        self.metrics = collections.Counter()
+
+    def _get_fingerprint(self, alert_model):
+        return tuple(alert_model.get(key) for key in self.fingerprint_keys)
+
+    def _pop_expired(self, now):
+        expired = []
+        while self.records:
+            record = next(iter(self.records.values()))
+            if now - record['first_seen'] < self.window:
+                break
+            expired.append(self.records.popitem(last=False)[1])
+        return expired
+
+    def _dispatch_repeats(self, ctxt, records):
+        for record in records:
+            if record['count']:
+                alert_model = dict(record['alert'])
+                alert_model['occurrence_count'] = record['count']
+                self.metrics['exported'] += 1
+                self.dispatch(ctxt, alert_model)
+
+    def process(self, ctxt, alert_model):
+        """Export an alert unless it repeats one exported in the window."""
+        if not self.window:
+            self.dispatch(ctxt, alert_model)
+            return
+
+        now = time.time()
+        expired = self._pop_expired(now)
+        fingerprint = self._get_fingerprint(alert_model)
+        record = self.records.get(fingerprint)
+        if record:
+            record['count'] += 1
+            record['alert'] = alert_model
+            self.metrics['coalesced'] += 1
+        else:
+            self.records[fingerprint] = {'first_seen': now, 'count': 0,
+                                         'alert': alert_model}
+            if len(self.records) > self.cache_size:
+                expired.append(self.records.popitem(last=False)[1])
+
+        # Records are updated before dispatching, which may switch to
+        # other workers
+        self._dispatch_repeats(ctxt, expired)
+        if not record:
+            self.metrics['exported'] += 1
+            self.dispatch(ctxt, alert_model)
+
+    def flush(self, ctxt):
+        """Export the repeats of alerts whose window has ended."""
+        self._dispatch_repeats(ctxt, self._pop_expired(time.time()))
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['fingerprints'] = len(self.records)
+        return metrics
@@ -12,16 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
 from oslo_log import log
 
 from delfin import context
 from delfin import db
 from delfin import exception
+from delfin.alert_manager import alert_dedup
 from delfin.common import alert_util
 from delfin.drivers import api as driver_manager
 from delfin.exporter import base_exporter
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
 
 
 class AlertProcessor(object):
@@ -30,16 +33,26 @@ class AlertProcessor(object):
     def __init__(self):
         self.driver_manager = driver_manager.API()
         self.exporter_manager = base_exporter.AlertExporterManager()
+        self.deduplicator = alert_dedup.AlertDeduplicator(
+            self.exporter_manager.dispatch, CONF.alert_dedup_window,
+            CONF.alert_dedup_fingerprint, CONF.alert_dedup_cache_size)
 
-    def process_alert_info(self, alert):
-        """Fills alert model using driver manager interface."""
+    def process_alert_info(self, alert, storage=None, driver_cls=None):
+        """Fills alert model using driver manager interface.
+
+        Storage and driver class of the alert are got from database when
+        they are not given.
+        """
         ctxt = context.get_admin_context()
-        storage = db.storage_get(ctxt, alert['storage_id'])
+        if storage is None:
+            storage = db.storage_get(ctxt, alert['storage_id'])
 
         try:
-            alert_model = self.driver_manager.parse_alert(ctxt,
-                                                          alert['storage_id'],
-                                                          alert)
+            if driver_cls is None:
+                alert_model = self.driver_manager.parse_alert(
+                    ctxt, alert['storage_id'], alert)
+            else:
+                alert_model = driver_cls.parse_alert(ctxt, alert)
             # Fill storage specific info
             alert_util.fill_storage_attributes(alert_model, storage)
         except Exception as e:
@@ -47,5 +60,10 @@ class AlertProcessor(object):
             raise exception.InvalidResults(
                 "Failed to fill the alert model from driver.")
 
-        # Export to base exporter which handles dispatch for all exporters
-        self.exporter_manager.dispatch(ctxt, alert_model)
+        # Export to base exporter which handles dispatch for all exporters,
+        # repeated alerts are coalesced
+        self.deduplicator.process(ctxt, alert_model)
+
+    def flush_alerts(self, ctxt):
+        """Export coalesced repeats of alerts whose window has ended."""
+        self.deduplicator.flush(ctxt)
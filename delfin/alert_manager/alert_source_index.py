@@ -0,0 +1,68 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+from oslo_log import log
+
+from delfin import cryptor
+from delfin import db
+from delfin.drivers import api as driver_api
+
+LOG = log.getLogger(__name__)
+
+AlertSourceEntry = collections.namedtuple(
+    'AlertSourceEntry',
+    ['alert_source', 'community_string', 'storage', 'driver_cls'])
+
+
+class AlertSourceIndex(object):
+    """In-memory index of alert sources by host.
+
+    Each entry keeps the alert source with its decoded community string,
+    the storage and the driver class of the storage, so that incoming traps
+    are processed without database access.
+    """
+
+    def __init__(self):
+        self.driver_api = driver_api.API()
+        self.entries = {}
+
+    def get(self, host):
+        """Get the entry of a host, or None if it is not indexed."""
+        return self.entries.get(host)
+
+    def add(self, ctxt, alert_source):
+        """Index an alert source and return its entry."""
+        storage_id = alert_source['storage_id']
+        community_string = alert_source.get('community_string')
+        if community_string:
+            community_string = cryptor.decode(community_string)
+        entry = AlertSourceEntry(
+            alert_source=alert_source,
+            community_string=community_string,
+            storage=db.storage_get(ctxt, storage_id),
+            driver_cls=self.driver_api.get_driver_class(ctxt, storage_id))
+        self.entries[alert_source['host']] = entry
+        return entry
+
+    def remove(self, storage_id):
+        """Drop the entries of a storage."""
+        for host, entry in list(self.entries.items()):
+            if entry.alert_source['storage_id'] == storage_id:
+                LOG.debug("Remove alert source of host %s from index.", host)
+                self.entries.pop(host, None)
+
+    def clear(self):
+        self.entries.clear()
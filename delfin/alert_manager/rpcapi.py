@@ -29,9 +29,10 @@ class AlertAPI(object):
 
     API version history:
         1.0 - Initial version.
+        1.1 - Add get_trap_metrics.
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self):
         super(AlertAPI, self).__init__()
@@ -51,3 +52,13 @@ class AlertAPI(object):
         return call_context.cast(ctxt,
                                  'check_snmp_config',
                                  snmp_config=snmp_config)
+
+    def get_trap_metrics(self, ctxt, host):
+        """Get trap metrics of the trap receiver processes of a host.
+
+        The call reaches one of the processes, which adds up its own
+        counters and the ones the other processes published at their last
+        report_trap_metrics run.
+        """
+        call_context = self.client.prepare(version='1.1', server=host)
+        return call_context.call(ctxt, 'get_trap_metrics')
@@ -0,0 +1,198 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import json
+import os
+
+import eventlet
+import six
+from eventlet import queue
+from oslo_config import cfg
+from oslo_log import log
+
+from delfin import exception
+from delfin.i18n import _
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+DROP_OLDEST = 'drop_oldest'
+SPILL_TO_DISK = 'spill_to_disk'
+
+trap_queue_opts = [
+    cfg.IntOpt('trap_workers',
+               default=16,
+               min=1,
+               help='Number of received traps parsed and exported at the '
+                    'same time by one alert node.'),
+    cfg.IntOpt('trap_queue_size',
+               default=10000,
+               min=1,
+               help='Maximum number of received traps waiting to be '
+                    'processed by one alert node.'),
+    cfg.StrOpt('trap_queue_overflow',
+               default=DROP_OLDEST,
+               choices=[DROP_OLDEST, SPILL_TO_DISK],
+               help='What to do with a received trap when the trap queue '
+                    'is full. drop_oldest: drop the oldest waiting trap, '
+                    'spill_to_disk: write the trap to trap_spill_file, to '
+                    'be processed once the queue is drained.'),
+    cfg.StrOpt('trap_spill_file',
+               default='$state_path/alert_traps.spill',
+               help='File the traps are written to when the trap queue is '
+                    'full and trap_queue_overflow is spill_to_disk.'),
+    cfg.IntOpt('trap_spill_max_size',
+               default=100 * 1024 * 1024,
+               min=0,
+               help='Maximum size in bytes of trap_spill_file. Traps are '
+                    'dropped when it is reached, until the spilled traps '
+                    'are processed. 0 means unlimited.'),
+]
+
+CONF.register_opts(trap_queue_opts)
+
+
+class TrapQueue(object):
+    """Process received traps in a fixed number of workers.
+
+    Traps are queued by the listener without waiting for them to be
+    processed, so a slow driver or exporter does not hold up reception.
+    Traps are processed once the queue is started.
+    """
+
+    def __init__(self, handler, workers, queue_size, overflow=DROP_OLDEST,
+                 spill_file=None, spill_max_size=0):
+        self.handler = handler
+        self.worker_count = workers
+        self.overflow = overflow
+        self.spill_file = spill_file
+        self.spill_max_size = spill_max_size
+        self.spill_offset = 0
+        self.spill_size = 0
+        self.spill_failed = False
+        self.queue = queue.LightQueue(queue_size)
+        self.metrics = collections.Counter()
+        self.workers = []
+        self.worker_pid = None
+
+    def start(self):
+        """Start the workers in the current process, once.
+
+        Greenthreads spawned before the service forks never run in the
+        forked processes, so workers are started by the trap receiver
+        after it.
+        """
+        if self.worker_pid == os.getpid():
+            return
+        self.worker_pid = os.getpid()
+        if self.overflow == SPILL_TO_DISK and \
+                os.path.exists(self.spill_file):
+            # Traps spilled before the last restart
+            with open(self.spill_file) as f:
+                self.metrics['spill_depth'] = sum(1 for __ in f)
+            self.spill_size = os.path.getsize(self.spill_file)
+            self._load_spilled()
+        self.workers = [eventlet.spawn(self._work)
+                        for __ in range(self.worker_count)]
+
+    def put(self, trap):
+        """Queue a trap, applying the overflow policy when it is full.
+
+        :param trap: json serializable dict of the received trap
+        """
+        self.metrics['received'] += 1
+        try:
+            self.queue.put_nowait(trap)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == SPILL_TO_DISK:
+            self._spill(trap)
+        else:
+            self.queue.get_nowait()
+            self.metrics['dropped'] += 1
+            self.queue.put_nowait(trap)
+
+    def _spill(self, trap):
+        line = json.dumps(trap) + '\n'
+        if self.spill_max_size and \
+                self.spill_size + len(line) > self.spill_max_size:
+            self._drop_unspilled('spill file is full')
+            return
+        try:
+            with open(self.spill_file, 'a') as f:
+                f.write(line)
+        except (IOError, OSError) as e:
+            self._drop_unspilled(six.text_type(e))
+            return
+        self.spill_size += len(line)
+        self.metrics['spilled'] += 1
+        self.metrics['spill_depth'] += 1
+        if self.spill_failed:
+            self.spill_failed = False
+            LOG.info("Spilling traps to %s again.", self.spill_file)
+
+    def _drop_unspilled(self, reason):
+        self.metrics['dropped'] += 1
+        # Logged once until spilling succeeds again, not for each trap
+        if not self.spill_failed:
+            self.spill_failed = True
+            LOG.error("Failed to spill traps to %s, dropping them: %s",
+                      self.spill_file, reason)
+
+    def _load_spilled(self):
+        """Queue spilled traps while there is room in the queue."""
+        with open(self.spill_file) as f:
+            f.seek(self.spill_offset)
+            while not self.queue.full():
+                line = f.readline()
+                if not line:
+                    break
+                self.metrics['spill_depth'] -= 1
+                try:
+                    self.queue.put_nowait(json.loads(line))
+                except ValueError:
+                    self.metrics['dropped'] += 1
+                    LOG.warning("Dropping invalid spilled trap: %s", line)
+            self.spill_offset = f.tell()
+            finished = not f.readline()
+        if finished:
+            # All spilled traps are queued, start the file over
+            open(self.spill_file, 'w').close()
+            self.spill_offset = 0
+            self.spill_size = 0
+            self.metrics['spill_depth'] = 0
+
+    def _work(self):
+        while True:
+            if self.metrics['spill_depth'] and self.queue.empty():
+                self._load_spilled()
+            trap = self.queue.get()
+            try:
+                self.handler(trap)
+                self.metrics['processed'] += 1
+            except exception.DelfinException as e:
+                self.metrics['failed'] += 1
+                LOG.exception(_("Failed to process alert report (%s).")
+                              % e.msg)
+            except Exception as e:
+                self.metrics['failed'] += 1
+                LOG.exception(six.text_type(e))
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['queue_depth'] = self.queue.qsize()
+        return metrics
@@ -12,7 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fcntl
+import json
+import os
+import socket
+
 import six
+from oslo_config import cfg
 from oslo_log import log
 from oslo_service import periodic_task
 from pysnmp.carrier.asyncore.dgram import udp
@@ -26,27 +32,39 @@ from delfin import db
 from delfin import exception
 from delfin import manager
 from delfin.alert_manager import alert_processor
+from delfin.alert_manager import alert_source_index
 from delfin.alert_manager import constants
 from delfin.alert_manager import rpcapi
 from delfin.alert_manager import snmp_validator
+from delfin.alert_manager import trap_queue
 from delfin.common import constants as common_constants
 from delfin.db import api as db_api
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
 
 
 class TrapReceiver(manager.Manager):
     """Trap listening and processing functions"""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self, service_name=None, *args, **kwargs):
         self.mib_view_controller = kwargs.get('mib_view_controller')
         self.snmp_engine = kwargs.get('snmp_engine')
         self.trap_receiver_address = kwargs.get('trap_receiver_address')
         self.trap_receiver_port = kwargs.get('trap_receiver_port')
+        # Index among trap receiver processes, None if it is not known
+        self.worker_index = 0
+        self.worker_lock_file = None
         self.alert_processor = alert_processor.AlertProcessor()
+        self.alert_sources = alert_source_index.AlertSourceIndex()
+        self.trap_queue = trap_queue.TrapQueue(
+            self._process_trap, CONF.trap_workers, CONF.trap_queue_size,
+            overflow=CONF.trap_queue_overflow,
+            spill_file=CONF.trap_spill_file,
+            spill_max_size=CONF.trap_spill_max_size)
         self.snmp_validator = snmp_validator.SNMPValidator()
         self.alert_rpc_api = rpcapi.AlertAPI()
         super(TrapReceiver, self).__init__(host=kwargs.get('host'))
@@ -54,9 +72,12 @@ class TrapReceiver(manager.Manager):
     def sync_snmp_config(self, ctxt, snmp_config_to_del=None,
                          snmp_config_to_add=None):
         if snmp_config_to_del:
+            self.alert_sources.remove(snmp_config_to_del['storage_id'])
             self._delete_snmp_config(ctxt, snmp_config_to_del)
 
         if snmp_config_to_add:
+            # Indexed again when its next trap is received
+            self.alert_sources.remove(snmp_config_to_add['storage_id'])
             self.snmp_validator.validate(ctxt, snmp_config_to_add)
             self._add_snmp_config(ctxt, snmp_config_to_add)
 
@@ -162,10 +183,16 @@ class TrapReceiver(manager.Manager):
     def _add_transport(self):
         """Configures the transport parameters for the snmp engine."""
         try:
+            transport = udp.UdpTransport()
+            if CONF.trap_receiver_workers > 1:
+                # Each trap receiver process binds the same port, traps are
+                # balanced between them by the kernel
+                transport.socket.setsockopt(socket.SOL_SOCKET,
+                                            socket.SO_REUSEPORT, 1)
             config.addTransport(
                 self.snmp_engine,
                 udp.domainName,
-                udp.UdpTransport().openServerMode(
+                transport.openServerMode(
                     (self.trap_receiver_address, int(self.trap_receiver_port)))
             )
         except Exception:
@@ -190,9 +217,18 @@ class TrapReceiver(manager.Manager):
 
         return alert_source[0]
 
+    def _get_alert_source_entry(self, source_ip):
+        """Gets indexed alert source for given source ip address."""
+        entry = self.alert_sources.get(source_ip)
+        if entry is None:
+            alert_source = self._get_alert_source_by_host(source_ip)
+            entry = self.alert_sources.add(context.get_admin_context(),
+                                           alert_source)
+        return entry
+
     def _cb_fun(self, state_reference, context_engine_id, context_name,
                 var_binds, cb_ctx):
-        """Callback function to process the incoming trap."""
+        """Callback function to queue the incoming trap."""
         exec_context = self.snmp_engine.observer.getExecutionContext(
             'rfc3412.receiveMessage:request')
         LOG.debug("Get notification from: %s" %
@@ -200,44 +236,52 @@ class TrapReceiver(manager.Manager):
         alert = {}
 
         try:
-            # transportAddress contains both ip and port, extract ip address
-            source_ip = exec_context['transportAddress'][0]
-            alert_source = self._get_alert_source_by_host(source_ip)
-
-            # In case of non v3 version, community string is used to map the
-            # trap. Pysnmp library helps to filter traps whose community string
-            # are not configured. But if a given community name x is configured
-            # for storage1, if the trap is received with x from storage 2,
-            # library will allow the trap. So for non v3 version, we need to
-            # verify that community name is configured at alert source db for
-            # the storage which is sending traps.
-            # context_name contains the incoming community string value
-            if exec_context['securityModel'] != constants.SNMP_V3_INT \
-                    and cryptor.decode(alert_source['community_string']) \
-                    != str(context_name):
-                msg = (_("Community string not matching with alert source %s, "
-                         "dropping it.") % source_ip)
-                raise exception.InvalidResults(msg)
-
             for oid, val in var_binds:
                 # Fill raw oid and values
                 oid_str = str(oid)
                 alert[oid_str] = str(val)
 
-            # Fill additional info to alert info
-            alert['transport_address'] = source_ip
-            alert['storage_id'] = alert_source['storage_id']
-
-            # Handover to alert processor for model translation and export
-            self.alert_processor.process_alert_info(alert)
-        except exception.DelfinException as e:
-            # Log and end the trap processing error flow
-            err_msg = _("Failed to process alert report (%s).") % e.msg
-            LOG.exception(err_msg)
+            # transportAddress contains both ip and port, extract ip address
+            trap = {'source_ip': exec_context['transportAddress'][0],
+                    'security_model': exec_context['securityModel'],
+                    'context_name': str(context_name),
+                    'alert': alert}
+
+            # Parsed and exported by trap queue workers, so that reception
+            # is not held up by drivers or exporters
+            self.trap_queue.put(trap)
         except Exception as e:
             err_msg = six.text_type(e)
             LOG.exception(err_msg)
 
+    def _process_trap(self, trap):
+        """Process a trap queued by _cb_fun."""
+        source_ip = trap['source_ip']
+        entry = self._get_alert_source_entry(source_ip)
+
+        # In case of non v3 version, community string is used to map the
+        # trap. Pysnmp library helps to filter traps whose community string
+        # are not configured. But if a given community name x is configured
+        # for storage1, if the trap is received with x from storage 2,
+        # library will allow the trap. So for non v3 version, we need to
+        # verify that community name is configured at alert source db for
+        # the storage which is sending traps.
+        # context_name contains the incoming community string value
+        if trap['security_model'] != constants.SNMP_V3_INT \
+                and entry.community_string != trap['context_name']:
+            msg = (_("Community string not matching with alert source %s, "
+                     "dropping it.") % source_ip)
+            raise exception.InvalidResults(msg)
+
+        # Fill additional info to alert info
+        alert = trap['alert']
+        alert['transport_address'] = source_ip
+        alert['storage_id'] = entry.alert_source['storage_id']
+
+        # Handover to alert processor for model translation and export
+        self.alert_processor.process_alert_info(
+            alert, storage=entry.storage, driver_cls=entry.driver_cls)
+
     def _load_snmp_config(self):
         """Load snmp config from database when service start."""
         ctxt = context.get_admin_context()
@@ -251,14 +295,62 @@ class TrapReceiver(manager.Manager):
                 snmp_config = dict()
                 snmp_config.update(alert_source)
                 self._add_snmp_config(ctxt, snmp_config)
+                self._index_alert_source(ctxt, snmp_config)
                 marker = alert_source['storage_id']
             if len(alert_sources) < limit:
                 finished = True
 
+    def _index_alert_source(self, ctxt, alert_source):
+        try:
+            self.alert_sources.add(ctxt, alert_source)
+        except Exception as e:
+            # Indexed when its first trap is received
+            LOG.warning("Failed to index alert source of storage %s: %s",
+                        alert_source['storage_id'], six.text_type(e))
+
+    def _claim_worker_index(self):
+        """Claim an index among the trap receiver processes.
+
+        Each index is held by a lock file until the process exits, so a
+        process restarted by the launcher takes the index, and the spilled
+        traps, of the one it replaces.
+        """
+        if CONF.trap_receiver_workers == 1:
+            return 0
+        for index in range(CONF.trap_receiver_workers):
+            try:
+                lock_file = open('%s.%s.lock' % (CONF.trap_spill_file,
+                                                 index), 'a')
+            except (IOError, OSError) as e:
+                LOG.warning("Failed to claim trap receiver index: %s",
+                            six.text_type(e))
+                return None
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                lock_file.close()
+                continue
+            self.worker_lock_file = lock_file
+            return index
+        return None
+
+    def _start_workers(self):
+        """Start trap and exporter workers in the current process."""
+        self.worker_index = self._claim_worker_index()
+        if CONF.trap_receiver_workers > 1:
+            # Each process spills traps to a file of its own
+            self.trap_queue.spill_file = '%s.%s' % (
+                CONF.trap_spill_file,
+                os.getpid() if self.worker_index is None
+                else self.worker_index)
+        self.trap_queue.start()
+        self.alert_processor.exporter_manager.start()
+
     def start(self):
         """Starts the snmp trap receiver with necessary prerequisites."""
         snmp_engine = engine.SnmpEngine()
         self.snmp_engine = snmp_engine
+        self._start_workers()
 
         try:
             # Load all the mibs and do snmp config
@@ -293,9 +385,97 @@ class TrapReceiver(manager.Manager):
             self.snmp_engine.transportDispatcher.closeDispatcher()
         LOG.info("Trap receiver stopped.")
 
+    @periodic_task.periodic_task
+    def report_trap_metrics(self, ctxt):
+        metrics = self._get_process_metrics()
+        for name, group_metrics in metrics.items():
+            LOG.info('Metrics of %s: %s', name, group_metrics)
+        self._publish_metrics(metrics)
+
+    def get_trap_metrics(self, ctxt):
+        """Return the counters of trap processing of all trap receiver
+        processes of the host.
+
+        The call is served by one of the processes, the counters of the
+        others are the ones they published at their last report. Maximums
+        are the highest of the processes, averages are left out when
+        counters of several processes are summed.
+        """
+        metrics = self._get_process_metrics()
+        if CONF.trap_receiver_workers == 1 or self.worker_index is None:
+            return metrics
+        self._publish_metrics(metrics)
+        for index in range(CONF.trap_receiver_workers):
+            if index == self.worker_index:
+                continue
+            try:
+                with open(self._get_metrics_file(index)) as f:
+                    process_metrics = json.load(f)
+            except (IOError, OSError, ValueError):
+                # The process is not started or has not reported yet
+                continue
+            metrics = self._merge_metrics(metrics, process_metrics)
+        return metrics
+
+    def _get_process_metrics(self):
+        """Return the counters of trap processing of this process."""
+        return {
+            'trap queue': self.trap_queue.get_metrics(),
+            'alert coalescing':
+                self.alert_processor.deduplicator.get_metrics(),
+            'alert exporters':
+                self.alert_processor.exporter_manager.get_metrics(),
+        }
+
+    @staticmethod
+    def _get_metrics_file(index):
+        return '%s.%s.metrics' % (CONF.trap_spill_file, index)
+
+    def _publish_metrics(self, metrics):
+        """Write metrics of this process for the other processes to read."""
+        if CONF.trap_receiver_workers == 1 or self.worker_index is None:
+            return
+        metrics_file = self._get_metrics_file(self.worker_index)
+        try:
+            # Replaced at once so that it is never read half written
+            with open(metrics_file + '.tmp', 'w') as f:
+                json.dump(metrics, f)
+            os.rename(metrics_file + '.tmp', metrics_file)
+        except (IOError, OSError) as e:
+            LOG.warning("Failed to publish trap metrics: %s",
+                        six.text_type(e))
+
+    def _merge_metrics(self, metrics, other):
+        merged = {}
+        for key in set(metrics) | set(other):
+            value = metrics.get(key)
+            other_value = other.get(key)
+            if key.startswith('avg_'):
+                continue
+            elif value is None or other_value is None:
+                merged[key] = other_value if value is None else value
+            elif isinstance(value, dict):
+                merged[key] = self._merge_metrics(value, other_value)
+            elif key.startswith('max_'):
+                merged[key] = max(value, other_value)
+            else:
+                merged[key] = value + other_value
+        return merged
+
+    @periodic_task.periodic_task
+    def flush_alerts(self, ctxt):
+        """Periodical task to export coalesced repeats of alerts."""
+        self.alert_processor.flush_alerts(ctxt)
+
     @periodic_task.periodic_task(spacing=1800, run_immediately=True)
     def heart_beat_task_spawn(self, ctxt):
         """Periodical task to spawn snmp heart beat check."""
+        # Alert sources are indexed again with up to date storage info
+        self.alert_sources.clear()
+        # Checks are spawned by one of trap receiver processes, all of them
+        # if the index of process is not known
+        if self.worker_index not in (0, None):
+            return
         LOG.info("Spawn the snmp heart beat check task.")
         alert_source_list = db.alert_source_get_all(ctxt)
         for alert_source in alert_source_list:
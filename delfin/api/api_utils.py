@@ -87,6 +87,39 @@ def get_pagination_params(params, max_limit=None):
     return marker, limit, offset
 
 
+def get_stream_param(params):
+    """Extract the stream flag from request's dictionary (defaults to False).
+
+    A streamed list returns all the matching items, so it can not be
+    combined with 'limit', 'marker', 'offset' or 'cursor'.
+    """
+    try:
+        stream = strutils.bool_from_string(params.pop('stream', False),
+                                           strict=True)
+    except ValueError:
+        msg = _('stream param must be a boolean')
+        raise exception.InvalidInput(msg)
+    if stream and any(key in params for key in
+                      ('limit', 'marker', 'offset', 'cursor')):
+        msg = _('stream param can not be used with limit, marker, offset '
+                'or cursor')
+        raise exception.InvalidInput(msg)
+    return stream
+
+
+def get_cursor_param(params):
+    """Extract the keyset pagination cursor from request's dictionary.
+
+    The cursor is returned as 'next_cursor' with the previous page, and can
+    not be combined with 'marker' or 'offset'.
+    """
+    cursor = params.pop('cursor', None)
+    if cursor is not None and ('marker' in params or 'offset' in params):
+        msg = _('cursor param can not be used with marker or offset')
+        raise exception.InvalidInput(msg)
+    return cursor
+
+
 def _get_limit_param(params, max_limit=None):
     """Extract integer limit from request's dictionary or fail.
 
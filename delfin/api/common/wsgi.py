@@ -238,13 +238,53 @@ class DictSerializer(ActionDispatcher):
     def default(self, data):
         return ""
 
+    def serialize_stream(self, collection):
+        """Serialize a Collection into an iterable of body chunks."""
+        yield self.serialize({collection.key: list(collection.items)})
+
 
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
+    # Number of items serialized into one chunk of a streamed body
+    stream_chunk_items = 100
+
     def default(self, data):
         return six.b(jsonutils.dumps(data))
 
+    def serialize_stream(self, collection):
+        """Serialize the items of a Collection one chunk at a time.
+
+        The items are only got from the collection as the body is sent, so
+        the whole collection is never held in memory.
+        """
+        yield six.b('{%s: [' % jsonutils.dumps(collection.key))
+        separator = ''
+        chunk = []
+        for item in collection.items:
+            chunk.append(jsonutils.dumps(item))
+            if len(chunk) >= self.stream_chunk_items:
+                yield six.b(separator + ', '.join(chunk))
+                separator = ', '
+                chunk = []
+        if chunk:
+            yield six.b(separator + ', '.join(chunk))
+        yield six.b(']}')
+
+
+class Collection(object):
+    """A collection of items serialized as the response body is sent.
+
+    Controller methods may return a Collection wrapped in a ResponseObject
+    to stream a large list, e.g. rows got from a server-side cursor,
+    instead of building the whole response body first. Errors raised by
+    the items can no longer change the response status.
+    """
+
+    def __init__(self, key, items):
+        self.key = key
+        self.items = items
+
 
 def serializers(**serializers):
     """Attaches serializers to a method.
@@ -411,7 +451,9 @@ class ResponseObject(object):
         for hdr, value in self._headers.items():
             response.headers[hdr] = six.text_type(value)
         response.headers['Content-Type'] = six.text_type(content_type)
-        if self.obj is not None:
+        if isinstance(self.obj, Collection):
+            response.app_iter = serializer.serialize_stream(self.obj)
+        elif self.obj is not None:
             response.body = serializer.serialize(self.obj)
 
         return response
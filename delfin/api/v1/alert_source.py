@@ -22,6 +22,7 @@ from delfin.api import validation
 from delfin.api.common import wsgi
 from delfin.api.schemas import alert_source as schema_alert
 from delfin.api.views import alert_source as alert_view
+from delfin.common import alert_util
 from delfin.common import constants
 
 LOG = log.getLogger(__name__)
@@ -46,7 +47,7 @@ class AlertSourceController(wsgi.Controller):
         db.storage_get(ctx, id)
         alert_source = self._input_check(alert_source)
 
-        snmp_config_to_del = self._get_snmp_config_brief(ctx, id)
+        snmp_config_to_del = alert_util.get_snmp_config_brief(ctx, id)
         if snmp_config_to_del is not None:
             alert_source = db.alert_source_update(ctx, id, alert_source)
         else:
@@ -68,7 +69,7 @@ class AlertSourceController(wsgi.Controller):
     def delete(self, req, id):
         ctx = req.environ['delfin.context']
 
-        snmp_config_to_del = self._get_snmp_config_brief(ctx, id)
+        snmp_config_to_del = alert_util.get_snmp_config_brief(ctx, id)
         if snmp_config_to_del is not None:
             self.alert_rpcapi.sync_snmp_config(ctx, snmp_config_to_del,
                                                None)
@@ -146,24 +147,6 @@ class AlertSourceController(wsgi.Controller):
 
         return alert_source
 
-    def _get_snmp_config_brief(self, ctx, storage_id):
-        """
-        Get snmp configuration that will be used to delete from trap receiver.
-        Only community_index(storage_id) required for snmp v1/v2 deletion,
-        user_name and engine_id are required for snmp v3. So here we only get
-        those required parameters. Return None if configuration not found.
-        """
-        try:
-            alert_source = db.alert_source_get(ctx, storage_id)
-            snmp_config = {"storage_id": alert_source["storage_id"],
-                           "version": alert_source["version"]}
-            if snmp_config["version"].lower() == "snmpv3":
-                snmp_config["username"] = alert_source["username"]
-                snmp_config["engine_id"] = alert_source["engine_id"]
-            return snmp_config
-        except exception.AlertSourceNotFound:
-            return None
-
     def _decrypt_auth_key(self, alert_source):
         auth_key = alert_source.get('auth_key', None)
         privacy_key = alert_source.get('privacy_key', None)
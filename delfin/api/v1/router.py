@@ -39,6 +39,11 @@ class APIRouter(common.APIRouter):
                        action="sync_all",
                        conditions={"method": ["POST"]})
 
+        mapper.connect("storages", "/storages/{id}/sync-runs",
+                       controller=self.resources['storages'],
+                       action="show_sync_runs",
+                       conditions={"method": ["GET"]})
+
         self.resources['access_info'] = access_info.create_resource()
         mapper.connect("storages", "/storages/{id}/access-info",
                        controller=self.resources['access_info'],
@@ -39,11 +39,26 @@ class StoragePoolController(wsgi.Controller):
         query_params.update(req.GET)
         # update options  other than filters
         sort_keys, sort_dirs = api_utils.get_sort_params(query_params)
+        stream = api_utils.get_stream_param(query_params)
+        cursor = api_utils.get_cursor_param(query_params)
         marker, limit, offset = api_utils.get_pagination_params(query_params)
         # strip out options except supported search  options
         api_utils.remove_invalid_options(
             ctxt, query_params, self._get_storage_pools_search_options())
 
+        if stream:
+            storage_pools = db.storage_pool_get_all_iter(
+                ctxt, sort_keys, sort_dirs, query_params)
+            return wsgi.ResponseObject(
+                storage_pool_view.build_storage_pools_stream(storage_pools))
+
+        if marker is None and not offset:
+            # Keyset pagination, which costs the same for any page
+            storage_pools, next_cursor = db.storage_pool_get_page(
+                ctxt, cursor, limit, sort_keys, sort_dirs, query_params)
+            return storage_pool_view.build_storage_pools(storage_pools,
+                                                         next_cursor)
+
         storage_pools = db.storage_pool_get_all(
             ctxt, marker, limit, sort_keys, sort_dirs, query_params, offset)
         return storage_pool_view.build_storage_pools(storage_pools)
@@ -16,16 +16,17 @@ import copy
 
 from oslo_config import cfg
 from oslo_log import log
-from oslo_utils import timeutils
 
 from delfin import coordination
 from delfin import db
 from delfin import exception
+from delfin.alert_manager import rpcapi as alert_rpcapi
 from delfin.api import api_utils
 from delfin.api import validation
 from delfin.api.common import wsgi
 from delfin.api.schemas import storages as schema_storages
 from delfin.api.views import storages as storage_view
+from delfin.common import alert_util
 from delfin.common import constants
 from delfin.drivers import api as driverapi
 from delfin.i18n import _
@@ -40,6 +41,7 @@ class StorageController(wsgi.Controller):
     def __init__(self):
         super().__init__()
         self.task_rpcapi = task_rpcapi.TaskAPI()
+        self.alert_rpcapi = alert_rpcapi.AlertAPI()
         self.driver_api = driverapi.API()
         self.search_options = ['name', 'vendor', 'model', 'status',
                                'serial_number']
@@ -61,12 +63,26 @@ class StorageController(wsgi.Controller):
 
         storages = db.storage_get_all(ctxt, marker, limit, sort_keys,
                                       sort_dirs, query_params, offset)
-        return storage_view.build_storages(storages)
+        # Only the running sync runs of the listed storages are read
+        sync_runs = db.sync_run_get_all(
+            ctxt, storage_ids=[storage['id'] for storage in storages],
+            expiration=CONF.sync_task_expiration)
+        syncing_ids = set(sync_run['storage_id'] for sync_run in sync_runs)
+        return storage_view.build_storages(storages, syncing_ids)
 
     def show(self, req, id):
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
-        return storage_view.build_storage(storage)
+        syncing = any(resources.is_sync_running(sync_run)
+                      for sync_run in db.sync_run_get_all(ctxt, id))
+        return storage_view.build_storage(storage, syncing)
+
+    def show_sync_runs(self, req, id):
+        """Show the last sync run of each type of resources of a storage."""
+        ctxt = req.environ['delfin.context']
+        storage = db.storage_get(ctxt, id)
+        sync_runs = db.sync_run_get_all(ctxt, storage['id'])
+        return storage_view.build_sync_runs(sync_runs)
 
     @wsgi.response(201)
     @validation.schema(schema_storages.create)
@@ -107,13 +123,18 @@ class StorageController(wsgi.Controller):
     def delete(self, req, id):
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
+        snmp_config_to_del = alert_util.get_snmp_config_brief(ctxt,
+                                                              storage['id'])
 
-        for subclass in resources.StorageResourceTask.__subclasses__():
-            self.task_rpcapi.remove_storage_resource(
-                ctxt,
-                storage['id'],
-                subclass.__module__ + '.' + subclass.__name__)
+        # Resources of the storage are removed in background by batches
+        db.storage_removal_start(ctxt, storage['id'])
+        self.task_rpcapi.remove_storage(ctxt, storage['id'])
         self.task_rpcapi.remove_storage_in_cache(ctxt, storage['id'])
+        if snmp_config_to_del is not None:
+            # Traps of the storage are dropped by trap receivers at once,
+            # its alert source being removed in background
+            self.alert_rpcapi.sync_snmp_config(ctxt, snmp_config_to_del,
+                                               None)
 
     @wsgi.response(202)
     def sync_all(self, req):
@@ -128,22 +149,18 @@ class StorageController(wsgi.Controller):
         storages = db.storage_get_all(ctxt)
         LOG.debug("Total {0} registered storages found in database".
                   format(len(storages)))
-        resource_count = len(resources.StorageResourceTask.__subclasses__())
 
         for storage in storages:
             try:
-                _set_synced_if_ok(ctxt, storage['id'], resource_count)
-            except exception.InvalidInput as e:
+                resource_tasks = resources.start_sync(ctxt, storage['id'])
+            except exception.StorageIsSyncing as e:
                 LOG.warn('Can not start new sync task for %s, reason is %s'
                          % (storage['id'], e.msg))
                 continue
             else:
-                for subclass in \
-                        resources.StorageResourceTask.__subclasses__():
-                    self.task_rpcapi.sync_storage_resource(
-                        ctxt,
-                        storage['id'],
-                        subclass.__module__ + '.' + subclass.__name__)
+                self.task_rpcapi.sync_storage(
+                    ctxt, storage['id'],
+                    [task.resource_type for task in resource_tasks])
 
     @wsgi.response(202)
     def sync(self, req, id):
@@ -154,13 +171,10 @@ class StorageController(wsgi.Controller):
         """
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
-        resource_count = len(resources.StorageResourceTask.__subclasses__())
-        _set_synced_if_ok(ctxt, storage['id'], resource_count)
-        for subclass in resources.StorageResourceTask.__subclasses__():
-            self.task_rpcapi.sync_storage_resource(
-                ctxt,
-                storage['id'],
-                subclass.__module__ + '.' + subclass.__name__)
+        resource_tasks = resources.start_sync(ctxt, storage['id'])
+        self.task_rpcapi.sync_storage(
+            ctxt, storage['id'],
+            [task.resource_type for task in resource_tasks])
 
     def _storage_exist(self, context, access_info):
         access_info_dict = copy.deepcopy(access_info)
@@ -195,27 +209,3 @@ class StorageController(wsgi.Controller):
 
 def create_resource():
     return wsgi.Resource(StorageController())
-
-
-@coordination.synchronized('{storage_id}')
-def _set_synced_if_ok(context, storage_id, resource_count):
-    try:
-        storage = db.storage_get(context, storage_id)
-    except exception.StorageNotFound:
-        msg = 'Storage %s not found when try to set sync_status' \
-              % storage_id
-        raise exception.InvalidInput(message=msg)
-    else:
-        last_update = storage['updated_at'] or storage['created_at']
-        current_time = timeutils.utcnow()
-        interval = (current_time - last_update).seconds
-        # If last synchronization was within
-        # CONF.sync_task_expiration(in seconds), and the sync status
-        # is bigger than 0, it means some sync task is still running,
-        # the new sync task should not launch
-        if interval < CONF.sync_task_expiration and \
-                storage['sync_status'] > 0:
-            raise exception.StorageIsSyncing(storage['id'])
-        storage['sync_status'] = resource_count * constants.ResourceSync.START
-        storage['updated_at'] = current_time
-        db.storage_update(context, storage['id'], storage)
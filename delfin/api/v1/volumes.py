@@ -35,11 +35,25 @@ class VolumeController(wsgi.Controller):
         query_params.update(req.GET)
         # update options  other than filters
         sort_keys, sort_dirs = api_utils.get_sort_params(query_params)
+        stream = api_utils.get_stream_param(query_params)
+        cursor = api_utils.get_cursor_param(query_params)
         marker, limit, offset = api_utils.get_pagination_params(query_params)
         # strip out options except supported search  options
         api_utils.remove_invalid_options(ctxt, query_params,
                                          self._get_volumes_search_options())
 
+        if stream:
+            volumes = db.volume_get_all_iter(ctxt, sort_keys, sort_dirs,
+                                             query_params)
+            return wsgi.ResponseObject(
+                volume_view.build_volumes_stream(volumes))
+
+        if marker is None and not offset:
+            # Keyset pagination, which costs the same for any page
+            volumes, next_cursor = db.volume_get_page(
+                ctxt, cursor, limit, sort_keys, sort_dirs, query_params)
+            return volume_view.build_volumes(volumes, next_cursor)
+
         volumes = db.volume_get_all(ctxt, marker, limit, sort_keys,
                                     sort_dirs, query_params, offset)
         return volume_view.build_volumes(volumes)
@@ -11,12 +11,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import copy
 from delfin import cryptor
 
 
 def build_alert_source(value):
-    view = copy.deepcopy(value)
+    view = dict(value)
     view.pop("auth_key")
     view.pop("privacy_key")
     version = view['version']
@@ -32,4 +31,4 @@ def build_alert_source(value):
     elif version.lower() == 'snmpv3':
         # Remove the key not belong to snmpv3
         view.pop('community_string')
-    return dict(view)
+    return view
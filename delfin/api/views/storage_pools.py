@@ -11,16 +11,28 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import copy
+from delfin.api.common import wsgi
 
 
-def build_storage_pools(storage_pools):
+def build_storage_pools(storage_pools, next_cursor=None):
     # Build list of storage_pools
     views = [build_storage_pool(storage_pool)
              for storage_pool in storage_pools]
-    return dict(storage_pools=views)
+    result = dict(storage_pools=views)
+    if next_cursor:
+        result['next_cursor'] = next_cursor
+    return result
+
+
+def build_storage_pools_stream(storage_pools):
+    # Views are built one by one as the response body is sent
+    return wsgi.Collection('storage_pools',
+                           (build_storage_pool(storage_pool)
+                            for storage_pool in storage_pools))
 
 
 def build_storage_pool(storage_pool):
-    view = copy.deepcopy(storage_pool)
-    return dict(view)
+    view = dict(storage_pool)
+    # Hash of the backend content is only used by resource sync
+    view.pop('resource_hash', None)
+    return view
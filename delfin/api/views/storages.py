@@ -11,22 +11,32 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import copy
 
-from delfin.common import constants
 
-
-def build_storages(storages):
+def build_storages(storages, syncing_ids=()):
     # Build list of storages
-    views = [build_storage(storage)
+    views = [build_storage(storage, storage['id'] in syncing_ids)
              for storage in storages]
     return dict(storages=views)
 
 
-def build_storage(storage):
-    view = copy.deepcopy(storage)
-    if view['sync_status'] == constants.SyncStatus.SYNCED:
-        view['sync_status'] = 'SYNCED'
-    else:
+def build_storage(storage, syncing=False):
+    view = dict(storage)
+    if syncing:
         view['sync_status'] = 'SYNCING'
-    return dict(view)
+    else:
+        view['sync_status'] = 'SYNCED'
+    return view
+
+
+def build_sync_runs(sync_runs):
+    views = [build_sync_run(sync_run) for sync_run in sync_runs]
+    return dict(sync_runs=views)
+
+
+def build_sync_run(sync_run):
+    view = {}
+    for field in ('resource_type', 'status', 'started_at', 'ended_at',
+                  'duration'):
+        view[field] = sync_run[field]
+    return view
@@ -11,16 +11,27 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import copy
+from delfin.api.common import wsgi
 
 
-def build_volumes(volumes):
+def build_volumes(volumes, next_cursor=None):
     # Build list of volumes
     views = [build_volume(volume)
              for volume in volumes]
-    return dict(volumes=views)
+    result = dict(volumes=views)
+    if next_cursor:
+        result['next_cursor'] = next_cursor
+    return result
+
+
+def build_volumes_stream(volumes):
+    # Views are built one by one as the response body is sent
+    return wsgi.Collection('volumes',
+                           (build_volume(volume) for volume in volumes))
 
 
 def build_volume(volume):
-    view = copy.deepcopy(volume)
-    return dict(view)
+    view = dict(volume)
+    # Hash of the backend content is only used by resource sync
+    view.pop('resource_hash', None)
+    return view
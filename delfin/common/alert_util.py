@@ -18,6 +18,9 @@
 #    under the License.
 from oslo_log import log as logging
 
+from delfin import db
+from delfin import exception
+
 LOG = logging.getLogger(__name__)
 
 
@@ -30,6 +33,25 @@ def fill_storage_attributes(alert_model, storage):
     alert_model['serial_number'] = storage['serial_number']
 
 
+def get_snmp_config_brief(ctx, storage_id):
+    """
+    Get snmp configuration that will be used to delete from trap receiver.
+    Only community_index(storage_id) required for snmp v1/v2 deletion,
+    user_name and engine_id are required for snmp v3. So here we only get
+    those required parameters. Return None if configuration not found.
+    """
+    try:
+        alert_source = db.alert_source_get(ctx, storage_id)
+        snmp_config = {"storage_id": alert_source["storage_id"],
+                       "version": alert_source["version"]}
+        if snmp_config["version"].lower() == "snmpv3":
+            snmp_config["username"] = alert_source["username"]
+            snmp_config["engine_id"] = alert_source["engine_id"]
+        return snmp_config
+    except exception.AlertSourceNotFound:
+        return None
+
+
 def is_alert_in_time_range(query_para, occur_time):
     # query_para contains optional begin_time and end_time
     # This function checks for their existence and validates if occur_time
@@ -91,6 +91,22 @@ global_opts = [
     cfg.IntOpt('sync_task_expiration',
                default=1800,
                help='Sync task expiration in seconds.'),
+    cfg.BoolOpt('sync_resource_by_page',
+                default=False,
+                help='Whether to sync storage pools and volumes page by '
+                     'page. Each page got from driver is compared with the '
+                     'resources in database and persisted before getting '
+                     'the next one, which keeps memory usage flat for '
+                     'large storage systems.'),
+    cfg.IntOpt('storage_removal_batch_size',
+               default=1000,
+               min=1,
+               help='Number of volumes or storage pools deleted in one '
+                    'transaction when removing a storage.'),
+    cfg.IntOpt('storage_removal_expiration',
+               default=600,
+               help='Seconds without progress after which the removal of '
+                    'a storage is considered lost and resumed.'),
     cfg.BoolOpt('snmp_validation_enabled',
                 default=True,
                 help='Whether alert source configuration to be validated '
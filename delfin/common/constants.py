@@ -57,6 +57,16 @@ class SyncStatus(object):
     SYNCED = 0
 
 
+class SyncRunStatus(object):
+    SYNCING = 'syncing'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+class StorageRemovalStatus(object):
+    REMOVING = 'removing'
+
+
 class VolumeType(object):
     THICK = 'thick'
     THIN = 'thin'
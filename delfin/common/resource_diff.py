@@ -0,0 +1,162 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Diff engine to classify resources reported by a backend against the
+resources stored in the database.
+
+Database resources are indexed by their native key once, so classifying
+each backend resource is a dict lookup instead of a list scan. Each
+resource carries a hash of its reported content in 'resource_hash', so
+an unchanged resource is found by comparing hashes only, and a digest of
+all the hashes tells whether anything of a storage changed at all.
+"""
+
+import collections
+import hashlib
+import json
+
+import six
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+# Fields which are not part of the content reported by a backend
+HASH_IGNORE_KEYS = ('id', 'resource_hash')
+
+
+def get_resource_hash(resource):
+    """Return the hash of the content of a resource reported by a backend."""
+    content = dict((field, value) for field, value in resource.items()
+                   if field not in HASH_IGNORE_KEYS)
+    return hashlib.sha1(json.dumps(
+        content, sort_keys=True,
+        default=six.text_type).encode('utf-8')).hexdigest()
+
+
+def get_resources_digest(resource_hashes):
+    """Return one hash for all the resources of a storage.
+
+    :param resource_hashes: dict of native key to resource hash
+    """
+    digest = hashlib.sha1()
+    for native_id in sorted(resource_hashes):
+        digest.update(('%s:%s\n' % (native_id, resource_hashes[native_id]))
+                      .encode('utf-8'))
+    return digest.hexdigest()
+
+
+def hash_resources(storage_resources, key):
+    """Set 'resource_hash' of backend resources.
+
+    :return: dict of native key to resource hash
+    """
+    resource_hashes = {}
+    for resource in storage_resources:
+        resource['resource_hash'] = get_resource_hash(resource)
+        resource_hashes[resource[key]] = resource['resource_hash']
+    return resource_hashes
+
+
+class ResourceDiffer(object):
+    """Classify backend resources against an indexed snapshot of db resources.
+
+    Backend resources can be passed in one or several calls of
+    :meth:`classify`, e.g. one call per page returned by a driver. After
+    the last page, :meth:`get_deleted_ids` returns the ids of db resources
+    which were not reported by the backend.
+
+    A db resource whose 'resource_hash' equals the hash of the backend
+    resource is unchanged without comparing any field, so db resources
+    may only hold 'id', the key and 'resource_hash'. As fields are never
+    compared, a changed resource is updated with all the fields reported
+    by the backend.
+
+    :param db_resources: resources currently stored in database
+    :param key: the native key identifying a resource on the backend,
+        e.g. 'native_volume_id'
+    """
+
+    def __init__(self, db_resources, key):
+        self.key = key
+        self.db_index = {}
+        for db_resource in db_resources:
+            self.db_index[db_resource[key]] = db_resource
+        self.seen_keys = set()
+        self.resource_hashes = {}
+
+    def classify(self, storage_resources):
+        """Classify a batch of backend resources.
+
+        :return: three lists. add_list: the items present in storage but
+            not in db. update_list: the items present in both of them whose
+            hash changed, each item is the whole backend resource with the
+            'id' of the db resource. unchanged_id_list:
+            the db ids of the items present in both of them without any
+            change. A key reported twice in the batch is classified once,
+            with the last resource reported; a key already classified in an
+            earlier batch is ignored.
+        """
+        add_list = []
+        update_list = []
+        unchanged_id_list = []
+
+        resources = collections.OrderedDict()
+        for resource in storage_resources:
+            native_id = resource[self.key]
+            if native_id in resources or native_id in self.resource_hashes:
+                LOG.warning("Resource with %s %s is reported more than "
+                            "once.", self.key, native_id)
+            if native_id not in self.resource_hashes:
+                resources[native_id] = resource
+
+        for native_id, resource in resources.items():
+            resource_hash = get_resource_hash(resource)
+            resource['resource_hash'] = resource_hash
+            self.resource_hashes[native_id] = resource_hash
+            db_resource = self.db_index.get(native_id)
+            if db_resource is None:
+                add_list.append(resource)
+                continue
+
+            self.seen_keys.add(native_id)
+            resource['id'] = db_resource['id']
+            if db_resource.get('resource_hash') == resource_hash:
+                unchanged_id_list.append(db_resource['id'])
+                continue
+            update_list.append(resource)
+
+        return add_list, update_list, unchanged_id_list
+
+    def get_deleted_ids(self):
+        """Return ids of db resources not reported by the backend so far."""
+        return [db_resource['id']
+                for native_id, db_resource in self.db_index.items()
+                if native_id not in self.seen_keys]
+
+    def get_digest(self):
+        """Return the digest of the backend resources classified so far."""
+        return get_resources_digest(self.resource_hashes)
+
+
+def classify_resources(storage_resources, db_resources, key):
+    """Classify backend resources against db resources in one shot.
+
+    :return: four lists, add_list, update_list and unchanged_id_list as
+        described in :meth:`ResourceDiffer.classify`, and delete_id_list:
+        the ids of items present in db but not in storage.
+    """
+    differ = ResourceDiffer(db_resources, key)
+    add_list, update_list, unchanged_id_list = differ.classify(
+        storage_resources)
+    return add_list, update_list, differ.get_deleted_ids(), unchanged_id_list
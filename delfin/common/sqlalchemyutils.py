@@ -18,9 +18,12 @@
 #    under the License.
 
 """Implementation of paginate query."""
+import base64
 import datetime
+import json
 
 from oslo_log import log as logging
+from oslo_utils import timeutils
 from six.moves import range
 import sqlalchemy
 import sqlalchemy.sql as sa_sql
@@ -171,3 +174,120 @@ def paginate_query(query, model, limit, sort_keys, marker=None,
         query = query.offset(offset)
 
     return query
+
+
+def encode_cursor(sort_keys, values):
+    """Encode the sort key values of the last item of a page in a cursor."""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime.datetime):
+            value = {'datetime': value.isoformat()}
+        encoded.append(value)
+    cursor = json.dumps({'keys': list(sort_keys), 'values': encoded})
+    return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_keys):
+    """Return the sort key values encoded in a cursor by encode_cursor.
+
+    :raises InvalidInput: if the cursor is malformed or was built for other
+                          sort keys
+    """
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(
+            cursor.encode('ascii')).decode('utf-8'))
+        keys, values = cursor['keys'], cursor['values']
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise exception.InvalidInput(_('Invalid cursor'))
+    if keys != list(sort_keys) or len(values) != len(keys):
+        raise exception.InvalidInput(
+            _('Cursor does not match the sort keys'))
+    decoded = []
+    for value in values:
+        if isinstance(value, dict):
+            try:
+                value = timeutils.normalize_time(
+                    timeutils.parse_isotime(value['datetime']))
+            except (KeyError, ValueError):
+                raise exception.InvalidInput(_('Invalid cursor'))
+        decoded.append(value)
+    return decoded
+
+
+def _is_never_null(model, sort_key):
+    column = getattr(model, sort_key).property.columns[0]
+    return not column.nullable or column.primary_key or \
+        column.default is not None
+
+
+def keyset_paginate_query(query, model, limit, sort_keys, sort_dirs,
+                          cursor_values=None):
+    """Returns a query with sorting / keyset pagination criteria added.
+
+    Unlike paginate_query, the page following a cursor is selected by
+    comparing the sort keys with the values of the last item of the previous
+    page directly, so no marker row is loaded and the database can seek in
+    an index on the sort keys instead of scanning the skipped rows. When
+    all the sort directions are the same, that is one row value comparison,
+    for example (k1, k2) < (:v1, :v2).
+
+    The last of sort_keys must be unique, and NULL is sorted first as by
+    MySQL and SQLite.
+
+    :param query: the query object to which we should add paging/sorting
+    :param model: the ORM model class
+    :param limit: maximum number of items to return
+    :param sort_keys: array of attributes by which results should be sorted
+    :param sort_dirs: per-column array of sort_dirs, corresponding to sort_keys
+    :param cursor_values: values of sort_keys of the last item of the
+                          previous page, as decoded by decode_cursor
+    :rtype: sqlalchemy.orm.query.Query
+    :return: The query with sorting/pagination added.
+    """
+    query = paginate_query(query, model, None, sort_keys,
+                           sort_dirs=sort_dirs)
+
+    if cursor_values is not None:
+        attrs = [getattr(model, sort_key) for sort_key in sort_keys]
+        if len(set(sort_dirs)) == 1 and None not in cursor_values and (
+                sort_dirs[0] == 'asc' or
+                all(_is_never_null(model, key) for key in sort_keys)):
+            # Rows with NULL sort keys compare as NULL and are left out,
+            # they are all before the cursor in these cases
+            columns = sqlalchemy.tuple_(*attrs)
+            values = sqlalchemy.tuple_(*cursor_values)
+            query = query.filter(columns > values if sort_dirs[0] == 'asc'
+                                 else columns < values)
+        else:
+            query = query.filter(
+                _build_keyset_criteria(attrs, sort_dirs, cursor_values))
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def _build_keyset_criteria(attrs, sort_dirs, values):
+    # (k1 after X1) or (k1 == X1 and k2 after X2) or ..., with NULL
+    # sorted before any value
+    criteria_list = []
+    for i in range(len(attrs)):
+        crit_attrs = []
+        for attr, value in zip(attrs[:i], values[:i]):
+            crit_attrs.append(attr.is_(None) if value is None
+                              else attr == value)
+        attr, value = attrs[i], values[i]
+        if sort_dirs[i] == 'asc':
+            if value is None:
+                crit_attrs.append(attr.isnot(None))
+            else:
+                crit_attrs.append(attr > value)
+        else:
+            if value is None:
+                continue
+            crit_attrs.append(sqlalchemy.or_(attr < value, attr.is_(None)))
+        criteria_list.append(sqlalchemy.and_(*crit_attrs))
+    if not criteria_list:
+        return sqlalchemy.false()
+    return sqlalchemy.or_(*criteria_list)
@@ -13,6 +13,7 @@
 """Tooz Coordination and locking utilities."""
 
 import inspect
+import time
 
 import decorator
 from oslo_config import cfg
@@ -20,6 +21,7 @@ from oslo_log import log
 from oslo_utils import uuidutils
 import six
 from tooz import coordination
+from tooz import hashring
 from tooz import locking
 
 from delfin import cryptor
@@ -45,7 +47,11 @@ coordination_opts = [
                help='The backend server for distributed coordination.'),
     cfg.IntOpt('expiration',
                default=100,
-               help='The expiration(in second) of the lock.')
+               help='The expiration(in second) of the lock.'),
+    cfg.IntOpt('membership_refresh_interval',
+               default=10,
+               help='Seconds between two reloads of the members of a '
+                    'coordination group used to distribute work.'),
 ]
 
 CONF = cfg.CONF
@@ -108,6 +114,103 @@ class Coordinator(object):
         else:
             raise exception.LockCreationFailed(_('Coordinator uninitialized.'))
 
+    def join_group(self, group_id, capabilities=b''):
+        """Join a group, creating it if it does not exist yet.
+
+        :param str group_id: The group name.
+        :param capabilities: The capabilities of this member, readable by
+            other members.
+        """
+        group_id = (self.prefix + group_id).encode('ascii')
+        try:
+            self.coordinator.create_group(group_id).get()
+        except coordination.GroupAlreadyExist:
+            pass
+        try:
+            self.coordinator.join_group(group_id, capabilities).get()
+        except coordination.MemberAlreadyExist:
+            pass
+
+    def leave_group(self, group_id):
+        """Leave a group, if joined.
+
+        :param str group_id: The group name.
+        """
+        group_id = (self.prefix + group_id).encode('ascii')
+        try:
+            self.coordinator.leave_group(group_id).get()
+        except (coordination.GroupNotCreated,
+                coordination.MemberNotJoined):
+            pass
+
+    def get_members(self, group_id):
+        """Return the capabilities of the live members of a group.
+
+        :param str group_id: The group name.
+        :return: dict of member id to member capabilities
+        """
+        group_id = (self.prefix + group_id).encode('ascii')
+        try:
+            members = self.coordinator.get_members(group_id).get()
+        except coordination.GroupNotCreated:
+            return {}
+        capabilities = dict(
+            (member, self.coordinator.get_member_capabilities(group_id,
+                                                              member))
+            for member in members)
+        return dict((member, capability.get())
+                    for member, capability in capabilities.items())
+
+
+class ConsistentHashRing(object):
+    """Consistent hash ring over the live members of a coordination group.
+
+    Members join the group with their host as capabilities. Keys are mapped
+    to hosts on a hash ring built from the current members, so when a
+    member joins or leaves only the keys owned by it move to another host.
+    Members are reloaded at most every
+    CONF.coordination.membership_refresh_interval seconds.
+
+    :param str group_id: The group name.
+    :param coordinator: Coordinator object to use to get group members.
+        Defaults to the global coordinator.
+    """
+
+    def __init__(self, group_id, coordinator=None):
+        self.group_id = group_id
+        self.coordinator = coordinator or LOCK_COORDINATOR
+        self.hosts = set()
+        self.ring = None
+        self.refreshed_at = None
+
+    def _refresh(self):
+        now = time.time()
+        if self.refreshed_at is not None and now - self.refreshed_at < \
+                CONF.coordination.membership_refresh_interval:
+            return
+        try:
+            members = self.coordinator.get_members(self.group_id)
+        except Exception as e:
+            LOG.warning('Failed to get members of group %s: %s',
+                        self.group_id, six.text_type(e))
+            return
+        hosts = set(six.ensure_text(host) for host in members.values())
+        if hosts != self.hosts:
+            LOG.info('Members of group %s changed to %s',
+                     self.group_id, sorted(hosts))
+            self.hosts = hosts
+            self.ring = hashring.HashRing(hosts) if hosts else None
+        self.refreshed_at = now
+
+    def get_host(self, key):
+        """Return the host owning the key, None if there is no member."""
+        if not self.coordinator.started:
+            return None
+        self._refresh()
+        if self.ring is None:
+            return None
+        return self.ring.get_nodes(six.text_type(key).encode('utf-8')).pop()
+
 
 LOCK_COORDINATOR = Coordinator(prefix='delfin-')
 
@@ -48,6 +48,16 @@ db_opts = [
     cfg.StrOpt('db_backend',
                default='sqlalchemy',
                help='The backend to use for database.'),
+    cfg.IntOpt('bulk_chunk_size',
+               default=1000,
+               min=1,
+               help='Maximum number of rows handled by one statement when '
+                    'creating, updating or deleting resources in bulk.'),
+    cfg.IntOpt('stream_chunk_size',
+               default=1000,
+               min=1,
+               help='Number of rows fetched at a time from a server-side '
+                    'cursor when streaming query results.'),
 ]
 
 CONF = cfg.CONF
@@ -163,9 +173,61 @@ def volume_get_all(context, marker=None, limit=None, sort_keys=None,
                                sort_dirs, filters, offset)
 
 
-def volume_delete_by_storage(context, storage_id):
-    """Delete all the volumes of a device."""
-    return IMPL.volume_delete_by_storage(context, storage_id)
+def volume_get_all_iter(context, sort_keys=None, sort_dirs=None,
+                        filters=None):
+    """Iterate over all the volumes from a server-side cursor.
+
+    Volumes are fetched database.stream_chunk_size at a time while
+    iterating, so that they are never all loaded in memory.
+
+    :param context: context of this request, it's helpful to trace the request
+    :param sort_keys: list of attributes by which results should be sorted,
+                      paired with corresponding item in sort_dirs
+    :param sort_dirs: list of directions in which results should be sorted,
+                      paired with corresponding item in sort_keys
+    :param filters: dictionary of filters
+    :returns: iterator of volumes
+    """
+    return IMPL.volume_get_all_iter(context, sort_keys, sort_dirs, filters)
+
+
+def volume_get_page(context, cursor=None, limit=None, sort_keys=None,
+                    sort_dirs=None, filters=None):
+    """Retrieves a page of volumes by keyset pagination.
+
+    The page is selected by the sort key values of the last volume of the
+    previous page encoded in cursor, rather than by a marker volume or an
+    offset, so fetching any page costs about the same.
+
+    :param context: context of this request, it's helpful to trace the request
+    :param cursor: cursor returned with the previous page, None for the
+                   first page
+    :param limit: maximum number of items to return
+    :param sort_keys: list of attributes by which results should be sorted,
+                      paired with corresponding item in sort_dirs
+    :param sort_dirs: list of directions in which results should be sorted,
+                      paired with corresponding item in sort_keys
+    :param filters: dictionary of filters
+    :returns: tuple of list of volumes and cursor of the next page, which is
+              None on the last page
+    """
+    return IMPL.volume_get_page(context, cursor, limit, sort_keys,
+                                sort_dirs, filters)
+
+
+def volume_delete_by_storage(context, storage_id, limit=None):
+    """Delete all the volumes of a device, or at most limit of them.
+
+    :return: the number of volumes deleted
+    """
+    return IMPL.volume_delete_by_storage(context, storage_id, limit)
+
+
+def volume_get_all_hashes(context, storage_id):
+    """Get id, native_volume_id and resource_hash of all the volumes of a
+    device as dicts.
+    """
+    return IMPL.volume_get_all_hashes(context, storage_id)
 
 
 def storage_pool_create(context, storage_pool):
@@ -223,9 +285,125 @@ def storage_pool_get_all(context, marker=None, limit=None, sort_keys=None,
                                      sort_keys, sort_dirs, filters, offset)
 
 
-def storage_pool_delete_by_storage(context, storage_id):
-    """Delete all the storage_pool of a device."""
-    return IMPL.storage_pool_delete_by_storage(context, storage_id)
+def storage_pool_get_all_iter(context, sort_keys=None, sort_dirs=None,
+                              filters=None):
+    """Iterate over all the storage_pools from a server-side cursor.
+
+    See volume_get_all_iter for the parameters.
+
+    :returns: iterator of storage_pools
+    """
+    return IMPL.storage_pool_get_all_iter(context, sort_keys, sort_dirs,
+                                          filters)
+
+
+def storage_pool_get_page(context, cursor=None, limit=None, sort_keys=None,
+                          sort_dirs=None, filters=None):
+    """Retrieves a page of storage_pools by keyset pagination.
+
+    See volume_get_page for the parameters.
+
+    :returns: tuple of list of storage_pools and cursor of the next page,
+              which is None on the last page
+    """
+    return IMPL.storage_pool_get_page(context, cursor, limit, sort_keys,
+                                      sort_dirs, filters)
+
+
+def storage_pool_delete_by_storage(context, storage_id, limit=None):
+    """Delete all the storage_pool of a device, or at most limit of them.
+
+    :return: the number of storage_pools deleted
+    """
+    return IMPL.storage_pool_delete_by_storage(context, storage_id, limit)
+
+
+def storage_pool_get_all_hashes(context, storage_id):
+    """Get id, native_storage_pool_id and resource_hash of all the
+    storage_pools of a device as dicts.
+    """
+    return IMPL.storage_pool_get_all_hashes(context, storage_id)
+
+
+def storage_resource_hash_get(context, storage_id, resource_type):
+    """Get the digest of one type of resources of a device, None if it is
+    not saved.
+    """
+    return IMPL.storage_resource_hash_get(context, storage_id, resource_type)
+
+
+def storage_resource_hash_update(context, storage_id, resource_type,
+                                 resource_hash):
+    """Save the digest of one type of resources of a device."""
+    return IMPL.storage_resource_hash_update(context, storage_id,
+                                             resource_type, resource_hash)
+
+
+def sync_run_start(context, storage_id, resource_type, expiration):
+    """Atomically start a sync run of one type of resources of a storage.
+
+    :param expiration: seconds after which a running sync run is considered
+                       lost and a new one can start
+    :returns: True if started, False if another run is still running
+    """
+    return IMPL.sync_run_start(context, storage_id, resource_type,
+                               expiration)
+
+
+def sync_run_end(context, storage_id, resource_type, status, duration):
+    """End the sync run of one type of resources of a storage.
+
+    :param status: the result of the sync run
+    :param duration: seconds the sync run took
+    """
+    return IMPL.sync_run_end(context, storage_id, resource_type, status,
+                             duration)
+
+
+def sync_run_get_all(context, storage_id=None, storage_ids=None,
+                     expiration=None):
+    """Get the sync runs of a storage, of some storages or of all the
+    storages.
+
+    :param storage_ids: list of the storage ids to get the sync runs of
+    :param expiration: if given, only get the sync runs running and started
+                       within expiration seconds
+    """
+    return IMPL.sync_run_get_all(context, storage_id, storage_ids,
+                                 expiration)
+
+
+def sync_run_delete_by_storage(context, storage_id):
+    """Delete the sync runs of a storage."""
+    return IMPL.sync_run_delete_by_storage(context, storage_id)
+
+
+def storage_remove(context, storage_id):
+    """Delete a storage device with its access info, alert source, sync runs,
+    resource digests and removal progress in one transaction.
+    """
+    return IMPL.storage_remove(context, storage_id)
+
+
+def storage_removal_start(context, storage_id):
+    """Delete a storage device and start the removal of its resources."""
+    return IMPL.storage_removal_start(context, storage_id)
+
+
+def storage_removal_update(context, storage_id, values):
+    """Update the removal progress of a storage device."""
+    return IMPL.storage_removal_update(context, storage_id, values)
+
+
+def storage_removal_get_all(context, status=None):
+    """Get the removals of storage devices, optionally by status."""
+    return IMPL.storage_removal_get_all(context, status)
+
+
+def storage_resource_hash_delete(context, storage_id, resource_type):
+    """Delete the digest of one type of resources of a device."""
+    return IMPL.storage_resource_hash_delete(context, storage_id,
+                                             resource_type)
 
 
 def disk_create(context, values):
@@ -0,0 +1,32 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from alembic import context
+
+from delfin.db.sqlalchemy import models
+
+config = context.config
+target_metadata = models.BASE.metadata
+
+
+def run_migrations_online():
+    """Run migrations on the connection given by migration.db_sync."""
+    connection = config.attributes['connection']
+    context.configure(connection=connection,
+                      target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+run_migrations_online()
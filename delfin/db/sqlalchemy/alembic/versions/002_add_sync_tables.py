@@ -0,0 +1,60 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Add resource hashes, sync runs and storage removals
+
+Revision ID: 002
+Revises: 001
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '002'
+down_revision = '001'
+
+
+def _timestamps():
+    return [sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime)]
+
+
+def upgrade():
+    op.add_column('volumes', sa.Column('resource_hash', sa.String(40)))
+    op.add_column('storage_pools', sa.Column('resource_hash', sa.String(40)))
+    op.create_table(
+        'storage_resource_hashes',
+        sa.Column('storage_id', sa.String(36), primary_key=True),
+        sa.Column('resource_type', sa.String(255), primary_key=True),
+        sa.Column('resource_hash', sa.String(40)),
+        *_timestamps(),
+        mysql_engine='InnoDB')
+    op.create_table(
+        'sync_runs',
+        sa.Column('storage_id', sa.String(36), primary_key=True),
+        sa.Column('resource_type', sa.String(255), primary_key=True),
+        sa.Column('status', sa.String(255)),
+        sa.Column('started_at', sa.DateTime),
+        sa.Column('ended_at', sa.DateTime),
+        sa.Column('duration', sa.Float),
+        *_timestamps(),
+        mysql_engine='InnoDB')
+    op.create_table(
+        'storage_removals',
+        sa.Column('storage_id', sa.String(36), primary_key=True),
+        sa.Column('status', sa.String(255)),
+        sa.Column('resource_type', sa.String(255)),
+        sa.Column('removed_count', sa.Integer),
+        *_timestamps(),
+        mysql_engine='InnoDB')
@@ -0,0 +1,60 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Add indexes on the columns resources are looked up by
+
+Revision ID: 003
+Revises: 002
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+
+
+def _delete_duplicates(table, native_id):
+    """Keep one row per native id of a storage.
+
+    The removed rows would be merged by the next sync anyway. The saved
+    hashes of the resources are dropped too, so that the next sync diffs
+    the kept rows against the backend instead of skipping the database.
+    """
+    # The kept ids are selected from a derived table, as MySQL does not
+    # allow selecting from the table rows are deleted from
+    result = op.get_bind().execute(sa.text(
+        "DELETE FROM {table} WHERE {native_id} IS NOT NULL AND id NOT IN "
+        "(SELECT id FROM (SELECT MIN(id) AS id FROM {table} "
+        "WHERE {native_id} IS NOT NULL "
+        "GROUP BY storage_id, {native_id}) kept_ids)".format(
+            table=table, native_id=native_id)))
+    if result.rowcount:
+        op.get_bind().execute(sa.text(
+            "DELETE FROM storage_resource_hashes "
+            "WHERE resource_type = :resource_type"),
+            resource_type=table)
+
+
+def upgrade():
+    _delete_duplicates('volumes', 'native_volume_id')
+    _delete_duplicates('storage_pools', 'native_storage_pool_id')
+    op.create_index('volumes_storage_id_native_volume_id_idx', 'volumes',
+                    ['storage_id', 'native_volume_id'], unique=True)
+    op.create_index('storage_pools_storage_id_native_storage_pool_id_idx',
+                    'storage_pools', ['storage_id', 'native_storage_pool_id'],
+                    unique=True)
+    op.create_index('alert_source_host_idx', 'alert_source', ['host'])
+    op.create_index('storages_serial_number_idx', 'storages',
+                    ['serial_number'])
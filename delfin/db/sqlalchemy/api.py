@@ -19,11 +19,13 @@
 
 """Implementation of SQLAlchemy backend."""
 
+import datetime
 import sys
 
 import six
 import sqlalchemy
 from oslo_config import cfg
+from oslo_db import exception as db_exc
 from oslo_db import options as db_options
 from oslo_db.sqlalchemy import session
 from oslo_db.sqlalchemy import utils as db_utils
@@ -32,9 +34,10 @@ from oslo_utils import uuidutils, timeutils
 from sqlalchemy import create_engine
 
 from delfin import exception
+from delfin.common import constants
 from delfin.common import sqlalchemyutils
+from delfin.db.sqlalchemy import migration
 from delfin.db.sqlalchemy import models
-from delfin.db.sqlalchemy.models import Storage, AccessInfo
 from delfin.i18n import _
 
 CONF = cfg.CONF
@@ -81,13 +84,17 @@ def get_backend():
 
 
 def register_db():
-    """Create database and tables."""
-    models = (Storage,
-              AccessInfo
-              )
+    """Create database and tables, or upgrade them to the latest schema."""
     engine = create_engine(CONF.database.connection, echo=False)
-    for model in models:
-        model.metadata.create_all(engine)
+    migration.db_sync(engine)
+
+
+def _chunks(items, chunk_size=None):
+    """Split items into lists of at most chunk_size elements."""
+    chunk_size = chunk_size or CONF.database.bulk_chunk_size
+    items = list(items)
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
 
 
 def _process_model_like_filter(model, query, filters):
@@ -351,35 +358,32 @@ def volume_create(context, values):
 def volumes_create(context, volumes):
     """Create multiple volumes."""
     session = get_session()
-    vol_refs = []
     with session.begin():
-
         for vol in volumes:
             LOG.debug('adding new volume for native_volume_id {0}:'
                       .format(vol.get('native_volume_id')))
             if not vol.get('id'):
                 vol['id'] = uuidutils.generate_uuid()
 
-            vol_ref = models.Volume()
-            vol_ref.update(vol)
-            vol_refs.append(vol_ref)
+        for chunk in _chunks(volumes):
+            session.bulk_insert_mappings(models.Volume, chunk)
 
-        session.add_all(vol_refs)
-
-    return vol_refs
+    return volumes
 
 
 def volumes_delete(context, volumes_id_list):
     """Delete multiple volumes."""
     session = get_session()
     with session.begin():
-        for vol_id in volumes_id_list:
-            LOG.debug('deleting volume {0}:'.format(vol_id))
+        for chunk in _chunks(volumes_id_list):
+            LOG.debug('deleting volumes {0}:'.format(chunk))
             query = _volume_get_query(context, session)
-            result = query.filter_by(id=vol_id).delete()
+            result = query.filter(models.Volume.id.in_(chunk)).delete(
+                synchronize_session=False)
 
-            if not result:
-                LOG.error(exception.VolumeNotFound(vol_id))
+            if result != len(chunk):
+                LOG.error('Deleted {0} of {1} volumes, the others were not '
+                          'found'.format(result, len(chunk)))
     return
 
 
@@ -395,14 +399,10 @@ def volumes_update(context, volumes):
     """Update multiple volumes."""
     session = get_session()
     with session.begin():
-        for vol in volumes:
-            LOG.debug('updating volume {0}:'.format(vol.get('id')))
-            query = _volume_get_query(context, session)
-            result = query.filter_by(id=vol.get('id')
-                                     ).update(vol)
-
-            if not result:
-                LOG.error(exception.VolumeNotFound(vol.get('id')))
+        for chunk in _chunks(volumes):
+            LOG.debug('updating volumes {0}:'.format(
+                [vol.get('id') for vol in chunk]))
+            session.bulk_update_mappings(models.Volume, chunk)
 
 
 def volume_get(context, volume_id):
@@ -425,6 +425,20 @@ def volume_get_all(context, marker=None, limit=None, sort_keys=None,
         return query.all()
 
 
+def volume_get_all_iter(context, sort_keys=None, sort_dirs=None,
+                        filters=None):
+    """Iterate over all the volumes from a server-side cursor."""
+    return _get_all_iter(context, models.Volume, sort_keys, sort_dirs,
+                         filters)
+
+
+def volume_get_page(context, cursor=None, limit=None, sort_keys=None,
+                    sort_dirs=None, filters=None):
+    """Retrieves a page of volumes by keyset pagination."""
+    return _get_page(context, models.Volume, cursor, limit, sort_keys,
+                     sort_dirs, filters)
+
+
 @apply_like_filters(model=models.Volume)
 def _process_volume_info_filters(query, filters):
     """Common filter processing for volumes queries."""
@@ -436,9 +450,42 @@ def _process_volume_info_filters(query, filters):
     return query
 
 
-def volume_delete_by_storage(context, storage_id):
-    """Delete all the volumes of a device"""
-    _volume_get_query(context).filter_by(storage_id=storage_id).delete()
+def volume_delete_by_storage(context, storage_id, limit=None):
+    """Delete all the volumes of a device, or at most limit of them."""
+    return _delete_by_storage(context, models.Volume, storage_id, limit)
+
+
+def _delete_by_storage(context, model, storage_id, limit):
+    session = get_session()
+    with session.begin():
+        query = model_query(context, model, session=session).filter_by(
+            storage_id=storage_id)
+        if limit is None:
+            return query.delete()
+        # Delete by primary keys, as DELETE ... LIMIT is not portable
+        ids = [row[0] for row in
+               query.with_entities(model.id).limit(limit).all()]
+        if not ids:
+            return 0
+        return query.filter(model.id.in_(ids)).delete(
+            synchronize_session=False)
+
+
+def volume_get_all_hashes(context, storage_id):
+    """Get id, native id and hash of all the volumes of a device."""
+    return _resource_hashes_get(context, models.Volume, 'native_volume_id',
+                                storage_id)
+
+
+def _resource_hashes_get(context, model, key, storage_id):
+    session = get_session()
+    with session.begin():
+        query = model_query(context, model, model.id,
+                            getattr(model, key), model.resource_hash,
+                            session=session)
+        rows = query.filter(model.storage_id == storage_id).all()
+    return [{'id': row[0], key: row[1], 'resource_hash': row[2]}
+            for row in rows]
 
 
 def _storage_pool_get_query(context, session=None):
@@ -476,35 +523,32 @@ def storage_pool_create(context, values):
 def storage_pools_create(context, storage_pools):
     """Create a storage_pool from the values dictionary."""
     session = get_session()
-    storage_pool_refs = []
     with session.begin():
-
         for storage_pool in storage_pools:
             LOG.debug('adding new storage_pool for native_storage_pool_id {0}:'
                       .format(storage_pool.get('native_storage_pool_id')))
             if not storage_pool.get('id'):
                 storage_pool['id'] = uuidutils.generate_uuid()
 
-            storage_pool_ref = models.StoragePool()
-            storage_pool_ref.update(storage_pool)
-            storage_pool_refs.append(storage_pool_ref)
-
-        session.add_all(storage_pool_refs)
+        for chunk in _chunks(storage_pools):
+            session.bulk_insert_mappings(models.StoragePool, chunk)
 
-    return storage_pool_refs
+    return storage_pools
 
 
 def storage_pools_delete(context, storage_pools_id_list):
     """Delete multiple storage_pools with the storage_pools dictionary."""
     session = get_session()
     with session.begin():
-        for storage_pool_id in storage_pools_id_list:
-            LOG.debug('deleting storage_pool {0}:'.format(storage_pool_id))
+        for chunk in _chunks(storage_pools_id_list):
+            LOG.debug('deleting storage_pools {0}:'.format(chunk))
             query = _storage_pool_get_query(context, session)
-            result = query.filter_by(id=storage_pool_id).delete()
+            result = query.filter(models.StoragePool.id.in_(chunk)).delete(
+                synchronize_session=False)
 
-            if not result:
-                LOG.error(exception.StoragePoolNotFound(storage_pool_id))
+            if result != len(chunk):
+                LOG.error('Deleted {0} of {1} storage_pools, the others were '
+                          'not found'.format(result, len(chunk)))
 
     return
 
@@ -528,22 +572,12 @@ def storage_pools_update(context, storage_pools):
     session = get_session()
 
     with session.begin():
-        storage_pool_refs = []
+        for chunk in _chunks(storage_pools):
+            LOG.debug('updating storage_pools {0}:'.format(
+                [storage_pool.get('id') for storage_pool in chunk]))
+            session.bulk_update_mappings(models.StoragePool, chunk)
 
-        for storage_pool in storage_pools:
-            LOG.debug('updating storage_pool {0}:'.format(
-                storage_pool.get('id')))
-            query = _storage_pool_get_query(context, session)
-            result = query.filter_by(id=storage_pool.get('id')
-                                     ).update(storage_pool)
-
-            if not result:
-                LOG.error(exception.StoragePoolNotFound(storage_pool.get(
-                    'id')))
-            else:
-                storage_pool_refs.append(result)
-
-    return storage_pool_refs
+    return storage_pools
 
 
 def storage_pool_get(context, storage_pool_id):
@@ -567,9 +601,179 @@ def storage_pool_get_all(context, marker=None, limit=None, sort_keys=None,
         return query.all()
 
 
-def storage_pool_delete_by_storage(context, storage_id):
-    """Delete all the storage_pools of a storage device"""
-    _storage_pool_get_query(context).filter_by(storage_id=storage_id).delete()
+def storage_pool_delete_by_storage(context, storage_id, limit=None):
+    """Delete all the storage_pools of a device, or at most limit of them."""
+    return _delete_by_storage(context, models.StoragePool, storage_id, limit)
+
+
+def storage_pool_get_all_hashes(context, storage_id):
+    """Get id, native id and hash of all the storage_pools of a device."""
+    return _resource_hashes_get(context, models.StoragePool,
+                                'native_storage_pool_id', storage_id)
+
+
+def _storage_resource_hash_get_query(context, session=None):
+    return model_query(context, models.StorageResourceHash, session=session)
+
+
+def storage_resource_hash_get(context, storage_id, resource_type):
+    """Get the digest of one type of resources of a device."""
+    result = (_storage_resource_hash_get_query(context)
+              .filter_by(storage_id=storage_id, resource_type=resource_type)
+              .first())
+    return result['resource_hash'] if result else None
+
+
+def storage_resource_hash_update(context, storage_id, resource_type,
+                                 resource_hash):
+    """Save the digest of one type of resources of a device."""
+    session = get_session()
+    with session.begin():
+        session.merge(models.StorageResourceHash(
+            storage_id=storage_id, resource_type=resource_type,
+            resource_hash=resource_hash))
+
+
+def _sync_run_get_query(context, session=None):
+    return model_query(context, models.SyncRun, session=session)
+
+
+def sync_run_start(context, storage_id, resource_type, expiration):
+    """Start a sync run unless one started within expiration is running."""
+    now = timeutils.utcnow()
+    values = {'status': constants.SyncRunStatus.SYNCING,
+              'started_at': now,
+              'ended_at': None,
+              'duration': None}
+    session = get_session()
+    with session.begin():
+        query = _sync_run_get_query(context, session)
+        result = query.filter_by(
+            storage_id=storage_id, resource_type=resource_type).filter(
+            sqlalchemy.or_(
+                models.SyncRun.status != constants.SyncRunStatus.SYNCING,
+                models.SyncRun.started_at <
+                now - datetime.timedelta(seconds=expiration))).update(
+            values, synchronize_session=False)
+    if result:
+        return True
+
+    # No run of this type of resources yet, or one is running
+    sync_run = models.SyncRun(storage_id=storage_id,
+                              resource_type=resource_type)
+    sync_run.update(values)
+    try:
+        with session.begin():
+            session.add(sync_run)
+    except db_exc.DBDuplicateEntry:
+        return False
+    return True
+
+
+def sync_run_end(context, storage_id, resource_type, status, duration):
+    """End the sync run of one type of resources of a storage."""
+    session = get_session()
+    with session.begin():
+        query = _sync_run_get_query(context, session)
+        query.filter_by(storage_id=storage_id,
+                        resource_type=resource_type).update(
+            {'status': status,
+             'ended_at': timeutils.utcnow(),
+             'duration': duration}, synchronize_session=False)
+
+
+def sync_run_get_all(context, storage_id=None, storage_ids=None,
+                     expiration=None):
+    """Get the sync runs of a storage, of some storages or of all the
+    storages, optionally only the running ones.
+    """
+    if storage_ids is not None and not storage_ids:
+        return []
+    query = _sync_run_get_query(context)
+    if storage_id:
+        query = query.filter_by(storage_id=storage_id)
+    if storage_ids is not None:
+        query = query.filter(models.SyncRun.storage_id.in_(storage_ids))
+    if expiration is not None:
+        query = query.filter(
+            models.SyncRun.status == constants.SyncRunStatus.SYNCING,
+            models.SyncRun.started_at >
+            timeutils.utcnow() - datetime.timedelta(seconds=expiration))
+    return query.all()
+
+
+def sync_run_delete_by_storage(context, storage_id):
+    """Delete the sync runs of a storage."""
+    _sync_run_get_query(context).filter_by(storage_id=storage_id).delete()
+
+
+def storage_remove(context, storage_id):
+    """Delete a storage device with its access info, alert source, sync runs,
+    resource digests and removal progress in one transaction.
+    """
+    session = get_session()
+    with session.begin():
+        _storage_get_query(context, session).filter_by(id=storage_id).update(
+            {'deleted': True, 'deleted_at': timeutils.utcnow()})
+        for model in (models.AccessInfo, models.AlertSource,
+                      models.SyncRun, models.StorageResourceHash,
+                      models.StorageRemoval):
+            model_query(context, model, session=session).filter_by(
+                storage_id=storage_id).delete()
+
+
+def _storage_removal_get_query(context, session=None):
+    return model_query(context, models.StorageRemoval, session=session)
+
+
+def storage_removal_start(context, storage_id):
+    """Delete a storage device and start the removal of its resources."""
+    session = get_session()
+    with session.begin():
+        _storage_get_query(context, session).filter_by(id=storage_id).update(
+            {'deleted': True, 'deleted_at': timeutils.utcnow()})
+        session.merge(models.StorageRemoval(
+            storage_id=storage_id,
+            status=constants.StorageRemovalStatus.REMOVING,
+            resource_type=None,
+            removed_count=0))
+
+
+def storage_removal_update(context, storage_id, values):
+    """Update the removal progress of a storage device."""
+    session = get_session()
+    with session.begin():
+        _storage_removal_get_query(context, session).filter_by(
+            storage_id=storage_id).update(values)
+
+
+def storage_removal_get_all(context, status=None):
+    """Get the removals of storage devices, optionally by status."""
+    query = _storage_removal_get_query(context)
+    if status:
+        query = query.filter_by(status=status)
+    return query.all()
+
+
+def storage_resource_hash_delete(context, storage_id, resource_type):
+    """Delete the digest of one type of resources of a device."""
+    (_storage_resource_hash_get_query(context)
+     .filter_by(storage_id=storage_id, resource_type=resource_type)
+     .delete())
+
+
+def storage_pool_get_all_iter(context, sort_keys=None, sort_dirs=None,
+                              filters=None):
+    """Iterate over all the storage_pools from a server-side cursor."""
+    return _get_all_iter(context, models.StoragePool, sort_keys, sort_dirs,
+                         filters)
+
+
+def storage_pool_get_page(context, cursor=None, limit=None, sort_keys=None,
+                          sort_dirs=None, filters=None):
+    """Retrieves a page of storage_pools by keyset pagination."""
+    return _get_page(context, models.StoragePool, cursor, limit, sort_keys,
+                     sort_dirs, filters)
 
 
 @apply_like_filters(model=models.StoragePool)
@@ -835,3 +1039,51 @@ def _generate_paginate_query(context, session, paginate_type, marker,
                                           marker=marker_object,
                                           sort_dirs=sort_dirs,
                                           offset=offset)
+
+
+def _get_page(context, model, cursor, limit, sort_keys, sort_dirs, filters):
+    """Get the page of model objects following cursor.
+
+    :returns: tuple of the objects and the cursor of the next page, which is
+              None on the last page
+    """
+    # The unique id makes the last sort key unique, as keyset pagination
+    # requires
+    sort_keys, sort_dirs = process_sort_params(sort_keys, sort_dirs,
+                                               default_keys=['created_at',
+                                                             'id'],
+                                               default_dir='desc')
+    cursor_values = None
+    if cursor:
+        cursor_values = sqlalchemyutils.decode_cursor(cursor, sort_keys)
+
+    session = get_session()
+    with session.begin():
+        get_query, process_filters, __ = PAGINATION_HELPERS[model]
+        query = get_query(context, session=session)
+        if filters:
+            query = process_filters(query, filters)
+            if query is None:
+                return [], None
+        query = sqlalchemyutils.keyset_paginate_query(
+            query, model, limit, sort_keys, sort_dirs,
+            cursor_values=cursor_values)
+        result = query.all()
+
+    next_cursor = None
+    if result and limit and len(result) == limit:
+        next_cursor = sqlalchemyutils.encode_cursor(
+            sort_keys, [result[-1][key] for key in sort_keys])
+    return result, next_cursor
+
+
+def _get_all_iter(context, model, sort_keys, sort_dirs, filters):
+    # The session is held, and rows are fetched, only while iterating
+    session = get_session()
+    with session.begin():
+        query = _generate_paginate_query(context, session, model, None,
+                                         None, sort_keys, sort_dirs, filters)
+        if query is None:
+            return
+        for row in query.yield_per(CONF.database.stream_chunk_size):
+            yield row
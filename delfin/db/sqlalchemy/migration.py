@@ -0,0 +1,63 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Database schema migration with alembic."""
+
+import sqlalchemy
+from alembic import command
+from alembic import config as alembic_config
+from alembic import migration
+from oslo_log import log
+
+from delfin.db.sqlalchemy import models
+
+LOG = log.getLogger(__name__)
+
+# Revision of the schema created before migrations were introduced
+BASELINE_REVISION = '001'
+
+
+def _get_alembic_config(connection):
+    config = alembic_config.Config()
+    config.set_main_option('script_location',
+                           'delfin.db.sqlalchemy:alembic')
+    config.attributes['connection'] = connection
+    return config
+
+
+def db_version(engine):
+    """Return the current schema revision of the database."""
+    with engine.connect() as connection:
+        context = migration.MigrationContext.configure(connection)
+        return context.get_current_revision()
+
+
+def db_sync(engine, version=None):
+    """Upgrade the database schema to version, the latest one by default.
+
+    An empty database is created from the models directly. A database
+    created before migrations were introduced is upgraded from the
+    baseline revision.
+    """
+    with engine.begin() as connection:
+        config = _get_alembic_config(connection)
+        tables = sqlalchemy.inspect(connection).get_table_names()
+        if 'alembic_version' not in tables:
+            if models.Storage.__tablename__ not in tables:
+                LOG.info('Creating database schema')
+                models.BASE.metadata.create_all(connection)
+                command.stamp(config, 'head')
+                return
+            command.stamp(config, BASELINE_REVISION)
+        LOG.info('Upgrading database schema to %s', version or 'head')
+        command.upgrade(config, version or 'head')
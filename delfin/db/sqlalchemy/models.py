@@ -24,6 +24,7 @@ from oslo_config import cfg
 from oslo_db.sqlalchemy import models
 from oslo_db.sqlalchemy.types import JsonEncodedDict
 from sqlalchemy import Column, Integer, String, Boolean, BigInteger, DateTime
+from sqlalchemy import Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 from delfin.common import constants
@@ -61,6 +62,10 @@ class Storage(BASE, DelfinBase):
     """Represents a storage object."""
 
     __tablename__ = 'storages'
+    __table_args__ = (
+        Index('storages_serial_number_idx', 'serial_number'),
+        DelfinBase.__table_args__,
+    )
     id = Column(String(36), primary_key=True)
     name = Column(String(255))
     vendor = Column(String(255))
@@ -83,6 +88,11 @@ class Storage(BASE, DelfinBase):
 class Volume(BASE, DelfinBase):
     """Represents a volume object."""
     __tablename__ = 'volumes'
+    __table_args__ = (
+        Index('volumes_storage_id_native_volume_id_idx',
+              'storage_id', 'native_volume_id', unique=True),
+        DelfinBase.__table_args__,
+    )
     id = Column(String(36), primary_key=True)
     name = Column(String(255))
     storage_id = Column(String(36))
@@ -97,11 +107,17 @@ class Volume(BASE, DelfinBase):
     free_capacity = Column(BigInteger)
     compressed = Column(Boolean)
     deduplicated = Column(Boolean)
+    resource_hash = Column(String(40))
 
 
 class StoragePool(BASE, DelfinBase):
     """Represents a storage_pool object."""
     __tablename__ = 'storage_pools'
+    __table_args__ = (
+        Index('storage_pools_storage_id_native_storage_pool_id_idx',
+              'storage_id', 'native_storage_pool_id', unique=True),
+        DelfinBase.__table_args__,
+    )
     id = Column(String(36), primary_key=True)
     name = Column(String(255))
     storage_id = Column(String(36))
@@ -113,6 +129,35 @@ class StoragePool(BASE, DelfinBase):
     used_capacity = Column(BigInteger)
     free_capacity = Column(BigInteger)
     subscribed_capacity = Column(BigInteger)
+    resource_hash = Column(String(40))
+
+
+class StorageResourceHash(BASE, DelfinBase):
+    """Represents the digest of one type of resources of a storage."""
+    __tablename__ = 'storage_resource_hashes'
+    storage_id = Column(String(36), primary_key=True)
+    resource_type = Column(String(255), primary_key=True)
+    resource_hash = Column(String(40))
+
+
+class SyncRun(BASE, DelfinBase):
+    """Represents the last sync run of one type of resources of a storage."""
+    __tablename__ = 'sync_runs'
+    storage_id = Column(String(36), primary_key=True)
+    resource_type = Column(String(255), primary_key=True)
+    status = Column(String(255))
+    started_at = Column(DateTime)
+    ended_at = Column(DateTime)
+    duration = Column(Float)
+
+
+class StorageRemoval(BASE, DelfinBase):
+    """Represents the progress of removing a deleted storage."""
+    __tablename__ = 'storage_removals'
+    storage_id = Column(String(36), primary_key=True)
+    status = Column(String(255))
+    resource_type = Column(String(255))
+    removed_count = Column(Integer, default=0)
 
 
 class Disk(BASE, DelfinBase):
@@ -132,6 +177,10 @@ class Disk(BASE, DelfinBase):
 class AlertSource(BASE, DelfinBase):
     """Represents an alert source configuration."""
     __tablename__ = 'alert_source'
+    __table_args__ = (
+        Index('alert_source_host_idx', 'host'),
+        DelfinBase.__table_args__,
+    )
     storage_id = Column(String(36), primary_key=True)
     host = Column(String(255))
     version = Column(String(255))
@@ -85,6 +85,37 @@ class API(object):
         driver = self.driver_manager.get_driver(context, storage_id=storage_id)
         return driver.list_volumes(context)
 
+    def list_volumes_with_pools(self, context, storage_id, storage_pools):
+        """List all storage volumes, given the storage pools already listed
+        from storage system.
+        """
+        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
+        return driver.list_volumes_with_pools(context, storage_pools)
+
+    def uses_storage_pools(self, context, storage_id, by_page=False):
+        """Whether the driver builds volumes with the storage pools listed
+        in the same sync.
+        """
+        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
+        return driver.uses_storage_pools(by_page)
+
+    def iter_storage_pools(self, context, storage_id):
+        """Iterate storage pools from storage system page by page."""
+        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
+        return driver.iter_storage_pools(context)
+
+    def iter_volumes(self, context, storage_id):
+        """Iterate storage volumes from storage system page by page."""
+        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
+        return driver.iter_volumes(context)
+
+    def iter_volumes_with_pools(self, context, storage_id, storage_pools):
+        """Iterate storage volumes page by page, given the storage pools
+        already listed from storage system.
+        """
+        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
+        return driver.iter_volumes_with_pools(context, storage_pools)
+
     def add_trap_config(self, context, storage_id, trap_config):
         """Config the trap receiver in storage system."""
         pass
@@ -93,12 +124,16 @@ class API(object):
         """Remove trap receiver configuration from storage system."""
         pass
 
+    def get_driver_class(self, context, storage_id):
+        """Get the driver class of a storage system."""
+        access_info = db.access_info_get(context, storage_id)
+        return self.driver_manager.get_driver(context,
+                                              invoke_on_load=False,
+                                              **access_info)
+
     def parse_alert(self, context, storage_id, alert):
         """Parse alert data got from snmp trap server."""
-        access_info = db.access_info_get(context, storage_id)
-        driver = self.driver_manager.get_driver(context,
-                                                invoke_on_load=False,
-                                                **access_info)
+        driver = self.get_driver_class(context, storage_id)
         return driver.parse_alert(context, alert)
 
     def clear_alert(self, context, storage_id, sequence_number):
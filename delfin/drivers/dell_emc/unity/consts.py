@@ -16,3 +16,7 @@ SOCKET_TIMEOUT = 10
 ERROR_SESSION_INVALID_CODE = 403
 ERROR_SESSION_IS_BEING_USED_CODE = 409
 HEALTH_OK = (5, 7)
+# Number of instances got in one page of a collection query
+PAGE_SIZE = 1000
+# Max number of collection pages got concurrently
+MAX_CONCURRENT_PAGES = 4
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 import requests
 import six
 from oslo_log import log as logging
@@ -41,9 +43,12 @@ class RestHandler(RestClient):
 
     def __init__(self, **kwargs):
         super(RestHandler, self).__init__(**kwargs)
+        # Serializes relogin of concurrent page requests
+        self.login_lock = threading.Lock()
 
     def call(self, url, data=None, method=None):
         try:
+            old_session = self.session
             res = self.do_call(url, data, method,
                                calltimeout=consts.SOCKET_TIMEOUT)
             if (res.status_code == consts.ERROR_SESSION_INVALID_CODE
@@ -54,8 +59,13 @@ class RestHandler(RestClient):
                         res.status_code, res.text))
                 if RestHandler.REST_LOGOUT_URL in url:
                     return res
-                self.rest_auth_token = None
-                access_session = self.login()
+                with self.login_lock:
+                    if self.session is old_session:
+                        self.rest_auth_token = None
+                        access_session = self.login()
+                    else:
+                        # Another request has already logged in again
+                        access_session = self.rest_auth_token
                 # if get token，Revisit url
                 if access_session is not None:
                     res = self. \
@@ -79,24 +89,25 @@ class RestHandler(RestClient):
         return result_json
 
     def init_rest_client(self):
-        if self.session:
-            self.session.close()
-        self.session = requests.Session()
-        self.session.headers.update({
+        """Return a new session, not used by requests until logged in."""
+        session = requests.Session()
+        session.headers.update({
             'Accept': 'application/json',
             "Content-Type": "application/json",
             "X-EMC-REST-CLIENT": "true"})
-        self.session.auth = requests.auth.HTTPBasicAuth(
+        session.auth = requests.auth.HTTPBasicAuth(
             self.rest_username,
             cryptor.decode(self.rest_password))
         if not self.verify:
-            self.session.verify = False
+            session.verify = False
         else:
             LOG.debug("Enable certificate verification, ca_path: {0}".format(
                 self.verify))
-            self.session.verify = self.verify
-        self.session.trust_env = False
-        self.session.mount("https://", ssl_utils.HostNameIgnoreAdapter())
+            session.verify = self.verify
+        session.trust_env = False
+        session.mount("https://", ssl_utils.HostNameIgnoreAdapter(
+            pool_maxsize=consts.MAX_CONCURRENT_PAGES))
+        return session
 
     def login(self):
         try:
@@ -104,16 +115,25 @@ class RestHandler(RestClient):
             if self.rest_auth_token is None:
                 url = RestHandler.REST_AUTH_URL
                 data = {}
-                self.init_rest_client()
+                # Concurrent requests keep using the current session until
+                # the new one is logged in
+                session = self.init_rest_client()
                 res = self. \
                     do_call(url, data, 'GET',
-                            calltimeout=consts.SOCKET_TIMEOUT)
+                            calltimeout=consts.SOCKET_TIMEOUT,
+                            session=session)
                 if res.status_code == 200:
                     access_session = res.headers['EMC-CSRF-TOKEN']
-                    self.rest_auth_token = access_session
-                    self.session.headers[
+                    session.headers[
                         RestHandler.REST_AUTH_KEY] = access_session
+                    old_session = self.session
+                    self.session = session
+                    self.rest_auth_token = access_session
+                    if old_session:
+                        # Requests in flight are not affected
+                        old_session.close()
                 else:
+                    session.close()
                     LOG.error("Login error. URL: %(url)s\n"
                               "Reason: %(reason)s.",
                               {"url": url, "reason": res.text})
@@ -167,22 +187,28 @@ class RestHandler(RestClient):
         result_json = self.get_rest_info(url)
         return result_json
 
-    def get_all_luns(self, page_size):
-        url = '%s?%s&page=%s' % (RestHandler.REST_LUNS_URL,
-                                 'fields=id,name,health,type,sizeAllocated,'
-                                 'sizeTotal,sizeUsed,pool,wwn,isThinEnabled',
-                                 page_size)
+    def get_all_luns(self, page_number, page_size=consts.PAGE_SIZE):
+        url = '%s?%s&%s' % (RestHandler.REST_LUNS_URL,
+                            'fields=id,name,health,type,sizeAllocated,'
+                            'sizeTotal,sizeUsed,pool,wwn,isThinEnabled',
+                            self._get_page_query(page_number, page_size))
         result_json = self.get_rest_info(url)
         return result_json
 
-    def get_all_alerts(self, page_size):
-        url = '%s?%s&page=%s' % (RestHandler.REST_ALERTS_URL,
-                                 'fields=id,timestamp,severity,component,'
-                                 'messageId,message,description,descriptionId',
-                                 page_size)
+    def get_all_alerts(self, page_number, page_size=consts.PAGE_SIZE):
+        url = '%s?%s&%s' % (RestHandler.REST_ALERTS_URL,
+                            'fields=id,timestamp,severity,component,'
+                            'messageId,message,description,descriptionId',
+                            self._get_page_query(page_number, page_size))
         result_json = self.get_rest_info(url)
         return result_json
 
+    @staticmethod
+    def _get_page_query(page_number, page_size):
+        # entryCount is only returned in the response when asked for
+        return 'page=%s&per_page=%s&with_entrycount=true' % (page_number,
+                                                             page_size)
+
     def get_soft_version(self):
         url = '%s?%s' % (RestHandler.REST_SOFT_VERSION_URL,
                          'fields=version')
@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from eventlet import greenpool
 from oslo_log import log
 
+from delfin import exception
 from delfin.common import constants
 from delfin.drivers import driver
 from delfin.drivers.dell_emc.unity import rest_handler, alert_handler, consts
@@ -152,32 +154,59 @@ class UNITYStorDriver(driver.StorageDriver):
                 }
                 volume_list.append(v)
 
+    @staticmethod
+    def _get_all_pages(get_page, page_size=consts.PAGE_SIZE):
+        """Get all pages of a collection query.
+        The first page tells the entry count, so the remaining pages are
+        got concurrently. Without the entry count, pages are got one by
+        one until a page is not full.
+
+        A page which could not be got fails the whole query, so that a
+        partial collection is never taken for the complete one. Only a
+        page without entries ends the collection.
+        """
+        def get_page_or_raise(page_number):
+            page = get_page(page_number, page_size)
+            if page is None:
+                msg = "Failed to get page {0} of collection".format(
+                    page_number)
+                LOG.error(msg)
+                raise exception.StorageBackendException(msg)
+            return page
+
+        first_page = get_page_or_raise(1)
+        if not first_page.get('entries'):
+            return []
+        pages = [first_page]
+        entry_count = first_page.get('entryCount')
+        if entry_count is not None:
+            page_count = (entry_count + page_size - 1) // page_size
+            pool = greenpool.GreenPool(consts.MAX_CONCURRENT_PAGES)
+            pages.extend(pool.imap(get_page_or_raise,
+                                   range(2, page_count + 1)))
+        else:
+            page_number = 1
+            while len(pages[-1].get('entries')) >= page_size:
+                page_number += 1
+                page = get_page_or_raise(page_number)
+                if not page.get('entries'):
+                    break
+                pages.append(page)
+        return [page for page in pages if page.get('entries')]
+
     def list_volumes(self, context):
-        page_size = 1
         volume_list = []
-        while True:
-            luns = self.rest_handler.get_all_luns(page_size)
-            if 'entries' not in luns:
-                break
-            if len(luns['entries']) < 1:
-                break
+        for luns in self._get_all_pages(self.rest_handler.get_all_luns):
             self.volume_handler(luns, volume_list)
-            page_size = page_size + 1
 
         return volume_list
 
     def list_alerts(self, context, query_para=None):
-        page_size = 1
         alert_model_list = []
-        while True:
-            alert_list = self.rest_handler.get_all_alerts(page_size)
-            if 'entries' not in alert_list:
-                break
-            if len(alert_list['entries']) < 1:
-                break
+        for alert_list in self._get_all_pages(
+                self.rest_handler.get_all_alerts):
             alert_handler.AlertHandler() \
                 .parse_queried_alerts(alert_model_list, alert_list, query_para)
-            page_size = page_size + 1
 
         return alert_model_list
 
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from eventlet import event
+from eventlet import greenpool
+from oslo_config import cfg
 from oslo_log import log
 from oslo_utils import units
 
@@ -20,8 +23,32 @@ from delfin.common import constants
 from delfin.drivers.dell_emc.vmax import rest
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+vmax_opts = [
+    cfg.IntOpt('max_concurrent_requests',
+               default=8,
+               min=1,
+               help='Maximum number of concurrent requests sent to one '
+                    'Unisphere when collecting resource details. It can be '
+                    'overridden for one array by the '
+                    '"max_concurrent_requests" extra attribute.'),
+]
+
+CONF.register_opts(vmax_opts, "dell_emc_vmax")
 
 EMBEDDED_UNISPHERE_ARRAY_COUNT = 1
+# Number of volumes yielded per page when iterating volumes
+VOLUME_PAGE_SIZE = 1000
+
+# TODO: Update constants.VolumeStatus to make mapping more precise
+VOLUME_STATUS_MAP = {
+    'Ready': constants.VolumeStatus.AVAILABLE,
+    'Not Ready': constants.VolumeStatus.ERROR,
+    'Mixed': constants.VolumeStatus.ERROR,
+    'Write Disabled': constants.VolumeStatus.ERROR,
+    'N/A': constants.VolumeStatus.ERROR,
+}
 
 
 class VMAXClient(object):
@@ -33,7 +60,12 @@ class VMAXClient(object):
         rest_access = kwargs.get('rest')
         if rest_access is None:
             raise exception.InvalidInput('Input rest_access is missing')
+        extra_attributes = kwargs.get('extra_attributes') or {}
+        self.max_concurrent_requests = int(
+            extra_attributes.get('max_concurrent_requests') or
+            CONF.dell_emc_vmax.max_concurrent_requests)
         self.rest = rest.VMaxRest()
+        self.rest.pool_maxsize = self.max_concurrent_requests
         self.rest.set_rest_credentials(rest_access)
         self.reset_connection(**kwargs)
 
@@ -163,72 +195,43 @@ class VMAXClient(object):
             raise exception.StorageBackendException(msg)
 
     def list_volumes(self, storage_id):
+        volume_list = []
+        for volumes in self.iter_volumes(storage_id):
+            volume_list.extend(volumes)
+        return volume_list
+
+    def iter_volumes(self, storage_id, page_size=VOLUME_PAGE_SIZE):
 
         try:
             # Get default SRPs assigned for the array
             default_srps = self.rest.get_default_srps(
                 self.array_id, version=self.uni_version)
-            # List all volumes except data volumes
-            volumes = self.rest.get_volume_list(
-                self.array_id, version=self.uni_version,
-                params={'data_volume': 'false'})
-
-            # TODO: Update constants.VolumeStatus to make mapping more precise
-            switcher = {
-                'Ready': constants.VolumeStatus.AVAILABLE,
-                'Not Ready': constants.VolumeStatus.ERROR,
-                'Mixed': constants.VolumeStatus.ERROR,
-                'Write Disabled': constants.VolumeStatus.ERROR,
-                'N/A': constants.VolumeStatus.ERROR,
-            }
-
-            volume_list = []
-            for volume in volumes:
-                # Get volume details
-                vol = self.rest.get_volume(self.array_id,
-                                           self.uni_version, volume)
-
-                emulation_type = vol['emulation']
-                total_cap = vol['cap_mb'] * units.Mi
-                used_cap = (total_cap * vol['allocated_percent']) / 100.0
-                free_cap = total_cap - used_cap
-
-                status = switcher.get(vol['status'],
-                                      constants.VolumeStatus.ERROR)
-
-                description = "Dell EMC VMAX volume"
-                if vol['type'] == 'TDEV':
-                    description = "Dell EMC VMAX 'thin device' volume"
-
-                name = volume
-                if vol.get('volume_identifier'):
-                    name = volume + ':' + vol['volume_identifier']
-
-                v = {
-                    "name": name,
-                    "storage_id": storage_id,
-                    "description": description,
-                    "status": status,
-                    "native_volume_id": vol['volumeId'],
-                    "wwn": vol['wwn'],
-                    "type": constants.VolumeType.THIN,
-                    "total_capacity": int(total_cap),
-                    "used_capacity": int(used_cap),
-                    "free_capacity": int(free_cap),
-                }
+            # Storage groups shared by volumes are got only once per sync
+            sg_cache = {}
+            pool = greenpool.GreenPool(self.max_concurrent_requests)
 
-                if vol['num_of_storage_groups'] == 1:
-                    sg = vol['storageGroupId'][0]
-                    sg_info = self.rest.get_storage_group(
-                        self.array_id, self.uni_version, sg)
-                    v['native_storage_pool_id'] = sg_info['srp']
-                    v['compressed'] = sg_info['compression']
-                else:
-                    v['native_storage_pool_id'] = default_srps[emulation_type]
-
-                volume_list.append(v)
-
-            return volume_list
+            # List all volumes except data volumes
+            params = {'data_volume': 'false'}
+            volumes = self.rest.get_volume_details_list(
+                self.array_id, version=self.uni_version, params=params)
+            if volumes is not None:
+                def get_volume(vol):
+                    return self._get_volume(storage_id, vol['volumeId'], vol,
+                                            default_srps, sg_cache)
+            else:
+                # Fall back to getting volume details one by one
+                volumes = self.rest.get_volume_list(
+                    self.array_id, version=self.uni_version, params=params)
+
+                def get_volume(device_id):
+                    vol = self.rest.get_volume(self.array_id,
+                                               self.uni_version, device_id)
+                    return self._get_volume(storage_id, device_id, vol,
+                                            default_srps, sg_cache)
+
+            for start in range(0, len(volumes), page_size):
+                yield list(pool.imap(get_volume,
+                                     volumes[start:start + page_size]))
 
         except exception.SSLCertificateFailed:
             LOG.error('SSL certificate failed when list volumes for VMax')
@@ -238,6 +241,73 @@ class VMAXClient(object):
             LOG.error(msg)
             raise exception.StorageBackendException(msg)
 
+    def _get_storage_group(self, sg, sg_cache):
+        """Get a storage group once for the volumes got concurrently.
+
+        While the storage group is got, sg_cache holds an event which the
+        other volumes of the storage group wait for.
+        """
+        if sg in sg_cache:
+            sg_info = sg_cache[sg]
+            if isinstance(sg_info, event.Event):
+                return sg_info.wait()
+            return sg_info
+
+        fetched = event.Event()
+        sg_cache[sg] = fetched
+        try:
+            sg_info = self.rest.get_storage_group(
+                self.array_id, self.uni_version, sg)
+        except Exception as e:
+            # Waiting volumes fail too, a later one gets it again
+            del sg_cache[sg]
+            fetched.send_exception(e)
+            raise
+        sg_cache[sg] = sg_info
+        fetched.send(sg_info)
+        return sg_info
+
+    def _get_volume(self, storage_id, device_id, vol, default_srps,
+                    sg_cache):
+        emulation_type = vol['emulation']
+        total_cap = vol['cap_mb'] * units.Mi
+        used_cap = (total_cap * vol['allocated_percent']) / 100.0
+        free_cap = total_cap - used_cap
+
+        status = VOLUME_STATUS_MAP.get(vol['status'],
+                                       constants.VolumeStatus.ERROR)
+
+        description = "Dell EMC VMAX volume"
+        if vol['type'] == 'TDEV':
+            description = "Dell EMC VMAX 'thin device' volume"
+
+        name = device_id
+        if vol.get('volume_identifier'):
+            name = device_id + ':' + vol['volume_identifier']
+
+        v = {
+            "name": name,
+            "storage_id": storage_id,
+            "description": description,
+            "status": status,
+            "native_volume_id": vol['volumeId'],
+            "wwn": vol['wwn'],
+            "type": constants.VolumeType.THIN,
+            "total_capacity": int(total_cap),
+            "used_capacity": int(used_cap),
+            "free_capacity": int(free_cap),
+        }
+
+        if vol['num_of_storage_groups'] == 1:
+            sg = vol['storageGroupId'][0]
+            sg_info = self._get_storage_group(sg, sg_cache)
+            v['native_storage_pool_id'] = sg_info['srp']
+            v['compressed'] = sg_info['compression']
+        else:
+            v['native_storage_pool_id'] = default_srps[emulation_type]
+
+        return v
+
     def list_alerts(self, query_para):
         """Get all alerts from an array."""
         return self.rest.get_alerts(query_para, version=self.uni_version,
@@ -22,11 +22,13 @@ import requests.auth
 import requests.exceptions as r_exc
 import six
 import urllib3
+from eventlet import greenpool
 from oslo_log import log as logging
 
 from delfin import cryptor
 from delfin import exception
 from delfin import ssl_utils
+from delfin import utils
 from delfin.common import alert_util
 from delfin.i18n import _
 
@@ -34,6 +36,11 @@ LOG = logging.getLogger(__name__)
 SLOPROVISIONING = 'sloprovisioning'
 U4V_VERSION = '92'
 UCODE_5978 = '5978'
+# Unisphere versions from which volume list can return volume attributes
+VOLUME_DETAILS_MIN_VERSION = 91
+# Attributes of a volume read by VMaxClient._get_volume
+VOLUME_DETAIL_KEYS = ('volumeId', 'emulation', 'cap_mb', 'allocated_percent',
+                      'status', 'type', 'wwn', 'num_of_storage_groups')
 # HTTP constants
 GET = 'GET'
 POST = 'POST'
@@ -47,6 +54,8 @@ STATUS_401 = 401
 
 # Default expiration time(in sec) for vmax connect request
 VERSION_GET_TIME_OUT = 10
+# Number of retries when getting one page of an iterator fails
+ITERATOR_PAGE_RETRIES = 3
 
 
 class VMaxRest(object):
@@ -58,6 +67,7 @@ class VMaxRest(object):
         self.user = None
         self.passwd = None
         self.verify = None
+        self.pool_maxsize = requests.adapters.DEFAULT_POOLSIZE
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     def set_rest_credentials(self, array_info):
@@ -93,7 +103,8 @@ class VMaxRest(object):
             LOG.debug("Enable certificate verification, ca_path: {0}".format(
                 self.verify))
             session.verify = self.verify
-        session.mount("https://", ssl_utils.get_host_name_ignore_adapter())
+        session.mount("https://", ssl_utils.get_host_name_ignore_adapter(
+            pool_maxsize=self.pool_maxsize))
 
         self.session = session
         return session
@@ -529,6 +540,41 @@ class VMaxRest(object):
             pass
         return device_ids
 
+    def get_volume_details_list(self, array, version, params):
+        """Get a filtered list of VMax volumes with their attributes.
+        Newer Unisphere can return the attributes of every volume in the
+        list (and its iterator pages) so the volumes need not be got one
+        by one.
+        :param array: the array serial number
+        :param version: the unisphere version
+        :param params: filter parameters
+        :returns: volume dict list, or None if the attributes are not
+                  returned by this unisphere
+        """
+        if not version or int(version) < VOLUME_DETAILS_MIN_VERSION:
+            return None
+        params = dict(params or {}, details='true')
+        volume_dict_list = self.get_resource(
+            array, SLOPROVISIONING, 'volume', version=version, params=params)
+        if not isinstance(volume_dict_list, list):
+            return None
+        for vol_dict in volume_dict_list:
+            if not self._has_volume_details(vol_dict):
+                LOG.info("Volume attributes are not returned in volume "
+                         "list, get volumes one by one instead.")
+                return None
+        return volume_dict_list
+
+    @staticmethod
+    def _has_volume_details(vol_dict):
+        if not isinstance(vol_dict, dict):
+            return False
+        if any(key not in vol_dict for key in VOLUME_DETAIL_KEYS):
+            return False
+        # The storage group is only read for a volume in one of them
+        return vol_dict['num_of_storage_groups'] != 1 or \
+            bool(vol_dict.get('storageGroupId'))
+
     def list_pagination(self, list_info):
         """Process lists under or over the maxPageSize
         :param list_info: the object list information
@@ -563,6 +609,8 @@ class VMaxRest(object):
     def get_iterator_page_list(self, iterator_id, result_count, start_position,
                                end_position, max_page_size):
         """Iterate through response if more than one page available.
+        All the page windows are known from the first response, so the
+        pages are got concurrently and merged in order.
         :param iterator_id: the iterator ID
         :param result_count: the amount of results in the iterator
         :param start_position: position to begin iterator from
@@ -570,28 +618,47 @@ class VMaxRest(object):
         :param max_page_size: the max page size
         :returns: list -- merged results from multiple pages
         """
-        iterator_result = []
-        has_more_entries = True
-
-        while has_more_entries:
-            if start_position <= result_count <= end_position:
-                end_position = result_count
-                has_more_entries = False
-
-            params = {'to': end_position, 'from': start_position}
-            target_uri = ('/common/Iterator/%(iterator_id)s/page' % {
-                'iterator_id': iterator_id})
-            iterator_response = self.get_request(target_uri, 'iterator',
-                                                 params)
-            try:
-                iterator_result += iterator_response['result']
-                start_position += max_page_size
-                end_position += max_page_size
-            except (KeyError, TypeError):
-                pass
+        windows = []
+        while start_position <= result_count:
+            windows.append((start_position, min(end_position, result_count)))
+            start_position += max_page_size
+            end_position += max_page_size
 
+        iterator_result = []
+        pool = greenpool.GreenPool(self.pool_maxsize)
+        for page in pool.imap(
+                lambda window: self.get_iterator_page(iterator_id, *window),
+                windows):
+            iterator_result += page
         return iterator_result
 
+    @utils.retry((exception.StorageBackendException, r_exc.Timeout,
+                  r_exc.ConnectionError),
+                 interval=1, retries=ITERATOR_PAGE_RETRIES)
+    def get_iterator_page(self, iterator_id, start_position, end_position):
+        """Get one page of results from an iterator.
+        :param iterator_id: the iterator ID
+        :param start_position: position to begin the page from
+        :param end_position: position to stop the page at
+        :returns: list -- results of the page
+        :raises: StorageBackendException
+        """
+        params = {'to': end_position, 'from': start_position}
+        target_uri = ('/common/Iterator/%(iterator_id)s/page' % {
+            'iterator_id': iterator_id})
+        iterator_response = self.get_request(target_uri, 'iterator', params)
+        try:
+            return iterator_response['result']
+        except (KeyError, TypeError):
+            exception_message = (
+                _("Failed to get results %(from)s to %(to)s of iterator "
+                  "%(iterator_id)s.") % {'from': start_position,
+                                         'to': end_position,
+                                         'iterator_id': iterator_id})
+            LOG.warning(exception_message)
+            raise exception.StorageBackendException(
+                message=exception_message)
+
     def get_alerts(self, query_para, array, version):
         """Get all alerts with given version and arrayid
         :param query_para: Contains optional begin and end time
@@ -78,6 +78,9 @@ class VMAXStorageDriver(driver.StorageDriver):
     def list_volumes(self, context):
         return self.client.list_volumes(self.storage_id)
 
+    def iter_volumes(self, context):
+        return self.client.iter_volumes(self.storage_id)
+
     def add_trap_config(self, context, trap_config):
         pass
 
@@ -48,6 +48,56 @@ class StorageDriver(object):
         """List all storage volumes from storage system."""
         pass
 
+    def iter_storage_pools(self, context):
+        """Iterate storage pools from storage system page by page.
+
+        Each item yielded is a list of storage pools. Drivers which can query
+        storage pools by page should override it, so that the pools of a
+        large storage system are not held in memory at once. By default, all
+        storage pools are yielded as a single page.
+        """
+        yield self.list_storage_pools(context)
+
+    def iter_volumes(self, context):
+        """Iterate storage volumes from storage system page by page.
+
+        Each item yielded is a list of volumes. Drivers which can query
+        volumes by page should override it, so that the volumes of a large
+        storage system are not held in memory at once. By default, all
+        volumes are yielded as a single page.
+        """
+        yield self.list_volumes(context)
+
+    def list_volumes_with_pools(self, context, storage_pools):
+        """List all storage volumes, given the storage pools listed by
+        list_storage_pools in the same sync.
+
+        Drivers which need the storage pools to build volumes should
+        override it, so that the pools are not got from storage system
+        again. By default, list_volumes is called.
+        """
+        return self.list_volumes(context)
+
+    def iter_volumes_with_pools(self, context, storage_pools):
+        """Iterate storage volumes page by page, given the storage pools
+        listed by list_storage_pools in the same sync.
+
+        See list_volumes_with_pools. By default, iter_volumes is called.
+        """
+        return self.iter_volumes(context)
+
+    @classmethod
+    def uses_storage_pools(cls, by_page=False):
+        """Whether volumes are built with the storage pools listed in the
+        same sync, i.e. list_volumes_with_pools, or iter_volumes_with_pools
+        if by_page, is overridden.
+        """
+        if by_page:
+            return cls.iter_volumes_with_pools is not \
+                StorageDriver.iter_volumes_with_pools
+        return cls.list_volumes_with_pools is not \
+            StorageDriver.list_volumes_with_pools
+
     @abc.abstractmethod
     def add_trap_config(self, context, trap_config):
         """Config the trap receiver in storage system."""
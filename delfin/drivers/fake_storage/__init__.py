@@ -143,20 +143,23 @@ class FakeStorageDriver(driver.StorageDriver):
         return pool_list
 
     def list_volumes(self, ctx):
+        volume_list = []
+        for volumes in self.iter_volumes(ctx):
+            volume_list = volume_list + volumes
+        return volume_list
+
+    def iter_volumes(self, ctx):
         # Get a random number as the volume count.
         rd_volumes_count = random.randint(MIN_VOLUME, MAX_VOLUME)
         LOG.info("###########fake_volumes number for %s: %d" % (
             self.storage_id, rd_volumes_count))
         loops = math.ceil(rd_volumes_count / PAGE_LIMIT)
-        volume_list = []
         for idx in range(loops):
             start = idx * PAGE_LIMIT
             end = (idx + 1) * PAGE_LIMIT
             if idx == (loops - 1):
                 end = rd_volumes_count
-            vs = self._get_volume_range(start, end)
-            volume_list = volume_list + vs
-        return volume_list
+            yield self._get_volume_range(start, end)
 
     def add_trap_config(self, context, trap_config):
         pass
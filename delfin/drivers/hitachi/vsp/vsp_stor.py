@@ -178,6 +178,16 @@ class HitachiVspDriver(driver.StorageDriver):
             head_id += consts.LDEV_NUMBER_OF_PER_REQUEST
         return volume_list
 
+    def iter_volumes(self, context):
+        head_id = 0
+        is_end = False
+        while is_end is False:
+            volume_list = []
+            is_end = self.get_volumes_paginated(volume_list, head_id)
+            head_id += consts.LDEV_NUMBER_OF_PER_REQUEST
+            if volume_list:
+                yield volume_list
+
     def get_volumes_paginated(self, volume_list, head_id):
         try:
             volumes_info = self.rest_handler.get_volumes(head_id)
@@ -116,59 +116,85 @@ class OceanStorDriver(driver.StorageDriver):
             raise exception.StorageBackendException(
                 'Failed to get pool metrics from OceanStor')
 
-    def _get_orig_pool_id(self, pools, volume):
+    @staticmethod
+    def _get_pool_ids(pools):
+        pool_ids = {}
         for pool in pools:
-            if volume['PARENTNAME'] == pool['NAME']:
-                return pool['ID']
-        return ''
+            pool_ids.setdefault(pool['NAME'], pool['ID'])
+        return pool_ids
+
+    def _get_volume(self, volume, pool_ids):
+        # Get pool id of volume
+        orig_pool_id = pool_ids.get(volume['PARENTNAME'], '')
+        compressed = False
+        if volume['ENABLECOMPRESSION'] != 'false':
+            compressed = True
+
+        deduplicated = False
+        if volume['ENABLEDEDUP'] != 'false':
+            deduplicated = True
+
+        status = constants.VolumeStatus.ERROR
+        if volume['RUNNINGSTATUS'] == consts.STATUS_VOLUME_READY:
+            status = constants.VolumeStatus.AVAILABLE
+
+        vol_type = constants.VolumeType.THICK
+        if volume['ALLOCTYPE'] == consts.THIN_LUNTYPE:
+            vol_type = constants.VolumeType.THIN
+
+        sector_size = int(volume['SECTORSIZE'])
+        total_cap = int(volume['CAPACITY']) * sector_size
+        used_cap = int(volume['ALLOCCAPACITY']) * sector_size
+
+        return {
+            'name': volume['NAME'],
+            'storage_id': self.storage_id,
+            'description': 'Huawei OceanStor volume',
+            'status': status,
+            'native_volume_id': volume['ID'],
+            'native_storage_pool_id': orig_pool_id,
+            'wwn': volume['WWN'],
+            'type': vol_type,
+            'total_capacity': total_cap,
+            'used_capacity': used_cap,
+            'free_capacity': None,
+            'compressed': compressed,
+            'deduplicated': deduplicated,
+        }
 
     def list_volumes(self, context):
+        return self._list_volumes(
+            lambda: self._get_pool_ids(self.client.get_all_pools()))
+
+    def list_volumes_with_pools(self, context, storage_pools):
+        return self._list_volumes(
+            lambda: self._get_pool_ids_of(storage_pools))
+
+    def iter_volumes(self, context):
+        return self._iter_volumes(
+            lambda: self._get_pool_ids(self.client.get_all_pools()))
+
+    def iter_volumes_with_pools(self, context, storage_pools):
+        return self._iter_volumes(
+            lambda: self._get_pool_ids_of(storage_pools))
+
+    @staticmethod
+    def _get_pool_ids_of(storage_pools):
+        # Pools listed by list_storage_pools in the same sync
+        pool_ids = {}
+        for pool in storage_pools:
+            pool_ids.setdefault(pool['name'], pool['native_storage_pool_id'])
+        return pool_ids
+
+    def _list_volumes(self, get_pool_ids):
         try:
             # Get all volumes in OceanStor
             volumes = self.client.get_all_volumes()
-            pools = self.client.get_all_pools()
+            pool_ids = get_pool_ids()
 
             volume_list = []
             for volume in volumes:
-                # Get pool id of volume
-                orig_pool_id = self._get_orig_pool_id(pools, volume)
-                compressed = False
-                if volume['ENABLECOMPRESSION'] != 'false':
-                    compressed = True
-
-                deduplicated = False
-                if volume['ENABLEDEDUP'] != 'false':
-                    deduplicated = True
-
-                status = constants.VolumeStatus.ERROR
-                if volume['RUNNINGSTATUS'] == consts.STATUS_VOLUME_READY:
-                    status = constants.VolumeStatus.AVAILABLE
-
-                vol_type = constants.VolumeType.THICK
-                if volume['ALLOCTYPE'] == consts.THIN_LUNTYPE:
-                    vol_type = constants.VolumeType.THIN
-
-                sector_size = int(volume['SECTORSIZE'])
-                total_cap = int(volume['CAPACITY']) * sector_size
-                used_cap = int(volume['ALLOCCAPACITY']) * sector_size
-
-                v = {
-                    'name': volume['NAME'],
-                    'storage_id': self.storage_id,
-                    'description': 'Huawei OceanStor volume',
-                    'status': status,
-                    'native_volume_id': volume['ID'],
-                    'native_storage_pool_id': orig_pool_id,
-                    'wwn': volume['WWN'],
-                    'type': vol_type,
-                    'total_capacity': total_cap,
-                    'used_capacity': used_cap,
-                    'free_capacity': None,
-                    'compressed': compressed,
-                    'deduplicated': deduplicated,
-                }
-
-                volume_list.append(v)
+                volume_list.append(self._get_volume(volume, pool_ids))
 
             return volume_list
 
@@ -178,6 +204,19 @@ class OceanStorDriver(driver.StorageDriver):
             raise exception.StorageBackendException(
                 'Failed to get list volumes from OceanStor')
 
+    def _iter_volumes(self, get_pool_ids):
+        try:
+            pool_ids = get_pool_ids()
+            for volumes in self.client.iter_all_volumes():
+                yield [self._get_volume(volume, pool_ids)
+                       for volume in volumes]
+
+        except Exception as err:
+            LOG.error(
+                "Failed to get list volumes from OceanStor: {}".format(err))
+            raise exception.StorageBackendException(
+                'Failed to get list volumes from OceanStor')
+
     def add_trap_config(self, context, trap_config):
         pass
 
@@ -15,10 +15,13 @@
 #    under the License.
 
 import json
+import threading
 
 import requests
 import six
 import urllib3
+from eventlet import greenpool
+from oslo_config import cfg
 from urllib3.exceptions import InsecureRequestWarning
 from oslo_log import log as logging
 
@@ -29,6 +32,20 @@ from delfin.ssl_utils import HostNameIgnoreAdapter
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+oceanstor_opts = [
+    cfg.IntOpt('max_concurrent_pages',
+               default=1,
+               min=1,
+               help='Maximum number of pages got concurrently when listing '
+                    'LUNs and storage pools. When it is greater than 1, the '
+                    'object count is queried first and all pages are '
+                    'requested concurrently, otherwise pages are got one by '
+                    'one.'),
+]
+
+CONF.register_opts(oceanstor_opts, "huawei_oceanstor")
 
 
 class RestClient(object):
@@ -52,6 +69,8 @@ class RestClient(object):
         self.url = None
         self.device_id = None
         self.verify = None
+        # Serializes relogin of concurrent requests
+        self.login_lock = threading.Lock()
         urllib3.disable_warnings(InsecureRequestWarning)
         self.reset_connection(**kwargs)
 
@@ -65,37 +84,45 @@ class RestClient(object):
             raise exception.InvalidCredential(msg)
 
     def init_http_head(self):
-        self.url = None
-        self.session = requests.Session()
-        self.session.headers.update({
+        """Return a new session, not used by requests until logged in."""
+        session = requests.Session()
+        session.headers.update({
             "Connection": "keep-alive",
             "Content-Type": "application/json"})
         if not self.verify:
-            self.session.verify = False
+            session.verify = False
         else:
             LOG.debug("Enable certificate verification, verify: {0}".format(
                 self.verify))
-            self.session.verify = self.verify
-            self.session.mount("https://", HostNameIgnoreAdapter())
+            session.verify = self.verify
+            session.mount("https://", HostNameIgnoreAdapter())
 
-        self.session.trust_env = False
+        session.trust_env = False
+        return session
 
     def do_call(self, url, data, method,
-                calltimeout=consts.SOCKET_TIMEOUT, log_filter_flag=False):
+                calltimeout=consts.SOCKET_TIMEOUT, log_filter_flag=False,
+                session=None):
         """Send requests to Huawei storage server.
 
         Send HTTPS call, get response in JSON.
         Convert response into Python Object and return it.
+
+        :param session: session to send the request with, url is then a
+            full url. By default the request is sent with the session
+            logged in, to a url relative to the device.
         """
-        if self.url:
-            url = self.url + url
+        if session is None:
+            session = self.session
+            if self.url:
+                url = self.url + url
 
         kwargs = {'timeout': calltimeout}
         if data:
             kwargs['data'] = json.dumps(data)
 
         if method in ('POST', 'PUT', 'GET', 'DELETE'):
-            func = getattr(self.session, method.lower())
+            func = getattr(session, method.lower())
         else:
             msg = _("Request method %s is invalid.") % method
             LOG.error(msg)
@@ -144,10 +171,12 @@ class RestClient(object):
             data = {"username": self.rest_username,
                     "password": cryptor.decode(self.rest_password),
                     "scope": "0"}
-            self.init_http_head()
+            # Concurrent requests keep using the current session until
+            # the new one is logged in
+            session = self.init_http_head()
             result = self.do_call(url, data, 'POST',
                                   calltimeout=consts.LOGIN_SOCKET_TIMEOUT,
-                                  log_filter_flag=True)
+                                  log_filter_flag=True, session=session)
 
             if (result['error']['code'] != 0) or ("data" not in result):
                 LOG.error("Login error. URL: %(url)s\n"
@@ -157,9 +186,10 @@ class RestClient(object):
 
             LOG.debug('Login success: %(url)s', {'url': item_url})
             device_id = result['data']['deviceid']
+            session.headers['iBaseToken'] = result['data']['iBaseToken']
             self.device_id = device_id
             self.url = item_url + device_id
-            self.session.headers['iBaseToken'] = result['data']['iBaseToken']
+            self.session = session
             if (result['data']['accountstate']
                     in (consts.PWD_EXPIRED, consts.PWD_RESET)):
                 self.logout()
@@ -183,13 +213,19 @@ class RestClient(object):
         """
         device_id = None
         old_url = self.url
+        old_session = self.session
         result = self.do_call(url, data, method,
                               log_filter_flag=log_filter_flag)
         error_code = result['error']['code']
         if (error_code == consts.ERROR_CONNECT_TO_SERVER
                 or error_code == consts.ERROR_UNAUTHORIZED_TO_SERVER):
-            LOG.error("Can't open the recent url, relogin.")
-            device_id = self.login()
+            with self.login_lock:
+                if self.session is old_session:
+                    LOG.error("Can't open the recent url, relogin.")
+                    device_id = self.login()
+                else:
+                    # Another request has already logged in again
+                    device_id = self.device_id
 
         if device_id is not None:
             LOG.debug('Replace URL: \n'
@@ -207,6 +243,14 @@ class RestClient(object):
                        log_filter_flag=False,
                        page_size=consts.QUERY_PAGE_SIZE):
         result_list = []
+        for page in self.iter_paginated_call(url, data, method,
+                                             log_filter_flag, page_size):
+            result_list.extend(page)
+        return result_list
+
+    def iter_paginated_call(self, url, data=None, method=None,
+                            log_filter_flag=False,
+                            page_size=consts.QUERY_PAGE_SIZE):
         start, end = 0, page_size
         msg = _('Query resource volume error')
         while True:
@@ -219,13 +263,43 @@ class RestClient(object):
             if 'data' not in result:
                 break
 
-            result_list.extend(result['data'])
+            yield result['data']
             # Check if this is last page
             if len(result['data']) < page_size:
                 break
 
+    def concurrent_paginated_call(self, url, data=None, method=None,
+                                  log_filter_flag=False,
+                                  page_size=consts.QUERY_PAGE_SIZE):
+        """Get all pages of a query concurrently.
+
+        Only for resources supporting to query their count, which tells
+        all the page ranges to request.
+        """
+        count = self.get_count(url)
+        msg = _('Query resource volume error')
+
+        def get_page(start):
+            url_p = '{0}?range=[{1}-{2}]'.format(url, start, start + page_size)
+            result = self.call(url_p, data, method, log_filter_flag)
+            self._assert_rest_result(result, msg)
+            return result.get('data', [])
+
+        result_list = []
+        pool = greenpool.GreenPool(CONF.huawei_oceanstor.max_concurrent_pages)
+        for page in pool.imap(get_page, range(0, count, page_size)):
+            result_list.extend(page)
         return result_list
 
+    def get_count(self, url):
+        result = self.call(url + '/count', method='GET', log_filter_flag=True)
+
+        msg = _('Get count of %s error.') % url
+        self._assert_rest_result(result, msg)
+        self._assert_data_in_result(result, msg)
+
+        return int(result['data']['COUNT'])
+
     def logout(self):
         """Logout the session."""
         url = "/sessions"
@@ -268,10 +342,21 @@ class RestClient(object):
 
     def get_all_volumes(self):
         url = "/lun"
+        if CONF.huawei_oceanstor.max_concurrent_pages > 1:
+            return self.concurrent_paginated_call(url, None, "GET",
+                                                  log_filter_flag=True)
         return self.paginated_call(url, None, "GET", log_filter_flag=True)
 
+    def iter_all_volumes(self):
+        url = "/lun"
+        return self.iter_paginated_call(url, None, "GET",
+                                        log_filter_flag=True)
+
     def get_all_pools(self):
         url = "/storagepool"
+        if CONF.huawei_oceanstor.max_concurrent_pages > 1:
+            return self.concurrent_paginated_call(url, None, "GET",
+                                                  log_filter_flag=True)
         return self.paginated_call(url, None, "GET", log_filter_flag=True)
 
     def clear_alert(self, sequence_number):
@@ -148,6 +148,29 @@ class SSHHandler(object):
                   (command, six.text_type(e))
             raise exception.SSHException(msg)
 
+    def exec_ssh_commands(self, commands):
+        """Execute commands in turn on one pooled connection."""
+        ssh_infos = []
+        command = None
+        try:
+            with self.ssh_pool.item() as ssh:
+                for command in commands:
+                    ssh_infos.append(SSHHandler.do_exec(command, ssh))
+            return ssh_infos
+        except Exception as e:
+            msg = "Failed to ssh ibm storwize_svc %s: %s" % \
+                  (command, six.text_type(e))
+            raise exception.SSHException(msg)
+
+    @staticmethod
+    def parse_delimited(info, split=':'):
+        """Parse the concise view of a -delim listing into dicts."""
+        rows = [row for row in info.split('\n') if row]
+        if not rows:
+            return []
+        keys = rows[0].split(split)
+        return [dict(zip(keys, row.split(split))) for row in rows[1:]]
+
     def change_capacity_to_bytes(self, unit):
         unit = unit.upper()
         if unit == 'TB':
@@ -231,18 +254,8 @@ class SSHHandler(object):
     def list_storage_pools(self, storage_id):
         try:
             pool_list = []
-            pool_info = self.exec_ssh_command('lsmdiskgrp')
-            pool_res = pool_info.split('\n')
-            for i in range(1, len(pool_res)):
-                if pool_res[i] is None or pool_res[i] == '':
-                    continue
-
-                pool_str = ' '.join(pool_res[i].split())
-                strinfo = pool_str.split(' ')
-                detail_command = 'lsmdiskgrp %s' % strinfo[0]
-                deltail_info = self.exec_ssh_command(detail_command)
-                pool_map = {}
-                self.handle_detail(deltail_info, pool_map, split=' ')
+            pool_info = self.exec_ssh_command('lsmdiskgrp -delim : -bytes')
+            for pool_map in self.parse_delimited(pool_info):
                 status = 'normal' if pool_map.get('status') == 'online' \
                     else 'offline'
                 total_cap = self.parse_string(pool_map.get('capacity'))
@@ -277,32 +290,44 @@ class SSHHandler(object):
     def list_volumes(self, storage_id):
         try:
             volume_list = []
-            volume_info = self.exec_ssh_command('lsvdisk')
-            volume_res = volume_info.split('\n')
-            for i in range(1, len(volume_res)):
-                if volume_res[i] is None or volume_res[i] == '':
-                    continue
-                volume_str = ' '.join(volume_res[i].split())
-                strinfo = volume_str.split(' ')
-                volume_name = strinfo[1]
-                detail_command = 'lsvdisk -delim : %s' % volume_name
-                deltail_info = self.exec_ssh_command(detail_command)
-                volume_map = {}
-                self.handle_detail(deltail_info, volume_map, split=':')
+            volume_info, copy_info, se_copy_info = self.exec_ssh_commands(
+                ['lsvdisk -delim : -bytes', 'lsvdiskcopy -delim : -bytes',
+                 'lssevdiskcopy -delim : -bytes'])
+            # The primary copy tells the attributes of a mirrored volume
+            copy_maps = {}
+            for copy_map in self.parse_delimited(copy_info):
+                if copy_map.get('vdisk_id') not in copy_maps \
+                        or copy_map.get('primary') == 'yes':
+                    copy_maps[copy_map.get('vdisk_id')] = copy_map
+            # Only thin provisioned and compressed copies are listed here
+            se_copy_maps = {}
+            for se_copy_map in self.parse_delimited(se_copy_info):
+                se_copy_maps[(se_copy_map.get('vdisk_id'),
+                              se_copy_map.get('copy_id'))] = se_copy_map
+
+            for volume_map in self.parse_delimited(volume_info):
+                copy_map = copy_maps.get(volume_map.get('id'), {})
                 status = 'normal' if volume_map.get('status') == 'online' \
                     else 'offline'
-                volume_type = 'thin' if volume_map.get('se_copy') == 'yes' \
+                volume_type = 'thin' if copy_map.get('se_copy') == 'yes' \
                     else 'thick'
                 total_capacity = self.parse_string(volume_map.get('capacity'))
-                free_capacity = self.parse_string(volume_map.
-                                                  get('free_capacity'))
-                used_capacity = self.parse_string(volume_map.
-                                                  get('used_capacity'))
+                se_copy_map = se_copy_maps.get((volume_map.get('id'),
+                                                copy_map.get('copy_id')))
+                if se_copy_map:
+                    used_capacity = self.parse_string(
+                        se_copy_map.get('used_capacity'))
+                    free_capacity = self.parse_string(
+                        se_copy_map.get('free_capacity'))
+                else:
+                    # Fully allocated copy
+                    used_capacity = total_capacity
+                    free_capacity = 0
                 compressed = True
                 deduplicated = True
-                if volume_map.get('compressed_copy') == 'no':
+                if copy_map.get('compressed_copy') == 'no':
                     compressed = False
-                if volume_map.get('deduplicated_copy') == 'no':
+                if copy_map.get('deduplicated_copy') == 'no':
                     deduplicated = False
 
                 v = {
@@ -338,13 +363,15 @@ class SSHHandler(object):
             alert_info = self.exec_ssh_command('lseventlog -monitoring yes '
                                                '-message no')
             alert_res = alert_info.split('\n')
+            detail_commands = []
             for i in range(1, len(alert_res)):
                 if alert_res[i] is None or alert_res[i] == '':
                     continue
                 alert_str = ' '.join(alert_res[i].split())
                 strinfo = alert_str.split(' ', 1)
-                detail_command = 'lseventlog %s' % strinfo[0]
-                deltail_info = self.exec_ssh_command(detail_command)
+                detail_commands.append('lseventlog %s' % strinfo[0])
+            # Event details have no concise view, get them on one connection
+            for deltail_info in self.exec_ssh_commands(detail_commands):
                 alert_map = {}
                 self.handle_detail(deltail_info, alert_map, split=' ')
                 occur_time = int(alert_map.get('last_timestamp_epoch')) * \
@@ -23,6 +23,7 @@ from delfin import db
 from delfin import exception
 from delfin import utils
 from delfin import ssl_utils
+from delfin.drivers.utils import ssh_client
 
 LOG = log.getLogger(__name__)
 
@@ -72,6 +73,8 @@ class DriverManager(stevedore.ExtensionManager):
     def remove_driver(self, storage_id):
         """Clear driver instance from driver factory."""
         self.driver_factory.pop(storage_id, None)
+        # Connections kept for the driver are closed with it
+        ssh_client.remove_ssh_executors(storage_id)
 
     def _get_driver_obj(self, context, cache_on_load=True, **kwargs):
         if not cache_on_load or not kwargs.get('storage_id'):
@@ -65,7 +65,7 @@ class RestClient(object):
                            ssl_utils.get_host_name_ignore_adapter())
 
     def do_call(self, url, data, method,
-                calltimeout=consts.SOCKET_TIMEOUT):
+                calltimeout=consts.SOCKET_TIMEOUT, session=None):
         if 'http' not in url:
             if self.san_address:
                 url = '%s%s' % (self.san_address, url)
@@ -75,7 +75,7 @@ class RestClient(object):
             kwargs['data'] = json.dumps(data)
 
         if method in ('POST', 'PUT', 'GET', 'DELETE'):
-            func = getattr(self.session, method.lower())
+            func = getattr(session or self.session, method.lower())
         else:
             msg = _("Request method %s is invalid.") % method
             LOG.error(msg)
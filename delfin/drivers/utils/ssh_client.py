@@ -13,9 +13,16 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import collections
+import threading
+import time
+
 import paramiko
 import six
+from eventlet import event
+from eventlet import greenpool
 from eventlet import pools
+from oslo_config import cfg
 from oslo_log import log as logging
 from paramiko.hostkeys import HostKeyEntry
 
@@ -23,6 +30,36 @@ from delfin import cryptor
 from delfin import exception
 
 LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+ssh_opts = [
+    cfg.IntOpt('max_connections',
+               default=3,
+               min=1,
+               help='Maximum number of SSH connections kept to one host.'),
+    cfg.DictOpt('max_connections_per_host',
+                default={},
+                help='Maximum number of SSH connections kept to specific '
+                     'hosts, overriding max_connections, e.g. '
+                     '"192.168.0.1:5,192.168.0.2:1".'),
+    cfg.IntOpt('max_channels',
+               default=4,
+               min=1,
+               help='Maximum number of commands running concurrently on '
+                    'one SSH connection, each on its own channel.'),
+    cfg.IntOpt('idle_timeout',
+               default=300,
+               min=0,
+               help='Seconds after which an idle SSH connection is closed, '
+                    '0 means idle connections are never closed.'),
+]
+
+CONF.register_opts(ssh_opts, group='ssh')
+
+
+def get_max_connections(host):
+    return int(CONF.ssh.max_connections_per_host.get(
+        host, CONF.ssh.max_connections))
 
 
 class SSHClient(object):
@@ -147,7 +184,8 @@ class SSHPool(pools.Pool):
         self.conn_timeout = self.SOCKET_TIMEOUT
         if self.ssh_conn_timeout is None:
             self.ssh_conn_timeout = SSHPool.SOCKET_TIMEOUT
-        super(SSHPool, self).__init__(min_size=0, max_size=3)
+        super(SSHPool, self).__init__(
+            min_size=0, max_size=get_max_connections(self.ssh_host))
 
     def set_host_key(self, host_key, ssh):
         """
@@ -239,3 +277,214 @@ class SSHPool(pools.Pool):
             self.current_size -= 1
             return
         super(SSHPool, self).put(conn)
+
+
+class _SSHConnection(object):
+    """An SSH connection and the number of channels running on it.
+
+    The connection is reserved before it is opened, its ssh client being
+    None until then.
+    """
+
+    def __init__(self, ssh=None):
+        self.ssh = ssh
+        self.active_channels = 0
+        self.last_used = time.time()
+        self.opened = event.Event()
+        if ssh is not None:
+            self.opened.send()
+
+    def is_active(self):
+        if self.ssh is None:
+            # Being opened
+            return True
+        transport = self.ssh.get_transport()
+        return transport is not None and transport.is_active()
+
+    def close(self):
+        if self.ssh is not None:
+            self.ssh.close()
+
+
+class SSHExecutor(object):
+    """Run commands concurrently over pooled SSH connections to one host.
+
+    Each connection multiplexes up to ``[ssh]/max_channels`` commands, each
+    running on its own channel of the same transport. Connections are
+    created on demand up to the per host limit and closed when idle for
+    ``[ssh]/idle_timeout`` seconds.
+    """
+
+    def __init__(self, **kwargs):
+        # SSHPool knows how to open a connection with the access info
+        self.ssh_pool = SSHPool(**kwargs)
+        self.ssh_host = self.ssh_pool.ssh_host
+        self.max_connections = get_max_connections(self.ssh_host)
+        self.max_channels = CONF.ssh.max_channels
+        self.idle_timeout = CONF.ssh.idle_timeout
+        self.credentials = _get_credentials(kwargs['ssh'])
+        self.connections = []
+        self.metrics = collections.Counter()
+        self._lock = threading.Lock()
+        self._channels = threading.Semaphore(
+            self.max_connections * self.max_channels)
+
+    def execute(self, command_str):
+        """Run one command and return its output."""
+        with self._channels:
+            conn = self._acquire()
+            start = time.time()
+            try:
+                result = self._exec_command(conn, command_str)
+            except Exception:
+                self.metrics['failures'] += 1
+                raise
+            finally:
+                self._release(conn)
+                self.metrics['commands'] += 1
+                self.metrics['command_seconds'] += time.time() - start
+        return result
+
+    def execute_all(self, commands):
+        """Run commands concurrently and return outputs in order."""
+        pool = greenpool.GreenPool(self.max_connections * self.max_channels)
+        return list(pool.imap(self.execute, commands))
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['connections'] = len(self.connections)
+        metrics['active_channels'] = sum(
+            conn.active_channels for conn in self.connections)
+        return metrics
+
+    def evict_idle(self):
+        """Close connections idle for longer than the idle timeout."""
+        with self._lock:
+            self._evict_idle()
+
+    def close(self):
+        with self._lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+
+    def _evict_idle(self):
+        now = time.time()
+        for conn in list(self.connections):
+            if conn.active_channels:
+                continue
+            if not conn.is_active() or (
+                    self.idle_timeout and
+                    now - conn.last_used > self.idle_timeout):
+                conn.close()
+                self.connections.remove(conn)
+                self.metrics['connections_evicted'] += 1
+
+    def _acquire(self):
+        with self._lock:
+            self._evict_idle()
+            # Dead connections are dropped so that they give their place
+            # to new ones, they are closed when their channels are done
+            self.connections = [conn for conn in self.connections
+                                if conn.active_channels == 0 or
+                                conn.is_active()]
+            candidates = [conn for conn in self.connections
+                          if conn.active_channels < self.max_channels]
+            if candidates:
+                conn = min(candidates, key=lambda c: c.active_channels)
+            else:
+                # Reserved here and opened out of the lock, so that other
+                # commands are not blocked while the connection is opened
+                conn = _SSHConnection()
+                self.connections.append(conn)
+            conn.active_channels += 1
+        if not candidates:
+            return self._open(conn)
+        # Wait for the connection if it is still being opened by another
+        # command, raising its error if it could not be opened
+        conn.opened.wait()
+        return conn
+
+    def _open(self, conn):
+        try:
+            ssh = self.ssh_pool.create()
+        except Exception as e:
+            with self._lock:
+                self.connections.remove(conn)
+            conn.opened.send_exception(e)
+            raise
+        conn.ssh = ssh
+        self.metrics['connections_created'] += 1
+        conn.opened.send()
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            conn.active_channels -= 1
+            conn.last_used = time.time()
+            if conn not in self.connections and not conn.active_channels:
+                conn.close()
+
+    @staticmethod
+    def _exec_command(conn, command_str):
+        try:
+            stdin, stdout, stderr = conn.ssh.exec_command(command_str)
+            res, err = stdout.read(), stderr.read()
+            re = res if res else err
+            return re.decode()
+        except paramiko.AuthenticationException as ae:
+            LOG.error('doexec Authentication error:{}'.format(ae))
+            raise exception.InvalidUsernameOrPassword()
+        except Exception as e:
+            err = six.text_type(e)
+            LOG.error('doexec error:{}'.format(err))
+            if 'timed out' in err:
+                raise exception.SSHConnectTimeout()
+            raise exception.SSHException(err)
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_credentials(ssh_access):
+    return (ssh_access.get('username'), ssh_access.get('password'),
+            ssh_access.get('pub_key'))
+
+
+def get_ssh_executor(**kwargs):
+    """Get the executor shared by all users of the same storage and host.
+
+    The executor is replaced when the credentials of the access info have
+    changed.
+    """
+    ssh_access = kwargs.get('ssh')
+    if ssh_access is None:
+        raise exception.InvalidInput('Input ssh_access is missing')
+    key = (kwargs.get('storage_id'), ssh_access.get('host'),
+           ssh_access.get('port'))
+    credentials = _get_credentials(ssh_access)
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is not None and executor.credentials != credentials:
+            executor.close()
+            executor = None
+        if executor is None:
+            executor = SSHExecutor(**kwargs)
+            _executors[key] = executor
+        return executor
+
+
+def remove_ssh_executors(storage_id):
+    """Close and drop the executors of a storage."""
+    with _executors_lock:
+        for key in [key for key in _executors if key[0] == storage_id]:
+            _executors.pop(key).close()
+
+
+def evict_idle_connections():
+    """Close idle connections of all executors."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    for executor in executors:
+        executor.evict_idle()
@@ -13,12 +13,19 @@
 # limitations under the License.
 
 
+import collections
+import os
+import time
+
+import eventlet
+from eventlet import queue
 from oslo_config import cfg
 from oslo_log import log
 import six
 from stevedore import extension
 
 from delfin import exception
+from delfin import utils
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
@@ -30,6 +37,36 @@ exporter_opts = [
     cfg.ListOpt('performance_exporters',
                 default=['PerformanceExporterExample'],
                 help="Which exporters for performance push."),
+    cfg.IntOpt('exporter_queue_size',
+               default=10000,
+               min=1,
+               help='Maximum number of data items waiting to be pushed by '
+                    'each exporter. The oldest one is dropped when it is '
+                    'exceeded.'),
+    cfg.IntOpt('exporter_batch_size',
+               default=100,
+               min=1,
+               help='Maximum number of data items pushed by an exporter at '
+                    'a time.'),
+    cfg.FloatOpt('exporter_batch_interval',
+                 default=1.0,
+                 min=0,
+                 help='Seconds an exporter waits for more data items before '
+                      'pushing less than exporter_batch_size of them.'),
+    cfg.IntOpt('exporter_max_retries',
+               default=3,
+               min=0,
+               help='Number of retries of a failed push before the data '
+                    'items are dropped.'),
+    cfg.FloatOpt('exporter_retry_interval',
+                 default=1.0,
+                 min=0,
+                 help='Seconds before the first retry of a failed push, '
+                      'doubled for each next retry.'),
+    cfg.FloatOpt('exporter_retry_max_interval',
+                 default=60.0,
+                 min=0,
+                 help='Maximum seconds between retries of a failed push.'),
 ]
 
 CONF = cfg.CONF
@@ -48,23 +85,141 @@ class BaseExporter(object):
         raise NotImplementedError()
 
 
-class BaseManager(BaseExporter):
-    def __init__(self, namespace):
-        self.extension_manager = extension.ExtensionManager(namespace)
-        self.exporters = self._get_exporters()
+class ExporterQueue(object):
+    """Push data to an exporter in batches from a queue of its own.
 
-    def dispatch(self, ctxt, data):
-        if not isinstance(data, (list, tuple)):
-            data = [data]
-        for exporter in self.exporters:
+    Data is queued without waiting for the exporter, so a slow or dead
+    exporter holds up neither the caller nor the other exporters.
+    """
+
+    def __init__(self, exporter, queue_size, batch_size, batch_interval,
+                 max_retries, retry_interval, retry_max_interval):
+        self.exporter = exporter
+        self.name = exporter.__class__.__name__
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.retry_max_interval = retry_max_interval
+        self.queue = queue.LightQueue(queue_size)
+        self.metrics = collections.Counter()
+        self.max_batch_latency = 0
+        self.worker = None
+        self.worker_pid = None
+
+    def start(self):
+        """Start the worker in the current process, once.
+
+        Greenthreads spawned before the service forks never run in the
+        forked processes, so the worker is started where data is pushed.
+        """
+        if self.worker_pid == os.getpid():
+            return
+        self.worker_pid = os.getpid()
+        self.worker = eventlet.spawn(self._work)
+
+    def put(self, ctxt, data):
+        self.start()
+        for item in data:
+            try:
+                self.queue.put_nowait((ctxt, item, time.time()))
+            except queue.Full:
+                self.queue.get_nowait()
+                self.metrics['dropped'] += 1
+                self.queue.put_nowait((ctxt, item, time.time()))
+            self.metrics['queued'] += 1
+
+    def _get_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
             try:
-                exporter.dispatch(ctxt, data)
+                if timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _push(self, ctxt, data):
+        """Push data to the exporter, retrying with exponential backoff."""
+        for retry in range(self.max_retries + 1):
+            if retry:
+                self.metrics['retries'] += 1
+                eventlet.sleep(min(self.retry_interval * 2 ** (retry - 1),
+                                   self.retry_max_interval))
+            try:
+                self.exporter.dispatch(ctxt, data)
+                return True
             except exception.DelfinException as e:
                 err_msg = _("Failed to export data (%s).") % e.msg
                 LOG.exception(err_msg)
             except Exception as e:
                 err_msg = six.text_type(e)
                 LOG.exception(err_msg)
+            self.metrics['failures'] += 1
+        return False
+
+    def _work(self):
+        while True:
+            batch = self._get_batch()
+            # Data of a batch is pushed with the context it is first queued
+            ctxt = batch[0][0]
+            data = [item for __, item, __ in batch]
+            if not self._push(ctxt, data):
+                self.metrics['dropped'] += len(data)
+                LOG.error('Dropping %s data items failed to be pushed by '
+                          '%s.', len(data), self.name)
+                continue
+            latency = time.time() - batch[0][2]
+            self.metrics['batches'] += 1
+            self.metrics['pushed'] += len(data)
+            self.metrics['batch_latency_seconds'] += latency
+            self.max_batch_latency = max(self.max_batch_latency, latency)
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['queue_depth'] = self.queue.qsize()
+        metrics['max_batch_latency_seconds'] = self.max_batch_latency
+        if self.metrics['batches']:
+            metrics['avg_batch_latency_seconds'] = (
+                self.metrics['batch_latency_seconds'] /
+                self.metrics['batches'])
+        return metrics
+
+
+@six.add_metaclass(utils.Singleton)
+class BaseManager(BaseExporter):
+    def __init__(self, namespace):
+        self.extension_manager = extension.ExtensionManager(namespace)
+        self.exporters = self._get_exporters()
+        self.exporter_queues = [
+            ExporterQueue(exporter, CONF.exporter_queue_size,
+                          CONF.exporter_batch_size,
+                          CONF.exporter_batch_interval,
+                          CONF.exporter_max_retries,
+                          CONF.exporter_retry_interval,
+                          CONF.exporter_retry_max_interval)
+            for exporter in self.exporters]
+
+    def start(self):
+        """Start the workers of exporters in the current process."""
+        for exporter_queue in self.exporter_queues:
+            exporter_queue.start()
+
+    def dispatch(self, ctxt, data):
+        """Queue data to be pushed by each exporter without waiting."""
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        for exporter_queue in self.exporter_queues:
+            exporter_queue.put(ctxt, data)
+
+    def get_metrics(self):
+        """Return queue depth, batch latency and counters of exporters."""
+        return dict((exporter_queue.name, exporter_queue.get_metrics())
+                    for exporter_queue in self.exporter_queues)
 
     def _get_exporters(self):
         """Get exporters from configuration file which
@@ -105,6 +105,13 @@ class Manager(base.Base, PeriodicTasks):
         """
         pass
 
+    def cleanup_host(self):
+        """Hook to do cleanup work when the service shuts down.
+
+        Child classes should override this method.
+        """
+        pass
+
     def service_version(self, context):
         return version.version_string()
 
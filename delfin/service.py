@@ -68,6 +68,13 @@ service_opts = [
     cfg.PortOpt('trap_receiver_port',
                 default=162,
                 help='Port at which trap receiver listens.'),
+    cfg.IntOpt('trap_receiver_workers',
+               default=1,
+               min=1,
+               help='Number of trap receiver processes of Delfin alert '
+                    'service. More than one process share '
+                    'trap_receiver_port with SO_REUSEPORT, each loading '
+                    'the snmp config and receiving its changes.'),
 ]
 
 CONF = cfg.CONF
@@ -180,6 +187,10 @@ class Service(service.Service):
         self.stop()
 
     def stop(self):
+        try:
+            self.manager.cleanup_host()
+        except Exception:
+            LOG.exception('Service error occurred during cleanup_host')
         # Try to shut the connection down, but if we get any sort of
         # errors, go ahead and ignore them.. as we're shutting down anyway
         try:
@@ -0,0 +1,151 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+
+**bounded executor of the tasks received by task manager**
+
+"""
+
+import collections
+import time
+
+import eventlet
+from eventlet import queue
+from eventlet import semaphore
+from oslo_config import cfg
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+executor_opts = [
+    cfg.IntOpt('sync_task_workers',
+               default=32,
+               min=1,
+               help='Number of resource sync tasks run at the same time by '
+                    'one task node.'),
+    cfg.IntOpt('alert_task_workers',
+               default=16,
+               min=1,
+               help='Number of alert sync tasks run at the same time by '
+                    'one task node.'),
+    cfg.IntOpt('remove_task_workers',
+               default=8,
+               min=1,
+               help='Number of resource removal tasks run at the same time '
+                    'by one task node.'),
+    cfg.IntOpt('task_queue_size',
+               default=1000,
+               min=1,
+               help='Maximum number of tasks waiting in each executor of '
+                    'one task node. When the queue is full, receiving '
+                    'new tasks is blocked until a task is started.'),
+    cfg.IntOpt('task_vendor_max_concurrent',
+               default=0,
+               min=0,
+               help='Maximum number of sync tasks of storages of one vendor '
+                    'run at the same time by each executor of one task '
+                    'node. 0 means no limit.'),
+    cfg.DictOpt('task_vendor_limits',
+                default={},
+                help='Maximum number of sync tasks of storages of specific '
+                     'vendors run at the same time by each executor of one '
+                     'task node, overriding task_vendor_max_concurrent, '
+                     'e.g. "dell_emc:10,hpe:5".'),
+]
+
+CONF.register_opts(executor_opts)
+
+Task = collections.namedtuple('Task', ['vendor', 'func', 'args', 'kwargs',
+                                       'queued_at'])
+
+
+class TaskExecutor(object):
+    """Run tasks in a fixed number of workers with a bounded queue.
+
+    Tasks of a vendor at its concurrency limit are held back, without
+    blocking the worker, until a task of the same vendor ends.
+    """
+
+    def __init__(self, name, workers, queue_size, vendor_limits=None,
+                 vendor_max_concurrent=0):
+        self.name = name
+        self.vendor_limits = vendor_limits or {}
+        self.vendor_max_concurrent = vendor_max_concurrent
+        # Taken by each task until it is started, bounding waiting tasks
+        self.slots = semaphore.Semaphore(queue_size)
+        self.queue = queue.LightQueue()
+        self.held = collections.defaultdict(collections.deque)
+        self.running = collections.Counter()
+        self.metrics = collections.Counter()
+        self.max_wait_seconds = 0
+        self.workers = [eventlet.spawn(self._work) for __ in range(workers)]
+
+    def _get_vendor_limit(self, vendor):
+        if vendor is None:
+            return 0
+        return int(self.vendor_limits.get(vendor,
+                                          self.vendor_max_concurrent))
+
+    def submit(self, vendor, func, *args, **kwargs):
+        """Queue a task, blocking while the queue is full.
+
+        :param vendor: vendor of the storage the task is for, or None
+        """
+        self.slots.acquire()
+        self.queue.put(Task(vendor, func, args, kwargs, time.time()))
+        self.metrics['submitted'] += 1
+
+    def _work(self):
+        while True:
+            task = self.queue.get()
+            vendor_limit = self._get_vendor_limit(task.vendor)
+            if vendor_limit and self.running[task.vendor] >= vendor_limit:
+                self.held[task.vendor].append(task)
+                continue
+            while task:
+                task = self._run(task)
+
+    def _run(self, task):
+        """Run a task and return the next held task of its vendor."""
+        self.slots.release()
+        self.metrics['started'] += 1
+        wait_seconds = time.time() - task.queued_at
+        self.metrics['wait_seconds'] += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.running[task.vendor] += 1
+        try:
+            task.func(*task.args, **task.kwargs)
+        except Exception as e:
+            self.metrics['failed'] += 1
+            LOG.error('Failed to run task %s in %s executor: %s',
+                      getattr(task.func, '__name__', task.func),
+                      self.name, e)
+        finally:
+            self.running[task.vendor] -= 1
+            self.metrics['completed'] += 1
+        if self.held[task.vendor]:
+            return self.held[task.vendor].popleft()
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['queue_depth'] = (self.queue.qsize() +
+                                  sum(len(held) for held in
+                                      self.held.values()))
+        metrics['running'] = sum(self.running.values())
+        metrics['max_wait_seconds'] = self.max_wait_seconds
+        if self.metrics['started']:
+            metrics['avg_wait_seconds'] = (self.metrics['wait_seconds'] /
+                                           self.metrics['started'])
+        return metrics
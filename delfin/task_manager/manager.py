@@ -17,39 +17,229 @@
 
 """
 
+import collections
+import math
+import random
+
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
+from oslo_service import periodic_task
 from oslo_utils import importutils
+from oslo_utils import timeutils
 
+from delfin import coordination
+from delfin import db
+from delfin import exception
 from delfin import manager
+from delfin.common import constants
 from delfin.drivers import manager as driver_manager
+from delfin.drivers.utils import ssh_client
+from delfin.task_manager import executor
+from delfin.task_manager import rpcapi as task_rpcapi
 from delfin.task_manager.tasks import alerts
+from delfin.task_manager.tasks import resources
 
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 CONF.import_opt('periodic_interval', 'delfin.service')
 
+task_manager_opts = [
+    cfg.IntOpt('resource_sync_interval',
+               default=0,
+               min=0,
+               help='Seconds between two periodic resource syncs of one '
+                    'storage. The syncs of all storages are spread over '
+                    'this interval. 0 disables periodic resource sync.'),
+    cfg.IntOpt('resource_sync_vendor_max_concurrent',
+               default=0,
+               min=0,
+               help='Maximum number of storages of one vendor synced by '
+                    'the periodic resource sync at the same time. 0 means '
+                    'no limit.'),
+    cfg.DictOpt('resource_sync_vendor_limits',
+                default={},
+                help='Maximum number of storages of specific vendors '
+                     'synced by the periodic resource sync at the same '
+                     'time, overriding resource_sync_vendor_max_concurrent, '
+                     'e.g. "dell_emc:10,hpe:5".'),
+]
+
+CONF.register_opts(task_manager_opts)
+
 
 class TaskManager(manager.Manager):
     """manage periodical tasks"""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
 
     def __init__(self, service_name=None, *args, **kwargs):
         self.alert_task = alerts.AlertSyncTask()
+        self.task_rpcapi = task_rpcapi.TaskAPI()
+        # Tasks received are run by bounded executors, so that casting
+        # many tasks does not start all of them at once
+        self.executors = {
+            'sync': executor.TaskExecutor(
+                'sync', CONF.sync_task_workers, CONF.task_queue_size,
+                CONF.task_vendor_limits, CONF.task_vendor_max_concurrent),
+            'alert': executor.TaskExecutor(
+                'alert', CONF.alert_task_workers, CONF.task_queue_size,
+                CONF.task_vendor_limits, CONF.task_vendor_max_concurrent),
+            'remove': executor.TaskExecutor(
+                'remove', CONF.remove_task_workers, CONF.task_queue_size),
+        }
         super(TaskManager, self).__init__(*args, **kwargs)
 
+    def init_host(self):
+        """Join the task node group to take a share of the storages."""
+        coordination.LOCK_COORDINATOR.join_group(CONF.delfin_task_topic,
+                                                 self.host.encode('utf-8'))
+
+    def cleanup_host(self):
+        """Leave the task node group, so that the storages of this node
+        are owned by the other nodes at once instead of once its membership
+        expires.
+        """
+        try:
+            coordination.LOCK_COORDINATOR.leave_group(CONF.delfin_task_topic)
+        except Exception as e:
+            LOG.warning('Failed to leave the task node group: %s', e)
+
+    @periodic_task.periodic_task
+    def schedule_resource_sync(self, context):
+        """Start resource sync of the storages synced least recently.
+
+        Only the share of storages due in one periodic interval is started
+        on each run, each after a random delay within the periodic
+        interval, so that syncs are spread over the resource sync interval.
+        """
+        sync_interval = CONF.resource_sync_interval
+        if sync_interval <= 0:
+            return
+
+        # Each task node only schedules the storages it owns
+        storages = [storage for storage in db.storage_get_all(context)
+                    if self.task_rpcapi.get_owner(storage['id'])
+                    in (None, self.host)]
+        sync_runs = collections.defaultdict(list)
+        for sync_run in db.sync_run_get_all(context):
+            sync_runs[sync_run['storage_id']].append(sync_run)
+        now = timeutils.utcnow()
+        syncing = collections.Counter()
+        due_storages = []
+        for storage in storages:
+            runs = sync_runs[storage['id']]
+            if any(resources.is_sync_running(run, now) for run in runs):
+                syncing[storage['vendor']] += 1
+                continue
+            last_sync = max([run['started_at'] for run in runs] or
+                            [storage['created_at']])
+            if (now - last_sync).total_seconds() >= sync_interval:
+                due_storages.append((last_sync, storage))
+        # Oldest first
+        due_storages.sort(key=lambda due: due[0])
+
+        budget = int(math.ceil(
+            len(storages) * CONF.periodic_interval / float(sync_interval)))
+        for __, storage in due_storages:
+            if budget <= 0:
+                break
+            vendor = storage['vendor']
+            vendor_limit = int(CONF.resource_sync_vendor_limits.get(
+                vendor, CONF.resource_sync_vendor_max_concurrent))
+            if vendor_limit and syncing[vendor] >= vendor_limit:
+                continue
+            try:
+                resource_tasks = resources.start_sync(context, storage['id'])
+            except exception.StorageIsSyncing as e:
+                LOG.warning('Can not start periodic sync task for %s, '
+                            'reason is %s', storage['id'], e.msg)
+                continue
+            syncing[vendor] += 1
+            budget -= 1
+            eventlet.spawn_after(random.uniform(0, CONF.periodic_interval),
+                                 self._sync_storage, context, storage['id'],
+                                 resource_tasks)
+
+    def _sync_storage(self, context, storage_id, resource_tasks):
+        LOG.info('Periodic resource sync for storage id:{0}'
+                 .format(storage_id))
+        self.task_rpcapi.sync_storage(
+            context, storage_id,
+            [task.resource_type for task in resource_tasks])
+
+    @periodic_task.periodic_task
+    def evict_idle_ssh_connections(self, context):
+        """Close SSH connections to storages idle for too long."""
+        ssh_client.evict_idle_connections()
+
+    @periodic_task.periodic_task
+    def report_executor_metrics(self, context):
+        for name, task_executor in self.executors.items():
+            LOG.info('Metrics of %s task executor: %s', name,
+                     task_executor.get_metrics())
+
+    def get_executor_metrics(self, context):
+        """Return queue depth, wait time and counters of each executor."""
+        return dict((name, task_executor.get_metrics())
+                    for name, task_executor in self.executors.items())
+
+    @staticmethod
+    def _get_vendor(context, storage_id):
+        try:
+            return db.storage_get(context, storage_id)['vendor']
+        except exception.StorageNotFound:
+            return None
+
+    def sync_storage(self, context, storage_id, resource_types):
+        LOG.debug("Received the sync_storage request of {0} for storage"
+                  " id:{1}".format(resource_types, storage_id))
+        self.executors['sync'].submit(
+            self._get_vendor(context, storage_id), resources.sync_storage,
+            context, storage_id, resource_types)
+
     def sync_storage_resource(self, context, storage_id, resource_task):
         LOG.debug("Received the sync_storage task: {0} request for storage"
                   " id:{1}".format(resource_task, storage_id))
         cls = importutils.import_class(resource_task)
         device_obj = cls(context, storage_id)
-        device_obj.sync()
+        self.executors['sync'].submit(self._get_vendor(context, storage_id),
+                                      device_obj.sync)
 
     def remove_storage_resource(self, context, storage_id, resource_task):
         cls = importutils.import_class(resource_task)
         device_obj = cls(context, storage_id)
-        device_obj.remove()
+        self.executors['remove'].submit(None, device_obj.remove)
+
+    def remove_storage(self, context, storage_id):
+        LOG.info('Remove storage called for storage id:{0}'
+                 .format(storage_id))
+        self.executors['remove'].submit(None, resources.remove_storage,
+                                        context, storage_id)
+
+    @periodic_task.periodic_task
+    def resume_storage_removals(self, context):
+        """Resume the storage removals making no progress.
+
+        A removal is lost when its task node stopped before it ended.
+        """
+        now = timeutils.utcnow()
+        for removal in db.storage_removal_get_all(
+                context, constants.StorageRemovalStatus.REMOVING):
+            storage_id = removal['storage_id']
+            if self.task_rpcapi.get_owner(storage_id) not in (None,
+                                                              self.host):
+                continue
+            last_progress = removal['updated_at'] or removal['created_at']
+            if (now - last_progress).total_seconds() < \
+                    CONF.storage_removal_expiration:
+                continue
+            LOG.info('Resume removing storage id:{0}'.format(storage_id))
+            # Mark it in progress so that it is not resumed again meanwhile
+            db.storage_removal_update(context, storage_id,
+                                      {'status': removal['status']})
+            self.executors['remove'].submit(None, resources.remove_storage,
+                                            context, storage_id)
 
     def remove_storage_in_cache(self, context, storage_id):
         LOG.info('Remove storage device in memory for storage id:{0}'
@@ -60,7 +250,9 @@ class TaskManager(manager.Manager):
     def sync_storage_alerts(self, context, storage_id, query_para):
         LOG.info('Alert sync called for storage id:{0}'
                  .format(storage_id))
-        self.alert_task.sync_alerts(context, storage_id, query_para)
+        self.executors['alert'].submit(
+            self._get_vendor(context, storage_id), self.alert_task.sync_alerts,
+            context, storage_id, query_para)
 
     def clear_storage_alerts(self, context, storage_id, sequence_number_list):
         LOG.info('Clear alerts called for storage id: {0}'
@@ -19,6 +19,7 @@ Client side of the task manager RPC API.
 import oslo_messaging as messaging
 from oslo_config import cfg
 
+from delfin import coordination
 from delfin import rpc
 
 CONF = cfg.CONF
@@ -30,18 +31,42 @@ class TaskAPI(object):
     API version history:
 
         1.0 - Initial version.
+        1.1 - Add sync_storage.
+        1.2 - Add get_executor_metrics.
+        1.3 - Add remove_storage.
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
 
     def __init__(self):
         super(TaskAPI, self).__init__()
         target = messaging.Target(topic=CONF.delfin_task_topic,
                                   version=self.RPC_API_VERSION)
         self.client = rpc.get_client(target, version_cap=self.RPC_API_VERSION)
+        self.ring = coordination.ConsistentHashRing(CONF.delfin_task_topic)
+
+    def get_owner(self, storage_id):
+        """Return the host of the task node owning the storage."""
+        return self.ring.get_host(storage_id)
+
+    def _prepare_for_storage(self, storage_id, version='1.0', **kwargs):
+        # Route to the owner of the storage so that its driver, cached in
+        # the owner's driver manager, is reused. Any node may take the
+        # message when no owner is known.
+        owner = self.get_owner(storage_id)
+        if owner:
+            kwargs['server'] = owner
+        return self.client.prepare(version=version, **kwargs)
+
+    def sync_storage(self, context, storage_id, resource_types):
+        call_context = self._prepare_for_storage(storage_id, version='1.1')
+        return call_context.cast(context,
+                                 'sync_storage',
+                                 storage_id=storage_id,
+                                 resource_types=resource_types)
 
     def sync_storage_resource(self, context, storage_id, resource_task):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare_for_storage(storage_id)
         return call_context.cast(context,
                                  'sync_storage_resource',
                                  storage_id=storage_id,
@@ -54,6 +79,12 @@ class TaskAPI(object):
                                  storage_id=storage_id,
                                  resource_task=resource_task)
 
+    def remove_storage(self, context, storage_id):
+        call_context = self._prepare_for_storage(storage_id, version='1.3')
+        return call_context.cast(context,
+                                 'remove_storage',
+                                 storage_id=storage_id)
+
     def remove_storage_in_cache(self, context, storage_id):
         call_context = self.client.prepare(version='1.0', fanout=True)
         return call_context.cast(context,
@@ -61,15 +92,19 @@ class TaskAPI(object):
                                  storage_id=storage_id)
 
     def sync_storage_alerts(self, context, storage_id, query_para):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare_for_storage(storage_id)
         return call_context.cast(context,
                                  'sync_storage_alerts',
                                  storage_id=storage_id,
                                  query_para=query_para)
 
     def clear_storage_alerts(self, context, storage_id, sequence_number_list):
-        call_context = self.client.prepare(version='1.0')
+        call_context = self._prepare_for_storage(storage_id)
         return call_context.call(context,
                                  'clear_storage_alerts',
                                  storage_id=storage_id,
                                  sequence_number_list=sequence_number_list)
+
+    def get_executor_metrics(self, context, host):
+        call_context = self.client.prepare(version='1.2', server=host)
+        return call_context.call(context, 'get_executor_metrics')
@@ -13,18 +13,54 @@
 # limitations under the License.
 
 import inspect
+import time
 
 import decorator
+import eventlet
+from eventlet import event
+from eventlet import greenpool
+from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 
-from delfin import coordination
 from delfin import db
 from delfin import exception
 from delfin.common import constants
+from delfin.common import resource_diff
 from delfin.drivers import api as driverapi
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+
+def is_sync_running(sync_run, now=None):
+    """Whether a sync run is running and not expired yet."""
+    # A run started more than CONF.sync_task_expiration seconds ago is
+    # considered lost, e.g. the task node was restarted
+    now = now or timeutils.utcnow()
+    return sync_run['status'] == constants.SyncRunStatus.SYNCING and \
+        (now - sync_run['started_at']).total_seconds() < \
+        CONF.sync_task_expiration
+
+
+def start_sync(context, storage_id):
+    """Start the sync runs of the resources of a storage.
+
+    Each type of resources is started by one conditional update of its sync
+    run, so the resources still being synced by a previous request are
+    skipped.
+
+    :return: the resource task classes to run
+    :raises StorageIsSyncing: if all the resources are still being synced
+    """
+    resource_tasks = [
+        task for task in StorageResourceTask.__subclasses__()
+        if db.sync_run_start(context, storage_id, task.resource_type,
+                             CONF.sync_task_expiration)]
+    if not resource_tasks:
+        raise exception.StorageIsSyncing(storage_id)
+    return resource_tasks
 
 
 def set_synced_after():
@@ -32,27 +68,15 @@ def set_synced_after():
     def _set_synced_after(func, *args, **kwargs):
         call_args = inspect.getcallargs(func, *args, **kwargs)
         self = call_args['self']
-        sync_result = constants.ResourceSync.SUCCEED
+        sync_result = constants.SyncRunStatus.SUCCEEDED
         ret = None
+        start = time.time()
         try:
             ret = func(*args, **kwargs)
         except Exception:
-            sync_result = constants.ResourceSync.FAILED
-        lock = coordination.Lock(self.storage_id)
-        with lock:
-            try:
-                storage = db.storage_get(self.context, self.storage_id)
-            except exception.StorageNotFound:
-                LOG.warn('Storage %s not found when set synced'
-                         % self.storage_id)
-            else:
-                # One sync task done, sync status minus 1
-                # When sync status get to 0
-                # means all the sync tasks are completed
-                if storage['sync_status'] != constants.SyncStatus.SYNCED:
-                    storage['sync_status'] -= sync_result
-                    db.storage_update(self.context, self.storage_id, storage)
-
+            sync_result = constants.SyncRunStatus.FAILED
+        db.sync_run_end(self.context, self.storage_id, self.resource_type,
+                        sync_result, time.time() - start)
         return ret
 
     return _set_synced_after
@@ -74,7 +98,8 @@ def check_deleted():
                       % self.storage_id)
         else:
             self.remove()
-        self.context.read_deleted = 'no'
+        finally:
+            self.context.read_deleted = 'no'
         return ret
 
     return _check_deleted
@@ -91,30 +116,126 @@ class StorageResourceTask(object):
         """
         :param storage_resources:
         :param db_resources:
-        :return: it will return three list add_list: the items present in
+        :return: it will return four list add_list: the items present in
         storage but not in current_db. update_list:the items present in
-        storage and in current_db. delete_id_list:the items present not in
-        storage but present in current_db.
+        storage and in current_db with a changed hash, holding all the
+        fields reported by storage. delete_id_list:the
+        items present not in storage but present in current_db.
+        unchanged_id_list: the items present in storage and in current_db
+        without any change, which need no update.
         """
-        original_ids_in_db = [resource[key]
-                              for resource in db_resources]
-        delete_id_list = [resource['id'] for resource in db_resources]
-        add_list = []
-        update_list = []
-
-        for resource in storage_resources:
-            if resource[key] in original_ids_in_db:
-                resource['id'] = db_resources[original_ids_in_db.index(
-                    resource[key])]['id']
-                delete_id_list.remove(resource['id'])
-                update_list.append(resource)
-            else:
-                add_list.append(resource)
+        return resource_diff.classify_resources(storage_resources,
+                                                db_resources, key)
+
+    def _remove_by_batch(self, delete_func):
+        """Delete the resources of the storage in bounded batches.
+
+        Each batch is deleted in its own short transaction and the removal
+        progress is recorded after it, yielding between batches so that
+        concurrent syncs are not stalled.
+
+        :param delete_func: function deleting at most limit resources of
+            a storage and returning the number deleted
+        """
+        batch_size = CONF.storage_removal_batch_size
+        removed_count = 0
+        while True:
+            count = delete_func(self.context, self.storage_id,
+                                limit=batch_size)
+            removed_count += count
+            if count:
+                LOG.info('Removed {0} {1} of storage id:{2}'.format(
+                    removed_count, self.resource_type, self.storage_id))
+                db.storage_removal_update(
+                    self.context, self.storage_id,
+                    {'resource_type': self.resource_type,
+                     'removed_count': removed_count})
+            if count < batch_size:
+                return removed_count
+            eventlet.sleep(0)
+
+    def _sync_resources(self, storage_resources, db_hashes_func, key,
+                        create_func, update_func, delete_func):
+        """
+        :param storage_resources: list of resources from driver
+        :param db_hashes_func: db function to get the ids, native keys and
+        hashes of the resources of this storage in db
+        :param key: the native key identifying a resource
+        :param create_func: db function to create resources
+        :param update_func: db function to update resources
+        :param delete_func: db function to delete resources
+        :return: the number of added, updated, deleted and unchanged
+        resources. Nothing is read from or written to db when the digest of
+        the resources is the same as the one saved by the last sync.
+        """
+        digest = resource_diff.get_resources_digest(
+            resource_diff.hash_resources(storage_resources, key))
+        if digest == db.storage_resource_hash_get(self.context,
+                                                  self.storage_id,
+                                                  self.resource_type):
+            return 0, 0, 0, len(storage_resources)
+
+        db_resources = db_hashes_func(self.context, self.storage_id)
+        add_list, update_list, delete_id_list, unchanged_id_list = \
+            self._classify_resources(storage_resources, db_resources, key)
+
+        if delete_id_list:
+            delete_func(self.context, delete_id_list)
+
+        if update_list:
+            update_func(self.context, update_list)
+
+        if add_list:
+            create_func(self.context, add_list)
+
+        db.storage_resource_hash_update(self.context, self.storage_id,
+                                        self.resource_type, digest)
+        return len(add_list), len(update_list), len(delete_id_list), \
+            len(unchanged_id_list)
+
+    def _sync_resources_by_page(self, resource_pages, db_hashes_func, key,
+                                create_func, update_func, delete_func):
+        """
+        :param resource_pages: iterator of resource lists from driver
+        :param db_hashes_func: db function to get the ids, native keys and
+        hashes of the resources of this storage in db
+        :param key: the native key identifying a resource
+        :param create_func: db function to create resources
+        :param update_func: db function to update resources
+        :param delete_func: db function to delete resources
+        :return: the number of added, updated, deleted and unchanged
+        resources. Each page is classified and persisted before the next
+        page is got from driver, the resources not reported in any page
+        are deleted at last.
+        """
+        db_resources = db_hashes_func(self.context, self.storage_id)
+        differ = resource_diff.ResourceDiffer(db_resources, key)
+        add_count, update_count, unchanged_count = 0, 0, 0
+        for resources in resource_pages:
+            add_list, update_list, unchanged_id_list = differ.classify(
+                resources)
+            if update_list:
+                update_func(self.context, update_list)
+
+            if add_list:
+                create_func(self.context, add_list)
+            add_count += len(add_list)
+            update_count += len(update_list)
+            unchanged_count += len(unchanged_id_list)
+
+        delete_id_list = differ.get_deleted_ids()
+        if delete_id_list:
+            delete_func(self.context, delete_id_list)
 
-        return add_list, update_list, delete_id_list
+        db.storage_resource_hash_update(self.context, self.storage_id,
+                                        self.resource_type,
+                                        differ.get_digest())
+        return add_count, update_count, len(delete_id_list), unchanged_count
 
 
 class StorageDeviceTask(StorageResourceTask):
+    resource_type = 'storage'
+
     def __init__(self, context, storage_id):
         super(StorageDeviceTask, self).__init__(context, storage_id)
 
@@ -143,16 +264,20 @@ class StorageDeviceTask(StorageResourceTask):
         LOG.info('Remove storage device for storage id:{0}'
                  .format(self.storage_id))
         try:
-            db.storage_delete(self.context, self.storage_id)
-            db.access_info_delete(self.context, self.storage_id)
-            db.alert_source_delete(self.context, self.storage_id)
+            db.storage_remove(self.context, self.storage_id)
         except Exception as e:
             LOG.error('Failed to update storage entry in DB: {0}'.format(e))
+            # Left to be removed again while its removal is not ended
+            raise
 
 
 class StoragePoolTask(StorageResourceTask):
+    resource_type = 'storage_pools'
+
     def __init__(self, context, storage_id):
         super(StoragePoolTask, self).__init__(context, storage_id)
+        # Sent the storage pools listed from driver, or None if failed
+        self.pools_listed = event.Event()
 
     @check_deleted()
     @set_synced_after()
@@ -163,25 +288,10 @@ class StoragePoolTask(StorageResourceTask):
         LOG.info('Syncing storage pool for storage id:{0}'.format(
             self.storage_id))
         try:
-            # collect the storage pools list from driver and database
-            storage_pools = self.driver_api.list_storage_pools(self.context,
-                                                               self.storage_id)
-            db_pools = db.storage_pool_get_all(self.context,
-                                               filters={"storage_id":
-                                                        self.storage_id})
-
-            add_list, update_list, delete_id_list = self._classify_resources(
-                storage_pools, db_pools, 'native_storage_pool_id'
-            )
-
-            if delete_id_list:
-                db.storage_pools_delete(self.context, delete_id_list)
-
-            if update_list:
-                db.storage_pools_update(self.context, update_list)
-
-            if add_list:
-                db.storage_pools_create(self.context, add_list)
+            if CONF.sync_resource_by_page:
+                self._sync_by_page()
+            else:
+                self._sync()
         except Exception as e:
             msg = _('Failed to sync pools entry in DB: {0}'
                     .format(e))
@@ -189,16 +299,70 @@ class StoragePoolTask(StorageResourceTask):
             raise
         else:
             LOG.info("Syncing storage pools successful!!!")
+        finally:
+            self._set_pools_listed(None)
+
+    def _set_pools_listed(self, storage_pools):
+        # Only the first sync of a task shares its storage pools
+        if not self.pools_listed.ready():
+            self.pools_listed.send(storage_pools)
+
+    def _sync(self):
+        # collect the storage pools list from driver
+        storage_pools = self.driver_api.list_storage_pools(self.context,
+                                                           self.storage_id)
+        self._set_pools_listed(storage_pools)
+        self._sync_resources(storage_pools, db.storage_pool_get_all_hashes,
+                             'native_storage_pool_id',
+                             db.storage_pools_create,
+                             db.storage_pools_update,
+                             db.storage_pools_delete)
+
+    def _sync_by_page(self):
+        storage_pools = []
+
+        def storage_pool_pages():
+            # The next page is got before yielding one, so the storage pools
+            # are shared once the last page is got, not once it is saved
+            pages = iter(self.driver_api.iter_storage_pools(
+                self.context, self.storage_id))
+            storage_pool_page = next(pages, None)
+            while storage_pool_page is not None:
+                storage_pools.extend(storage_pool_page)
+                next_page = next(pages, None)
+                if next_page is None:
+                    self._set_pools_listed(storage_pools)
+                yield storage_pool_page
+                storage_pool_page = next_page
+            self._set_pools_listed(storage_pools)
+
+        self._sync_resources_by_page(storage_pool_pages(),
+                                     db.storage_pool_get_all_hashes,
+                                     'native_storage_pool_id',
+                                     db.storage_pools_create,
+                                     db.storage_pools_update,
+                                     db.storage_pools_delete)
 
     def remove(self):
         LOG.info('Remove storage pools for storage id:{0}'.format(
             self.storage_id))
-        db.storage_pool_delete_by_storage(self.context, self.storage_id)
+        self._remove_by_batch(db.storage_pool_delete_by_storage)
+        db.storage_resource_hash_delete(self.context, self.storage_id,
+                                        self.resource_type)
 
 
 class StorageVolumeTask(StorageResourceTask):
+    resource_type = 'volumes'
+
     def __init__(self, context, storage_id):
         super(StorageVolumeTask, self).__init__(context, storage_id)
+        # The pool task running in the same storage sync, if any
+        self.pool_task = None
+
+    def _get_storage_pools(self):
+        if self.pool_task is None:
+            return None
+        return self.pool_task.pools_listed.wait()
 
     @check_deleted()
     @set_synced_after()
@@ -208,29 +372,10 @@ class StorageVolumeTask(StorageResourceTask):
         """
         LOG.info('Syncing volumes for storage id:{0}'.format(self.storage_id))
         try:
-            # collect the volumes list from driver and database
-            storage_volumes = self.driver_api.list_volumes(self.context,
-                                                           self.storage_id)
-            db_volumes = db.volume_get_all(self.context,
-                                           filters={"storage_id":
-                                                    self.storage_id})
-
-            add_list, update_list, delete_id_list = self._classify_resources(
-                storage_volumes, db_volumes, 'native_volume_id'
-            )
-            LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
-                     'update={3}'.format(self.storage_id,
-                                         len(add_list),
-                                         len(delete_id_list),
-                                         len(update_list)))
-            if delete_id_list:
-                db.volumes_delete(self.context, delete_id_list)
-
-            if update_list:
-                db.volumes_update(self.context, update_list)
-
-            if add_list:
-                db.volumes_create(self.context, add_list)
+            if CONF.sync_resource_by_page:
+                self._sync_by_page()
+            else:
+                self._sync()
         except Exception as e:
             msg = _('Failed to sync volumes entry in DB: {0}'
                     .format(e))
@@ -239,6 +384,107 @@ class StorageVolumeTask(StorageResourceTask):
         else:
             LOG.info("Syncing volumes successful!!!")
 
+    def _sync(self):
+        # collect the volumes list from driver
+        storage_pools = self._get_storage_pools()
+        if storage_pools is None:
+            storage_volumes = self.driver_api.list_volumes(self.context,
+                                                           self.storage_id)
+        else:
+            storage_volumes = self.driver_api.list_volumes_with_pools(
+                self.context, self.storage_id, storage_pools)
+        add_count, update_count, delete_count, unchanged_count = \
+            self._sync_resources(storage_volumes, db.volume_get_all_hashes,
+                                 'native_volume_id',
+                                 db.volumes_create,
+                                 db.volumes_update,
+                                 db.volumes_delete)
+        LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
+                 'update={3},unchanged={4}'.format(self.storage_id,
+                                                   add_count,
+                                                   delete_count,
+                                                   update_count,
+                                                   unchanged_count))
+
+    def _sync_by_page(self):
+        storage_pools = self._get_storage_pools()
+        if storage_pools is None:
+            volume_pages = self.driver_api.iter_volumes(self.context,
+                                                        self.storage_id)
+        else:
+            volume_pages = self.driver_api.iter_volumes_with_pools(
+                self.context, self.storage_id, storage_pools)
+        add_count, update_count, delete_count, unchanged_count = \
+            self._sync_resources_by_page(volume_pages,
+                                         db.volume_get_all_hashes,
+                                         'native_volume_id',
+                                         db.volumes_create,
+                                         db.volumes_update,
+                                         db.volumes_delete)
+        LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
+                 'update={3},unchanged={4}'.format(self.storage_id,
+                                                   add_count,
+                                                   delete_count,
+                                                   update_count,
+                                                   unchanged_count))
+
     def remove(self):
         LOG.info('Remove volumes for storage id:{0}'.format(self.storage_id))
-        db.volume_delete_by_storage(self.context, self.storage_id)
+        self._remove_by_batch(db.volume_delete_by_storage)
+        db.storage_resource_hash_delete(self.context, self.storage_id,
+                                        self.resource_type)
+
+
+def _uses_storage_pools(context, storage_id):
+    try:
+        return driverapi.API().uses_storage_pools(
+            context, storage_id, by_page=CONF.sync_resource_by_page)
+    except Exception as e:
+        LOG.warning('Failed to get the driver of storage id:{0}, volumes '
+                    'are listed without storage pools: {1}'.format(
+                        storage_id, e))
+        return False
+
+
+def sync_storage(context, storage_id, resource_types):
+    """Sync the resources of a storage in one worker.
+
+    The storage device is synced first, then storage pools and volumes are
+    synced concurrently. If the driver builds volumes with the storage
+    pools, the volumes wait for the storage pools listed by the pool sync
+    instead of getting them again.
+
+    :param resource_types: resource_type of the resource tasks to run
+    """
+    tasks = dict((task.resource_type, task(context, storage_id))
+                 for task in StorageResourceTask.__subclasses__()
+                 if task.resource_type in resource_types)
+
+    device_task = tasks.pop(StorageDeviceTask.resource_type, None)
+    if device_task:
+        device_task.sync()
+
+    pool_task = tasks.get(StoragePoolTask.resource_type)
+    volume_task = tasks.get(StorageVolumeTask.resource_type)
+    # Volumes wait for the storage pools only if the driver builds them
+    # with the pools, otherwise they are listed at the same time
+    if pool_task and volume_task and _uses_storage_pools(context, storage_id):
+        volume_task.pool_task = pool_task
+
+    pool = greenpool.GreenPool(max(len(tasks), 1))
+    for task in tasks.values():
+        pool.spawn_n(task.sync)
+    pool.waitall()
+
+
+def remove_storage(context, storage_id):
+    """Remove the resources of a storage deleted by storage_removal_start.
+
+    Volumes, then storage pools, are deleted in batches before the storage
+    device itself, which ends the removal. Every step can be run again, so
+    a removal interrupted, e.g. by a task node restart, is resumed by
+    running it again.
+    """
+    for task in (StorageVolumeTask, StoragePoolTask, StorageDeviceTask):
+        task(context, storage_id).remove()
+    LOG.info('Removing storage id:{0} successful'.format(storage_id))
@@ -0,0 +1,109 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for volume queries with and without the resource indexes.
+
+Usage::
+
+    python -m delfin.tests.benchmark.bench_db_index [rows] [storages] [url]
+
+The volumes table is filled with rows volumes spread over storages
+storages (1,000,000 over 100 by default) in an sqlite database, or the
+database at url. The queries run by a volume sync are then timed with
+and without the indexes.
+"""
+
+import sys
+import time
+
+import sqlalchemy as sa
+
+from delfin.db.sqlalchemy import models
+
+DEFAULT_ROWS = 1000000
+DEFAULT_STORAGES = 100
+INSERT_CHUNK = 10000
+REPEAT = 20
+
+
+def _fill(engine, rows, storages):
+    volumes = models.Volume.__table__
+    with engine.begin() as connection:
+        for start in range(0, rows, INSERT_CHUNK):
+            connection.execute(volumes.insert(), [
+                {'id': str(idx),
+                 'storage_id': 'storage_' + str(idx % storages),
+                 'native_volume_id': 'native_' + str(idx),
+                 'resource_hash': 'hash'}
+                for idx in range(start, min(start + INSERT_CHUNK, rows))])
+
+
+def _time(engine, statement, params):
+    with engine.connect() as connection:
+        start = time.time()
+        for __ in range(REPEAT):
+            connection.execute(statement, params).fetchall()
+        return (time.time() - start) / REPEAT
+
+
+def _run_queries(engine, storages):
+    volumes = models.Volume.__table__
+    storage_id = 'storage_' + str(storages // 2)
+    queries = [
+        ('hashes of one storage', sa.select(
+            [volumes.c.id, volumes.c.native_volume_id,
+             volumes.c.resource_hash]).where(
+            volumes.c.storage_id == sa.bindparam('storage_id')),
+         {'storage_id': storage_id}),
+        ('one volume by native id', sa.select([volumes.c.id]).where(
+            sa.and_(volumes.c.storage_id == sa.bindparam('storage_id'),
+                    volumes.c.native_volume_id == sa.bindparam('native'))),
+         {'storage_id': storage_id,
+          'native': 'native_' + str(storages // 2)}),
+    ]
+    return [(name, _time(engine, statement, params))
+            for name, statement, params in queries]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    storages = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_STORAGES
+    url = sys.argv[3] if len(sys.argv) > 3 else 'sqlite://'
+    engine = sa.create_engine(url)
+    volumes = models.Volume.__table__
+    index = list(volumes.indexes)[0]
+    volumes.create(engine)
+    try:
+        index.drop(engine)
+        start = time.time()
+        _fill(engine, rows, storages)
+        print('Inserted {0} volumes of {1} storages in {2:.1f}s'.format(
+            rows, storages, time.time() - start))
+
+        without_index = _run_queries(engine, storages)
+        start = time.time()
+        index.create(engine)
+        print('Created index {0} in {1:.1f}s'.format(
+            index.name, time.time() - start))
+        with_index = _run_queries(engine, storages)
+
+        for (name, before), (__, after) in zip(without_index, with_index):
+            print('{0:>24}: {1:9.2f}ms without index, {2:9.2f}ms with '
+                  'index'.format(name, before * 1000, after * 1000))
+    finally:
+        volumes.drop(engine)
+
+
+if __name__ == '__main__':
+    main()
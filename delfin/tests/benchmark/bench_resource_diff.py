@@ -0,0 +1,78 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for classifying backend resources against db resources.
+
+Usage::
+
+    python -m delfin.tests.benchmark.bench_resource_diff [count ...]
+
+Each run simulates one volume sync where 1% of the volumes are added,
+1% are deleted, 1% are changed and the rest are unchanged.
+"""
+
+import sys
+import time
+
+from delfin.common import resource_diff
+
+DEFAULT_COUNTS = (1000, 10000, 100000)
+
+
+def _build_resources(count):
+    db_volumes = []
+    storage_volumes = []
+    churn = max(count // 100, 1)
+    for idx in range(count):
+        db_volume = {
+            'id': 'id_' + str(idx),
+            'name': 'vol_' + str(idx),
+            'native_volume_id': 'native_' + str(idx),
+            'status': 'normal',
+            'total_capacity': 1024,
+        }
+        db_volume['resource_hash'] = resource_diff.get_resource_hash(
+            db_volume)
+        db_volumes.append(db_volume)
+    for idx in range(churn, count + churn):
+        storage_volumes.append({
+            'name': 'vol_' + str(idx),
+            'native_volume_id': 'native_' + str(idx),
+            'status': 'error' if idx < 2 * churn else 'normal',
+            'total_capacity': 1024,
+        })
+    return storage_volumes, db_volumes
+
+
+def run(count):
+    storage_volumes, db_volumes = _build_resources(count)
+    start = time.time()
+    add_list, update_list, delete_id_list, unchanged_id_list = \
+        resource_diff.classify_resources(storage_volumes, db_volumes,
+                                         'native_volume_id')
+    elapsed = time.time() - start
+    print('{0:>8} resources: {1:.4f}s (add={2}, update={3}, delete={4}, '
+          'unchanged={5})'.format(count, elapsed, len(add_list),
+                                  len(update_list), len(delete_id_list),
+                                  len(unchanged_id_list)))
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS
+    for count in counts:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
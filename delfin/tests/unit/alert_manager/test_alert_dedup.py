@@ -0,0 +1,111 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import context
+from delfin import test
+from delfin.common import constants
+from delfin.alert_manager import alert_dedup
+
+FINGERPRINT = ['storage_id', 'alert_id', 'location']
+
+
+def fake_alert(alert_id='1050', sequence_number=1):
+    return {'storage_id': 'abcd-1234-56789',
+            'alert_id': alert_id,
+            'location': 'comp1',
+            'sequence_number': sequence_number}
+
+
+class AlertDeduplicatorTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AlertDeduplicatorTestCase, self).setUp()
+        self.ctxt = context.get_admin_context()
+        self.dispatch = mock.Mock()
+
+    @mock.patch('time.time')
+    def test_coalesce_in_window(self, mock_time):
+        mock_time.return_value = 100
+        deduplicator = alert_dedup.AlertDeduplicator(
+            self.dispatch, 60, FINGERPRINT, 10)
+        for i in range(3):
+            deduplicator.process(self.ctxt, fake_alert(sequence_number=i))
+        deduplicator.process(self.ctxt, fake_alert(alert_id='1051'))
+
+        # First alert of each fingerprint is exported at once
+        self.assertEqual(
+            [mock.call(self.ctxt, fake_alert(sequence_number=0)),
+             mock.call(self.ctxt, fake_alert(alert_id='1051'))],
+            self.dispatch.call_args_list)
+
+        mock_time.return_value = 159
+        deduplicator.flush(self.ctxt)
+        self.assertEqual(2, self.dispatch.call_count)
+
+        # Repeats are exported as the last one with the repeat count
+        mock_time.return_value = 160
+        deduplicator.flush(self.ctxt)
+        self.assertEqual(3, self.dispatch.call_count)
+        expected_alert = fake_alert(sequence_number=2)
+        expected_alert['occurrence_count'] = 2
+        self.dispatch.assert_called_with(self.ctxt, expected_alert)
+        metrics = deduplicator.get_metrics()
+        self.assertEqual(2, metrics['coalesced'])
+        self.assertEqual(3, metrics['exported'])
+        self.assertEqual(0, metrics['fingerprints'])
+
+        # A new window is started by the next alert
+        deduplicator.process(self.ctxt, fake_alert(sequence_number=3))
+        self.dispatch.assert_called_with(self.ctxt,
+                                         fake_alert(sequence_number=3))
+
+    def test_cache_size_exceeded(self):
+        deduplicator = alert_dedup.AlertDeduplicator(
+            self.dispatch, 60, FINGERPRINT, 1)
+        deduplicator.process(self.ctxt, fake_alert())
+        deduplicator.process(self.ctxt, fake_alert())
+        deduplicator.process(self.ctxt, fake_alert(alert_id='1051'))
+
+        expected_alert = fake_alert()
+        expected_alert['occurrence_count'] = 1
+        self.assertEqual(
+            [mock.call(self.ctxt, fake_alert()),
+             mock.call(self.ctxt, expected_alert),
+             mock.call(self.ctxt, fake_alert(alert_id='1051'))],
+            self.dispatch.call_args_list)
+
+    def test_category_not_coalesced(self):
+        deduplicator = alert_dedup.AlertDeduplicator(
+            self.dispatch, 60, FINGERPRINT, 10)
+        fault = fake_alert()
+        fault['category'] = constants.Category.FAULT
+        recovery = fake_alert(sequence_number=2)
+        recovery['category'] = constants.Category.RECOVERY
+        for alert_model in (fault, recovery, fault):
+            deduplicator.process(self.ctxt, alert_model)
+
+        # Recovery is exported between the fault and its repeat
+        self.assertEqual([mock.call(self.ctxt, fault),
+                          mock.call(self.ctxt, recovery)],
+                         self.dispatch.call_args_list)
+        self.assertEqual(1, deduplicator.get_metrics()['coalesced'])
+
+    def test_window_disabled(self):
+        deduplicator = alert_dedup.AlertDeduplicator(
+            self.dispatch, 0, FINGERPRINT, 10)
+        deduplicator.process(self.ctxt, fake_alert())
+        deduplicator.process(self.ctxt, fake_alert())
+        self.assertEqual(2, self.dispatch.call_count)
@@ -0,0 +1,54 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import context
+from delfin import test
+from delfin.alert_manager import alert_source_index
+from delfin.tests.unit.alert_manager import fakes
+
+
+class AlertSourceIndexTestCase(test.TestCase):
+
+    @mock.patch('delfin.drivers.api.API.get_driver_class')
+    @mock.patch('delfin.db.storage_get')
+    def test_add_and_remove(self, mock_storage_get, mock_get_driver_class):
+        mock_storage_get.return_value = fakes.fake_storage_info()
+        driver_cls = mock.Mock()
+        mock_get_driver_class.return_value = driver_cls
+        alert_source = fakes.fake_v2_alert_source()
+        alert_source['host'] = '127.0.0.1'
+        ctxt = context.get_admin_context()
+
+        index = alert_source_index.AlertSourceIndex()
+        self.assertIsNone(index.get('127.0.0.1'))
+        entry = index.add(ctxt, alert_source)
+
+        self.assertIs(entry, index.get('127.0.0.1'))
+        self.assertEqual('abcd1234567', entry.community_string)
+        self.assertEqual(fakes.fake_storage_info(), entry.storage)
+        self.assertIs(driver_cls, entry.driver_cls)
+        mock_storage_get.assert_called_once_with(ctxt, 'abcd-1234-5678')
+        mock_get_driver_class.assert_called_once_with(ctxt,
+                                                      'abcd-1234-5678')
+
+        index.remove('other-storage')
+        self.assertIs(entry, index.get('127.0.0.1'))
+        index.remove('abcd-1234-5678')
+        self.assertIsNone(index.get('127.0.0.1'))
+
+        index.add(ctxt, alert_source)
+        index.clear()
+        self.assertIsNone(index.get('127.0.0.1'))
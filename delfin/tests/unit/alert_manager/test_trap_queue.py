@@ -0,0 +1,141 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest import mock
+
+import eventlet
+import fixtures
+from eventlet import event
+
+from delfin import test
+from delfin.alert_manager import trap_queue
+
+
+class TrapQueueTestCase(test.TestCase):
+
+    def setUp(self):
+        super(TrapQueueTestCase, self).setUp()
+        self.done = event.Event()
+        self.processed = []
+
+    def _handler(self, trap):
+        self.done.wait()
+        self.processed.append(trap['id'])
+
+    def test_drop_oldest(self):
+        traps = trap_queue.TrapQueue(self._handler, 1, 2)
+        traps.start()
+        for i in range(4):
+            traps.put({'id': i})
+            eventlet.sleep(0)
+
+        # Trap 0 is being processed, 1 is dropped for 3
+        metrics = traps.get_metrics()
+        self.assertEqual(4, metrics['received'])
+        self.assertEqual(1, metrics['dropped'])
+        self.assertEqual(2, metrics['queue_depth'])
+
+        self.done.send()
+        eventlet.sleep(0)
+        self.assertEqual([0, 2, 3], self.processed)
+        metrics = traps.get_metrics()
+        self.assertEqual(3, metrics['processed'])
+        self.assertEqual(0, metrics['queue_depth'])
+
+    def test_spill_to_disk(self):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'traps.spill')
+        traps = trap_queue.TrapQueue(self._handler, 1, 2,
+                                     overflow=trap_queue.SPILL_TO_DISK,
+                                     spill_file=spill_file)
+        traps.start()
+        for i in range(6):
+            traps.put({'id': i})
+            eventlet.sleep(0)
+
+        metrics = traps.get_metrics()
+        self.assertEqual(3, metrics['spilled'])
+        self.assertEqual(3, metrics['spill_depth'])
+        self.assertNotIn('dropped', metrics)
+
+        self.done.send()
+        eventlet.sleep(0)
+        self.assertEqual(list(range(6)), self.processed)
+        metrics = traps.get_metrics()
+        self.assertEqual(6, metrics['processed'])
+        self.assertEqual(0, metrics['spill_depth'])
+        self.assertEqual(0, os.path.getsize(spill_file))
+
+    def test_load_spilled_on_start(self):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'traps.spill')
+        with open(spill_file, 'w') as f:
+            f.write('{"id": 0}\nnot json\n{"id": 1}\n')
+        self.done.send()
+
+        traps = trap_queue.TrapQueue(self._handler, 1, 10,
+                                     overflow=trap_queue.SPILL_TO_DISK,
+                                     spill_file=spill_file)
+        traps.start()
+        eventlet.sleep(0)
+
+        self.assertEqual([0, 1], self.processed)
+        self.assertEqual(1, traps.get_metrics()['dropped'])
+
+    def test_spill_file_full(self):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'traps.spill')
+        # Room for two spilled traps
+        traps = trap_queue.TrapQueue(self._handler, 1, 1,
+                                     overflow=trap_queue.SPILL_TO_DISK,
+                                     spill_file=spill_file,
+                                     spill_max_size=20)
+        traps.start()
+        with mock.patch.object(trap_queue.LOG, 'error') as mock_error:
+            for i in range(6):
+                traps.put({'id': i})
+                eventlet.sleep(0)
+        mock_error.assert_called_once_with(
+            mock.ANY, spill_file, 'spill file is full')
+
+        metrics = traps.get_metrics()
+        self.assertEqual(2, metrics['spilled'])
+        self.assertEqual(2, metrics['dropped'])
+        self.assertEqual(20, os.path.getsize(spill_file))
+
+        # Traps are spilled again once the spilled ones are processed
+        self.done.send()
+        eventlet.sleep(0)
+        self.assertEqual([0, 1, 2, 3], self.processed)
+        self.done = event.Event()
+        for i in range(6, 9):
+            traps.put({'id': i})
+            eventlet.sleep(0)
+        self.assertEqual(3, traps.get_metrics()['spilled'])
+        self.assertFalse(traps.spill_failed)
+
+    def test_spill_failed_logged_once(self):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'missing', 'traps.spill')
+        traps = trap_queue.TrapQueue(self._handler, 1, 1,
+                                     overflow=trap_queue.SPILL_TO_DISK,
+                                     spill_file=spill_file)
+        traps.start()
+        with mock.patch.object(trap_queue.LOG, 'error') as mock_error:
+            for i in range(5):
+                traps.put({'id': i})
+                eventlet.sleep(0)
+        self.assertEqual(1, mock_error.call_count)
+        self.assertEqual(3, traps.get_metrics()['dropped'])
@@ -12,12 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import socket
 from unittest import mock
 
+import eventlet
+import fixtures
 from oslo_utils import importutils
 from pysnmp.carrier.asyncore.dgram import udp
 from pysnmp.entity import engine, config
 
+from delfin import context
 from delfin import exception
 from delfin import test
 from delfin.tests.unit.alert_manager import fakes
@@ -85,6 +90,26 @@ class TrapReceiverTestCase(test.TestCase):
         # Verify that snmp engine transport config is set after _add_transport
         self.assertTrue(get_transport is not None)
 
+    def test_add_transport_with_workers(self):
+        self.override_config('trap_receiver_workers', 2)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.DEF_TRAP_RECV_ADDR, 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        # Trap receiver of each process binds the same port
+        for __ in range(2):
+            trap_receiver_inst = self._get_trap_receiver()
+            trap_receiver_inst.snmp_engine = engine.SnmpEngine()
+            trap_receiver_inst.trap_receiver_address = self.DEF_TRAP_RECV_ADDR
+            trap_receiver_inst.trap_receiver_port = port
+            trap_receiver_inst._add_transport()
+            transport = config.getTransport(trap_receiver_inst.snmp_engine,
+                                            udp.domainName)
+            self.addCleanup(transport.closeTransport)
+            self.assertEqual(1, transport.socket.getsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEPORT))
+
     def test_add_transport_exception(self):
         trap_receiver_inst = self._get_trap_receiver()
 
@@ -277,3 +302,155 @@ class TrapReceiverTestCase(test.TestCase):
         self.assertRaisesRegex(exception.AlertSourceNotFoundWithHost, "",
                                trap_receiver_inst._get_alert_source_by_host,
                                '127.0.0.1')
+
+    @mock.patch('pysnmp.entity.config.delV1System', mock.Mock())
+    @mock.patch('delfin.alert_manager.alert_processor.AlertProcessor'
+                '.process_alert_info')
+    @mock.patch('delfin.drivers.api.API.get_driver_class')
+    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.alert_source_get_all')
+    def test_cb_fun_with_indexed_alert_source(self, mock_alert_source_list,
+                                              mock_storage_get,
+                                              mock_get_driver_class,
+                                              mock_process_alert_info):
+        alert_source = fakes.fake_v2_alert_source()
+        alert_source['host'] = '127.0.0.1'
+        mock_alert_source_list.return_value = [alert_source]
+        mock_storage_get.return_value = fakes.fake_storage_info()
+        trap_receiver_inst = self._get_trap_receiver()
+        trap_receiver_inst.snmp_engine = mock.Mock()
+        trap_receiver_inst.snmp_engine.observer.getExecutionContext \
+            .return_value = {'transportAddress': ('127.0.0.1', 162),
+                             'securityModel': 2}
+        trap_receiver_inst.trap_queue.start()
+
+        for __ in range(2):
+            trap_receiver_inst._cb_fun(None, None, 'abcd1234567',
+                                       [('1.3.6.1', 'value')], None)
+        eventlet.sleep(0)
+
+        # Alert source is got from database only for the first trap
+        mock_alert_source_list.assert_called_once()
+        mock_storage_get.assert_called_once()
+        self.assertEqual(2, mock_process_alert_info.call_count)
+        mock_process_alert_info.assert_called_with(
+            {'1.3.6.1': 'value', 'transport_address': '127.0.0.1',
+             'storage_id': 'abcd-1234-5678'},
+            storage=fakes.fake_storage_info(),
+            driver_cls=mock_get_driver_class.return_value)
+
+        # Alert source is got from database again once it is changed
+        trap_receiver_inst.sync_snmp_config(
+            context.get_admin_context(), snmp_config_to_del=alert_source)
+        trap_receiver_inst._cb_fun(None, None, 'abcd1234567',
+                                   [('1.3.6.1', 'value')], None)
+        eventlet.sleep(0)
+        self.assertEqual(2, mock_alert_source_list.call_count)
+
+        # Trap with a community string not matching is not processed
+        trap_receiver_inst._cb_fun(None, None, 'public',
+                                   [('1.3.6.1', 'value')], None)
+        eventlet.sleep(0)
+        self.assertEqual(3, mock_process_alert_info.call_count)
+        metrics = trap_receiver_inst.get_trap_metrics(
+            context.get_admin_context())
+        self.assertEqual(['alert coalescing', 'alert exporters',
+                          'trap queue'], sorted(metrics))
+        self.assertEqual(4, metrics['trap queue']['received'])
+        self.assertEqual(3, metrics['trap queue']['processed'])
+        self.assertEqual(1, metrics['trap queue']['failed'])
+
+    def test_process_trap_in_forked_process(self):
+        # Trap receiver is created before the service forks its processes
+        trap_receiver_inst = self._get_trap_receiver()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # As oslo.service does in forked processes
+                eventlet.hubs.use_hub()
+                trap_receiver_inst.trap_queue.handler = \
+                    lambda trap: os.write(write_fd, b'1')
+                trap_receiver_inst._start_workers()
+                trap_receiver_inst.trap_queue.put({'source_ip': '127.0.0.1'})
+                eventlet.sleep(0.1)
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_fd, 'rb') as f:
+            self.assertEqual(b'1', f.read())
+
+    @mock.patch('delfin.db.alert_source_get_all')
+    def test_start_workers_in_processes(self, mock_alert_source_list):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'traps.spill')
+        self.override_config('trap_receiver_workers', 2)
+        self.override_config('trap_spill_file', spill_file)
+        mock_alert_source_list.return_value = \
+            fakes.fake_v3_alert_source_list()
+        trap_receiver_class = importutils.import_class(
+            self.TRAP_RECEIVER_CLASS)
+
+        trap_receivers = []
+        for __ in range(2):
+            trap_receiver_inst = trap_receiver_class(
+                self.DEF_TRAP_RECV_ADDR, self.DEF_TRAP_RECV_PORT)
+            trap_receiver_inst.alert_rpc_api = mock.Mock()
+            trap_receiver_inst._start_workers()
+            self.addCleanup(trap_receiver_inst.worker_lock_file.close)
+            trap_receivers.append(trap_receiver_inst)
+
+        # Each process has an index and a spill file of its own
+        self.assertEqual([0, 1], [trap_receiver_inst.worker_index
+                                  for trap_receiver_inst in trap_receivers])
+        self.assertEqual([spill_file + '.0', spill_file + '.1'],
+                         [trap_receiver_inst.trap_queue.spill_file
+                          for trap_receiver_inst in trap_receivers])
+
+        # Heart beat checks are spawned by one process only
+        ctxt = context.get_admin_context()
+        for trap_receiver_inst in trap_receivers:
+            trap_receiver_inst.heart_beat_task_spawn(ctxt)
+        self.assertEqual(
+            2, trap_receivers[0].alert_rpc_api.check_snmp_config.call_count)
+        self.assertFalse(
+            trap_receivers[1].alert_rpc_api.check_snmp_config.called)
+
+    def test_get_trap_metrics_of_processes(self):
+        spill_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'traps.spill')
+        self.override_config('trap_receiver_workers', 2)
+        self.override_config('trap_spill_file', spill_file)
+        trap_receiver_class = importutils.import_class(
+            self.TRAP_RECEIVER_CLASS)
+
+        trap_receivers = []
+        for index in range(2):
+            trap_receiver_inst = trap_receiver_class(
+                self.DEF_TRAP_RECV_ADDR, self.DEF_TRAP_RECV_PORT)
+            trap_receiver_inst.worker_index = index
+            self.mock_object(trap_receiver_inst, '_get_process_metrics',
+                             mock.Mock(return_value={
+                                 'trap queue': {'received': index + 1},
+                                 'alert exporters': {'AlertExporterExample': {
+                                     'batches': 2,
+                                     'max_batch_latency_seconds': index + 1,
+                                     'avg_batch_latency_seconds': 1}}}))
+            trap_receivers.append(trap_receiver_inst)
+        ctxt = context.get_admin_context()
+
+        # Metrics of a process which has not reported yet are not known
+        metrics = trap_receivers[0].get_trap_metrics(ctxt)
+        self.assertEqual(1, metrics['trap queue']['received'])
+
+        trap_receivers[1].report_trap_metrics(ctxt)
+        metrics = trap_receivers[0].get_trap_metrics(ctxt)
+        self.assertEqual({'received': 3}, metrics['trap queue'])
+        self.assertEqual({'batches': 4, 'max_batch_latency_seconds': 2},
+                         metrics['alert exporters']['AlertExporterExample'])
+
+        # Any process gets the metrics of all of them
+        self.assertEqual(
+            metrics, trap_receivers[1].get_trap_metrics(ctxt))
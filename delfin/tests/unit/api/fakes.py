@@ -352,6 +352,11 @@ def fake_volume_get_all(context, marker=None,
     ]
 
 
+def fake_volume_get_page(context, cursor=None, limit=None, sort_keys=None,
+                         sort_dirs=None, filters=None):
+    return fake_volume_get_all(context), None
+
+
 def fake_volume_show(context, volume_id):
     return {
         "created_at": "2020-06-10T07:17:31.157079",
@@ -395,6 +400,11 @@ def fake_storage_pool_get_all(context, marker=None,
     ]
 
 
+def fake_storage_pool_get_page(context, cursor=None, limit=None,
+                               sort_keys=None, sort_dirs=None, filters=None):
+    return fake_storage_pool_get_all(context), None
+
+
 def fake_storage_pool_show(context, storage_pool_id):
     return {
         "created_at": "2020-06-10T07:17:08.707356",
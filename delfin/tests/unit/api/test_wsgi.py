@@ -13,6 +13,7 @@
 import ddt
 import six
 import webob
+from oslo_serialization import jsonutils
 
 import inspect
 
@@ -175,6 +176,22 @@ class JSONDictSerializerTest(test.TestCase):
                                 six.b('')).replace(six.b(' '), six.b(''))
         self.assertEqual(expected_json, result)
 
+    def test_serialize_stream(self):
+        serializer = wsgi.JSONDictSerializer()
+        serializer.stream_chunk_items = 2
+        items = ({'id': i} for i in range(5))
+        chunks = list(serializer.serialize_stream(
+            wsgi.Collection('volumes', items)))
+
+        # Opening, three chunks of at most two items and closing
+        self.assertEqual(5, len(chunks))
+        self.assertEqual({'volumes': [{'id': i} for i in range(5)]},
+                         jsonutils.loads(six.b('').join(chunks)))
+
+        chunks = serializer.serialize_stream(wsgi.Collection('volumes', []))
+        self.assertEqual({'volumes': []},
+                         jsonutils.loads(six.b('').join(chunks)))
+
 
 class TextDeserializerTest(test.TestCase):
     def test_dispatch_default(self):
@@ -30,8 +30,8 @@ class TestStoragePoolController(test.TestCase):
 
     def test_list(self):
         self.mock_object(
-            db, 'storage_pool_get_all',
-            fakes.fake_storage_pool_get_all)
+            db, 'storage_pool_get_page',
+            fakes.fake_storage_pool_get_page)
         req = fakes.HTTPRequest.blank('/storage-pools')
 
         res_dict = self.controller.index(req)
@@ -59,8 +59,8 @@ class TestStoragePoolController(test.TestCase):
 
     def test_list_with_filter(self):
         self.mock_object(
-            db, 'storage_pool_get_all',
-            fakes.fake_storage_pool_get_all)
+            db, 'storage_pool_get_page',
+            fakes.fake_storage_pool_get_page)
         req = fakes.HTTPRequest.blank(
             '/storage-pools/'
             '?storage_id=12c2d52f-01bc-41f5-b73f-7abf6f38a2a6'
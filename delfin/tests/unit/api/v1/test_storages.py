@@ -30,9 +30,12 @@ class TestStorageController(test.TestCase):
         self.task_rpcapi = mock.Mock()
         self.driver_api = mock.Mock()
         self.controller = StorageController()
+        self.alert_rpcapi = mock.Mock()
         self.mock_object(self.controller, 'task_rpcapi', self.task_rpcapi)
+        self.mock_object(self.controller, 'alert_rpcapi', self.alert_rpcapi)
         self.mock_object(self.controller, 'driver_api', self.driver_api)
 
+    @mock.patch.object(db, 'storage_removal_start', mock.Mock())
     @mock.patch.object(db, 'storage_get',
                        mock.Mock(return_value={'id': 'fake_id'}))
     def test_delete(self):
@@ -40,10 +43,25 @@ class TestStorageController(test.TestCase):
         self.controller.delete(req, 'fake_id')
         ctxt = req.environ['delfin.context']
         db.storage_get.assert_called_once_with(ctxt, 'fake_id')
-        self.task_rpcapi.remove_storage_resource.assert_called_with(
-            ctxt, 'fake_id', mock.ANY)
+        db.storage_removal_start.assert_called_once_with(ctxt, 'fake_id')
+        self.task_rpcapi.remove_storage.assert_called_once_with(
+            ctxt, 'fake_id')
         self.task_rpcapi.remove_storage_in_cache.assert_called_once_with(
             ctxt, 'fake_id')
+        self.assertFalse(self.alert_rpcapi.sync_snmp_config.called)
+
+    @mock.patch.object(db, 'alert_source_get',
+                       mock.Mock(return_value={'storage_id': 'fake_id',
+                                               'version': 'snmpv2c'}))
+    @mock.patch.object(db, 'storage_removal_start', mock.Mock())
+    @mock.patch.object(db, 'storage_get',
+                       mock.Mock(return_value={'id': 'fake_id'}))
+    def test_delete_with_alert_source(self):
+        req = fakes.HTTPRequest.blank('/storages/fake_id')
+        self.controller.delete(req, 'fake_id')
+        ctxt = req.environ['delfin.context']
+        self.alert_rpcapi.sync_snmp_config.assert_called_once_with(
+            ctxt, {'storage_id': 'fake_id', 'version': 'snmpv2c'}, None)
 
     def test_delete_with_invalid_id(self):
         self.mock_object(
@@ -168,6 +186,40 @@ class TestStorageController(test.TestCase):
         }
         self.assertDictEqual(expctd_dict, res_dict)
 
+    @mock.patch.object(db, 'storage_get',
+                       mock.Mock(return_value={'id': 'fake_id'}))
+    def test_sync(self):
+        req = fakes.HTTPRequest.blank('/storages/fake_id/sync')
+        ctxt = req.environ['delfin.context']
+        self.controller.sync(req, 'fake_id')
+        self.task_rpcapi.sync_storage.assert_called_once_with(
+            ctxt, 'fake_id', ['storage', 'storage_pools', 'volumes'])
+
+        self.mock_object(db, 'storage_get_all', mock.Mock(
+            return_value=[{'id': 'fake_id'}, {'id': 'other_id'}]))
+        res_dict = self.controller.index(fakes.HTTPRequest.blank('/storages'))
+        self.assertEqual(['SYNCING', 'SYNCED'],
+                         [storage['sync_status']
+                          for storage in res_dict['storages']])
+
+        res_dict = self.controller.show_sync_runs(req, 'fake_id')
+        self.assertEqual(3, len(res_dict['sync_runs']))
+        for sync_run in res_dict['sync_runs']:
+            self.assertEqual(constants.SyncRunStatus.SYNCING,
+                             sync_run['status'])
+            self.assertIsNone(sync_run['ended_at'])
+        self.assertEqual('SYNCING',
+                         self.controller.show(req, 'fake_id')['sync_status'])
+
+        self.assertRaises(exception.StorageIsSyncing,
+                          self.controller.sync, req, 'fake_id')
+
+        db.sync_run_end(ctxt, 'fake_id', 'volumes',
+                        constants.SyncRunStatus.SUCCEEDED, 1.0)
+        self.controller.sync(req, 'fake_id')
+        self.task_rpcapi.sync_storage.assert_called_with(
+            ctxt, 'fake_id', ['volumes'])
+
     def test_show_with_invalid_id(self):
         self.mock_object(
             db, 'storage_get',
@@ -29,8 +29,8 @@ class TestVolumeController(test.TestCase):
 
     def test_list(self):
         self.mock_object(
-            db, 'volume_get_all',
-            fakes.fake_volume_get_all)
+            db, 'volume_get_page',
+            fakes.fake_volume_get_page)
         req = fakes.HTTPRequest.blank('/volumes')
 
         res_dict = self.controller.index(req)
@@ -79,8 +79,8 @@ class TestVolumeController(test.TestCase):
 
     def test_list_with_filter(self):
         self.mock_object(
-            db, 'volume_get_all',
-            fakes.fake_volume_get_all)
+            db, 'volume_get_page',
+            fakes.fake_volume_get_page)
         req = fakes.HTTPRequest.blank(
             '/volumes/'
             '?storage_id=12c2d52f-01bc-41f5-b73f-7abf6f38a2a6'
@@ -159,6 +159,38 @@ class TestVolumeController(test.TestCase):
 
         self.assertDictEqual(expctd_dict, res_dict)
 
+    def test_list_with_cursor(self):
+        volumes = fakes.fake_volume_get_all(None)
+        self.mock_object(db, 'volume_get_page',
+                         mock.Mock(return_value=(volumes, 'next_cursor')))
+        req = fakes.HTTPRequest.blank('/volumes?cursor=cursor&limit=2')
+        res_dict = self.controller.index(req)
+
+        self.assertEqual('next_cursor', res_dict['next_cursor'])
+        self.assertEqual(2, len(res_dict['volumes']))
+        db.volume_get_page.assert_called_once_with(
+            req.environ['delfin.context'], 'cursor', 2, ['created_at'],
+            ['desc'], {})
+
+        req = fakes.HTTPRequest.blank('/volumes?cursor=cursor&marker=id')
+        self.assertRaises(exception.InvalidInput, self.controller.index, req)
+
+    def test_list_stream(self):
+        self.mock_object(
+            db, 'volume_get_all_iter',
+            mock.Mock(return_value=iter(fakes.fake_volume_get_all(None))))
+        req = fakes.HTTPRequest.blank('/volumes?stream=true&sort=name:asc')
+        res_obj = self.controller.index(req)
+
+        db.volume_get_all_iter.assert_called_once_with(
+            req.environ['delfin.context'], ['name'], ['asc'], {})
+        self.assertEqual('volumes', res_obj.obj.key)
+        self.assertEqual(['004DF', '004E0'],
+                         [volume['name'] for volume in res_obj.obj.items])
+
+        req = fakes.HTTPRequest.blank('/volumes?stream=true&limit=2')
+        self.assertRaises(exception.InvalidInput, self.controller.index, req)
+
     def test_show_with_invalid_id(self):
         self.mock_object(
             db, 'volume_get',
@@ -0,0 +1,127 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from delfin import test
+from delfin.common import resource_diff
+
+
+def _fake_volume(idx, status='normal'):
+    return {
+        "name": "fake_vol_" + str(idx),
+        "storage_id": 'fake_storage_id',
+        "native_volume_id": "fake_original_id_" + str(idx),
+        "status": status,
+        "total_capacity": 1024,
+    }
+
+
+def _fake_db_volume(idx, status='normal'):
+    vol = _fake_volume(idx, status)
+    vol['id'] = 'fake_id_' + str(idx)
+    vol['resource_hash'] = resource_diff.get_resource_hash(vol)
+    return vol
+
+
+def _hashed(resource):
+    resource['resource_hash'] = resource_diff.get_resource_hash(resource)
+    return resource
+
+
+class TestResourceDiff(test.TestCase):
+
+    def test_get_resource_hash(self):
+        resource_hash = resource_diff.get_resource_hash(_fake_volume(1))
+        self.assertEqual(resource_hash,
+                         resource_diff.get_resource_hash(_fake_db_volume(1)))
+        self.assertNotEqual(resource_hash, resource_diff.get_resource_hash(
+            _fake_volume(1, status='error')))
+
+    def test_classify_resources(self):
+        storage_volumes = [_fake_volume(0), _fake_volume(1, status='error'),
+                           _fake_volume(3)]
+        db_volumes = [_fake_db_volume(0), _fake_db_volume(1),
+                      _fake_db_volume(2)]
+
+        add_list, update_list, delete_id_list, unchanged_id_list = \
+            resource_diff.classify_resources(storage_volumes, db_volumes,
+                                             'native_volume_id')
+
+        self.assertEqual([_hashed(_fake_volume(3))], add_list)
+        self.assertEqual([_fake_db_volume(1, status='error')], update_list)
+        self.assertEqual(['fake_id_2'], delete_id_list)
+        self.assertEqual(['fake_id_0'], unchanged_id_list)
+
+    def test_resource_differ_by_page(self):
+        db_volumes = [_fake_db_volume(idx) for idx in range(4)]
+        differ = resource_diff.ResourceDiffer(db_volumes, 'native_volume_id')
+
+        add_list, update_list, unchanged_id_list = differ.classify(
+            [_fake_volume(0), _fake_volume(4)])
+        self.assertEqual([_hashed(_fake_volume(4))], add_list)
+        self.assertEqual([], update_list)
+        self.assertEqual(['fake_id_0'], unchanged_id_list)
+
+        add_list, update_list, unchanged_id_list = differ.classify(
+            [_fake_volume(2, status='error')])
+        self.assertEqual([], add_list)
+        self.assertEqual([_fake_db_volume(2, status='error')], update_list)
+        self.assertEqual([], unchanged_id_list)
+
+        self.assertEqual(['fake_id_1', 'fake_id_3'],
+                         differ.get_deleted_ids())
+        self.assertEqual(
+            resource_diff.get_resources_digest(dict(
+                (vol['native_volume_id'], vol['resource_hash'])
+                for vol in (_hashed(_fake_volume(0)),
+                            _hashed(_fake_volume(4)),
+                            _hashed(_fake_volume(2, status='error'))))),
+            differ.get_digest())
+
+    def test_classify_resources_by_hash(self):
+        # Fields are not compared if the hashes are the same, so db
+        # resources only need the id, the key and the hash
+        db_volumes = [dict((field, vol[field]) for field in
+                           ('id', 'native_volume_id', 'resource_hash'))
+                      for vol in (_fake_db_volume(0), _fake_db_volume(1))]
+
+        add_list, update_list, delete_id_list, unchanged_id_list = \
+            resource_diff.classify_resources(
+                [_fake_volume(0), _fake_volume(1, status='error')],
+                db_volumes, 'native_volume_id')
+
+        # The changed resource is updated with all its fields
+        self.assertEqual([], add_list)
+        self.assertEqual([_fake_db_volume(1, status='error')], update_list)
+        self.assertEqual([], delete_id_list)
+        self.assertEqual(['fake_id_0'], unchanged_id_list)
+
+    def test_classify_duplicated_resources(self):
+        differ = resource_diff.ResourceDiffer([_fake_db_volume(0)],
+                                              'native_volume_id')
+
+        # The last resource reported with a key wins within a batch
+        add_list, update_list, unchanged_id_list = differ.classify(
+            [_fake_volume(0, status='error'), _fake_volume(1),
+             _fake_volume(0), _fake_volume(1, status='error')])
+        self.assertEqual([_hashed(_fake_volume(1, status='error'))],
+                         add_list)
+        self.assertEqual([], update_list)
+        self.assertEqual(['fake_id_0'], unchanged_id_list)
+
+        # A key classified in an earlier batch is ignored
+        add_list, update_list, unchanged_id_list = differ.classify(
+            [_fake_volume(1), _fake_volume(0, status='error')])
+        self.assertEqual(([], [], []),
+                         (add_list, update_list, unchanged_id_list))
+        self.assertEqual([], differ.get_deleted_ids())
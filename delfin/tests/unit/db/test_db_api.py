@@ -2,6 +2,7 @@ from unittest import mock
 
 from delfin import context, exception
 from delfin import test
+from delfin.common import constants
 from delfin.db import api as db_api
 from delfin.db.sqlalchemy import api, models
 
@@ -285,3 +286,156 @@ class TestSIMDBAPI(test.TestCase):
             = fake_alert_source
         result = db_api.alert_source_create(ctxt, fake_alert_source)
         assert len(result) == 0
+
+    def test_volumes_bulk_operations(self):
+        self.override_config('bulk_chunk_size', 2, group='database')
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+        volumes = [{'storage_id': storage_id,
+                    'native_volume_id': 'fake_native_id_' + str(idx),
+                    'status': 'normal'} for idx in range(5)]
+        db_api.volumes_create(ctxt, volumes)
+        db_volumes = db_api.volume_get_all(
+            ctxt, filters={'storage_id': storage_id})
+        self.assertEqual(5, len(db_volumes))
+
+        db_api.volumes_update(ctxt, [{'id': vol['id'], 'status': 'error'}
+                                     for vol in volumes[:3]])
+        db_volumes = db_api.volume_get_all(
+            ctxt, filters={'storage_id': storage_id, 'status': 'error'})
+        self.assertEqual(3, len(db_volumes))
+
+        db_api.volumes_delete(ctxt, [vol['id'] for vol in volumes[1:]])
+        db_volumes = db_api.volume_get_all(
+            ctxt, filters={'storage_id': storage_id})
+        self.assertEqual([volumes[0]['id']], [vol['id'] for vol in db_volumes])
+
+    def test_volume_get_all_hashes(self):
+        db_api.volumes_create(ctxt, [
+            {'id': 'fake_id', 'storage_id': 'fake_storage_id',
+             'native_volume_id': 'fake_native_id', 'name': 'fake_name',
+             'resource_hash': 'fake_hash'}])
+        result = db_api.volume_get_all_hashes(ctxt, 'fake_storage_id')
+        self.assertEqual([{'id': 'fake_id',
+                           'native_volume_id': 'fake_native_id',
+                           'resource_hash': 'fake_hash'}], result)
+
+    def test_storage_resource_hash(self):
+        self.assertIsNone(db_api.storage_resource_hash_get(
+            ctxt, 'fake_storage_id', 'volumes'))
+        db_api.storage_resource_hash_update(ctxt, 'fake_storage_id',
+                                            'volumes', 'fake_hash')
+        db_api.storage_resource_hash_update(ctxt, 'fake_storage_id',
+                                            'volumes', 'new_hash')
+        self.assertEqual('new_hash', db_api.storage_resource_hash_get(
+            ctxt, 'fake_storage_id', 'volumes'))
+        db_api.storage_resource_hash_delete(ctxt, 'fake_storage_id',
+                                            'volumes')
+        self.assertIsNone(db_api.storage_resource_hash_get(
+            ctxt, 'fake_storage_id', 'volumes'))
+
+    def test_volume_delete_by_storage_with_limit(self):
+        db_api.volumes_create(ctxt, [
+            {'id': 'fake_id_%s' % i, 'storage_id': 'fake_storage_id',
+             'native_volume_id': 'fake_native_id_%s' % i}
+            for i in range(3)])
+        self.assertEqual(2, db_api.volume_delete_by_storage(
+            ctxt, 'fake_storage_id', limit=2))
+        self.assertEqual(1, db_api.volume_delete_by_storage(
+            ctxt, 'fake_storage_id', limit=2))
+        self.assertEqual(0, db_api.volume_delete_by_storage(
+            ctxt, 'fake_storage_id', limit=2))
+
+    def test_storage_removal(self):
+        storage_id = 'fake_storage_id'
+        db_api.storage_create(ctxt, {'id': storage_id, 'name': 'fake_name'})
+        db_api.sync_run_start(ctxt, storage_id, 'volumes', 60)
+        db_api.storage_removal_start(ctxt, storage_id)
+        self.assertRaises(exception.StorageNotFound,
+                          db_api.storage_get, ctxt, storage_id)
+        removals = db_api.storage_removal_get_all(ctxt, 'removing')
+        self.assertEqual([storage_id],
+                         [removal['storage_id'] for removal in removals])
+
+        db_api.storage_removal_update(ctxt, storage_id,
+                                      {'resource_type': 'volumes',
+                                       'removed_count': 10})
+        removal = db_api.storage_removal_get_all(ctxt)[0]
+        self.assertEqual(10, removal['removed_count'])
+
+        db_api.storage_remove(ctxt, storage_id)
+        self.assertEqual([], db_api.sync_run_get_all(ctxt, storage_id))
+        # Removal progress is not kept once the storage is removed
+        self.assertEqual([], db_api.storage_removal_get_all(ctxt))
+
+    def test_sync_run_get_all_running(self):
+        db_api.sync_run_start(ctxt, 'storage_1', 'volumes', 60)
+        db_api.sync_run_start(ctxt, 'storage_1', 'storage_pools', 60)
+        db_api.sync_run_end(ctxt, 'storage_1', 'storage_pools',
+                            constants.SyncRunStatus.SUCCEEDED, 1.0)
+        db_api.sync_run_start(ctxt, 'storage_2', 'volumes', 60)
+        db_api.sync_run_start(ctxt, 'storage_3', 'volumes', 60)
+
+        sync_runs = db_api.sync_run_get_all(
+            ctxt, storage_ids=['storage_1', 'storage_2'], expiration=60)
+        self.assertEqual([('storage_1', 'volumes'), ('storage_2', 'volumes')],
+                         sorted((sync_run['storage_id'],
+                                 sync_run['resource_type'])
+                                for sync_run in sync_runs))
+        # Runs started more than expiration seconds ago are lost
+        self.assertEqual([], db_api.sync_run_get_all(
+            ctxt, storage_ids=['storage_1', 'storage_2'], expiration=0))
+        self.assertEqual([], db_api.sync_run_get_all(ctxt, storage_ids=[]))
+        self.assertEqual(4, len(db_api.sync_run_get_all(ctxt)))
+
+    def _get_all_pages(self, limit, sort_keys=None, sort_dirs=None):
+        volumes, cursor = db_api.volume_get_page(
+            ctxt, limit=limit, sort_keys=sort_keys, sort_dirs=sort_dirs)
+        while cursor:
+            page, cursor = db_api.volume_get_page(
+                ctxt, cursor, limit, sort_keys, sort_dirs)
+            volumes.extend(page)
+        return [volume['id'] for volume in volumes]
+
+    def test_volume_get_page(self):
+        db_api.volumes_create(ctxt, [
+            {'id': 'fake_id_%s' % i, 'storage_id': 'fake_storage_id',
+             'native_volume_id': 'fake_native_id_%s' % i,
+             'name': 'fake_name_%s' % (i % 3),
+             'wwn': 'fake_wwn_%s' % i if i % 2 else None}
+            for i in range(7)])
+        all_ids = ['fake_id_%s' % i for i in range(7)]
+
+        # Volumes created in the same bulk share created_at
+        self.assertEqual(sorted(all_ids, reverse=True),
+                         self._get_all_pages(2))
+        self.assertEqual(
+            ['fake_id_0', 'fake_id_3', 'fake_id_6', 'fake_id_1',
+             'fake_id_4', 'fake_id_2', 'fake_id_5'],
+            self._get_all_pages(2, ['name', 'id'], ['asc', 'asc']))
+        # NULL sort values are paged through as well
+        for sort_dir in ('asc', 'desc'):
+            self.assertEqual(
+                sorted(all_ids),
+                sorted(self._get_all_pages(3, ['wwn'], [sort_dir])))
+        self.assertEqual(
+            ['fake_id_1', 'fake_id_3', 'fake_id_5'],
+            self._get_all_pages(1, ['wwn', 'name'], ['asc', 'desc'])[4:])
+
+        __, cursor = db_api.volume_get_page(ctxt, limit=2)
+        self.assertRaises(exception.InvalidInput, db_api.volume_get_page,
+                          ctxt, cursor, 2, ['name'], ['asc'])
+        self.assertRaises(exception.InvalidInput, db_api.volume_get_page,
+                          ctxt, 'invalid', 2)
+
+    def test_volume_get_all_iter(self):
+        self.override_config('stream_chunk_size', 2, 'database')
+        db_api.volumes_create(ctxt, [
+            {'id': 'fake_id_%s' % i, 'storage_id': 'fake_storage_id',
+             'native_volume_id': 'fake_native_id_%s' % i}
+            for i in range(5)])
+        volumes = db_api.volume_get_all_iter(
+            ctxt, ['id'], ['asc'], {'storage_id': 'fake_storage_id'})
+        self.assertEqual(['fake_id_%s' % i for i in range(5)],
+                         [volume['id'] for volume in volumes])
+        self.assertEqual([], list(db_api.volume_get_all_iter(
+            ctxt, filters={'wrong_filter': 'value'})))
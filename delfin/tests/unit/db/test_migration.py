@@ -0,0 +1,114 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlalchemy as sa
+
+from delfin import test
+from delfin.db.sqlalchemy import migration
+from delfin.db.sqlalchemy import models
+
+
+def _create_baseline_schema(engine):
+    """Create the tables touched by migrations as register_db used to."""
+    metadata = sa.MetaData()
+    sa.Table('storages', metadata,
+             sa.Column('id', sa.String(36), primary_key=True),
+             sa.Column('serial_number', sa.String(255)))
+    sa.Table('volumes', metadata,
+             sa.Column('id', sa.String(36), primary_key=True),
+             sa.Column('storage_id', sa.String(36)),
+             sa.Column('native_volume_id', sa.String(255)))
+    sa.Table('storage_pools', metadata,
+             sa.Column('id', sa.String(36), primary_key=True),
+             sa.Column('storage_id', sa.String(36)),
+             sa.Column('native_storage_pool_id', sa.String(255)))
+    sa.Table('alert_source', metadata,
+             sa.Column('storage_id', sa.String(36), primary_key=True),
+             sa.Column('host', sa.String(255)))
+    metadata.create_all(engine)
+
+
+class TestMigration(test.TestCase):
+
+    def setUp(self):
+        super(TestMigration, self).setUp()
+        self.engine = sa.create_engine('sqlite://')
+
+    def _get_index_names(self, table):
+        return set(index['name'] for index in
+                   sa.inspect(self.engine).get_indexes(table))
+
+    def test_db_sync_empty_database(self):
+        migration.db_sync(self.engine)
+        self.assertEqual('003', migration.db_version(self.engine))
+        self.assertTrue(set(models.BASE.metadata.tables).issubset(
+            sa.inspect(self.engine).get_table_names()))
+        self.assertIn('volumes_storage_id_native_volume_id_idx',
+                      self._get_index_names('volumes'))
+
+        # Syncing again is a no-op
+        migration.db_sync(self.engine)
+        self.assertEqual('003', migration.db_version(self.engine))
+
+    def test_db_sync_baseline_database(self):
+        _create_baseline_schema(self.engine)
+        migration.db_sync(self.engine)
+
+        self.assertEqual('003', migration.db_version(self.engine))
+        inspector = sa.inspect(self.engine)
+        self.assertIn('resource_hash', [column['name'] for column in
+                                        inspector.get_columns('volumes')])
+        self.assertIn('sync_runs', inspector.get_table_names())
+        self.assertIn('storage_pools_storage_id_native_storage_pool_id_idx',
+                      self._get_index_names('storage_pools'))
+        self.assertIn('alert_source_host_idx',
+                      self._get_index_names('alert_source'))
+        self.assertIn('storages_serial_number_idx',
+                      self._get_index_names('storages'))
+
+        # Native volume ids are unique within a storage
+        with self.engine.connect() as connection:
+            connection.execute(sa.text(
+                "INSERT INTO volumes (id, storage_id, native_volume_id) "
+                "VALUES ('1', 'storage', 'native')"))
+            self.assertRaises(
+                sa.exc.IntegrityError, connection.execute, sa.text(
+                    "INSERT INTO volumes (id, storage_id, native_volume_id) "
+                    "VALUES ('2', 'storage', 'native')"))
+
+    def test_db_sync_duplicated_native_ids(self):
+        _create_baseline_schema(self.engine)
+        migration.db_sync(self.engine, version='002')
+        with self.engine.connect() as connection:
+            for vol_id, native_id in (('1', 'native'), ('2', 'native'),
+                                      ('3', 'other'), ('4', None),
+                                      ('5', None)):
+                connection.execute(sa.text(
+                    "INSERT INTO volumes (id, storage_id, native_volume_id) "
+                    "VALUES (:id, 'storage', :native_id)"),
+                    id=vol_id, native_id=native_id)
+            connection.execute(sa.text(
+                "INSERT INTO storage_resource_hashes "
+                "(storage_id, resource_type, resource_hash) "
+                "VALUES ('storage', 'volumes', 'hash')"))
+
+        migration.db_sync(self.engine)
+
+        self.assertEqual('003', migration.db_version(self.engine))
+        with self.engine.connect() as connection:
+            self.assertEqual(['1', '3', '4', '5'], [row[0] for row in (
+                connection.execute(sa.text(
+                    "SELECT id FROM volumes ORDER BY id")))])
+            self.assertEqual([], list(connection.execute(sa.text(
+                "SELECT * FROM storage_resource_hashes"))))
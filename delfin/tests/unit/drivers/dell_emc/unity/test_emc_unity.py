@@ -13,9 +13,12 @@
 # limitations under the License.
 from unittest import TestCase, mock
 
+import eventlet
 from requests import Session
 
 from delfin import context
+from delfin import exception
+from delfin.drivers.dell_emc.unity import consts
 from delfin.drivers.dell_emc.unity.rest_handler import RestHandler
 from delfin.drivers.dell_emc.unity.unity import UNITYStorDriver
 
@@ -549,6 +552,34 @@ class TestUNITYStorDriver(TestCase):
         self.assertDictEqual(volume[0], volume_result[0])
         self.assertDictEqual(volume[1], volume_result[1])
 
+    def test_list_volumes_by_pages(self):
+        def get_luns(url):
+            luns = dict(GET_ALL_LUNS)
+            luns['entryCount'] = consts.PAGE_SIZE * 2 + 1
+            return luns
+        RestHandler.get_rest_info = mock.Mock(side_effect=get_luns)
+        volume = self.driver.list_volumes(context)
+        self.assertEqual(6, len(volume))
+        self.assertEqual(3, RestHandler.get_rest_info.call_count)
+        urls = [call[0][0] for call in
+                RestHandler.get_rest_info.call_args_list]
+        for page_number in (1, 2, 3):
+            self.assertIn('page=%s&per_page=%s&with_entrycount=true' % (
+                page_number, consts.PAGE_SIZE), urls[page_number - 1])
+
+    def test_list_volumes_page_failed(self):
+        def get_luns(url):
+            if 'page=2&' in url:
+                return None
+            luns = dict(GET_ALL_LUNS)
+            luns['entryCount'] = consts.PAGE_SIZE * 2 + 1
+            return luns
+        with mock.patch.object(RestHandler, 'get_rest_info',
+                               side_effect=get_luns):
+            # A partial list would have the missing volumes deleted
+            self.assertRaises(exception.StorageBackendException,
+                              self.driver.list_volumes, context)
+
     def test_list_alerts(self):
         RestHandler.get_rest_info = mock.Mock(side_effect=[
             GET_ALL_ALERTS, GET_ALL_ALERTS_NULL])
@@ -580,6 +611,49 @@ class TestUNITYStorDriver(TestCase):
                 self.driver.rest_handler.call(url, '', 'GET')
         self.assertIn('Bad response from server', str(exc.exception))
 
+    def test_rest_handler_relogin_once(self):
+        handler = RestHandler(**ACCESS_INFO)
+        old_session = mock.Mock()
+        handler.session = old_session
+        handler.rest_auth_token = 'old_token'
+        logins = []
+
+        def do_call(url, data, method, calltimeout, session=None):
+            if session is not None:
+                # Requests keep using the current session while logging in
+                self.assertIs(old_session, handler.session)
+                logins.append(session)
+                return mock.Mock(status_code=200,
+                                 headers={'EMC-CSRF-TOKEN': 'new_token'})
+            if handler.session is old_session:
+                # Let the other request fail meanwhile
+                eventlet.sleep(0)
+                return mock.Mock(
+                    status_code=consts.ERROR_SESSION_INVALID_CODE)
+            return mock.Mock(status_code=200)
+
+        with mock.patch.object(RestHandler, 'do_call', side_effect=do_call):
+            threads = [eventlet.spawn(handler.call, '/api/types/lun',
+                                      None, 'GET') for __ in range(2)]
+            for thread in threads:
+                self.assertEqual(200, thread.wait().status_code)
+        self.assertEqual(1, len(logins))
+        self.assertIs(logins[0], handler.session)
+        self.assertEqual('new_token', handler.rest_auth_token)
+        self.assertEqual('new_token',
+                         handler.session.headers['EMC-CSRF-TOKEN'])
+        old_session.close.assert_called_once_with()
+
+    def test_rest_handler_login_failed(self):
+        handler = RestHandler(**ACCESS_INFO)
+        old_session = mock.Mock()
+        handler.session = old_session
+        res = mock.Mock(status_code=401, text='unauthorized')
+        with mock.patch.object(RestHandler, 'do_call', return_value=res):
+            self.assertRaises(exception.BadResponse, handler.login)
+        self.assertIs(old_session, handler.session)
+        self.assertIsNone(handler.rest_auth_token)
+
     def test_reset_connection(self):
         RestHandler.logout = mock.Mock(return_value={})
         m = mock.MagicMock(status_code=200)
@@ -14,6 +14,8 @@
 
 
 from unittest import TestCase, mock
+
+import eventlet
 from requests.sessions import Session
 from delfin import exception
 from delfin import context
@@ -321,6 +323,157 @@ class TestVMAXStorageDriver(TestCase):
         self.assertIn('Failed to get list volumes from VMAX',
                       str(exc.exception))
 
+    @mock.patch.object(VMaxRest, 'get_system_capacity')
+    @mock.patch.object(VMaxRest, 'get_storage_group')
+    @mock.patch.object(VMaxRest, 'get_volume')
+    @mock.patch.object(VMaxRest, 'get_volume_list')
+    @mock.patch.object(VMaxRest, 'get_array_detail')
+    @mock.patch.object(VMaxRest, 'get_uni_version')
+    @mock.patch.object(VMaxRest, 'get_unisphere_version')
+    def test_list_volumes_concurrently(self, mock_unisphere_version,
+                                       mock_version, mock_array,
+                                       mock_vols, mock_vol, mock_sg,
+                                       mock_capacity):
+        kwargs = dict(VMAX_STORAGE_CONF)
+        kwargs['extra_attributes'] = {
+            'array_id': '00112233',
+            'max_concurrent_requests': '2'
+        }
+        mock_version.return_value = ['V9.0.2.7', '90']
+        mock_unisphere_version.return_value = ['V9.0.2.7', '90']
+        mock_array.return_value = {'symmetrixId': ['00112233']}
+        mock_capacity.return_value = {'default_fba_srp': 'SRP_1'}
+        volume_ids = ['%05d' % i for i in range(10)]
+        mock_vols.return_value = volume_ids
+        mock_vol.side_effect = lambda array, version, volume_id: {
+            'volumeId': volume_id,
+            'cap_mb': 100,
+            'allocated_percent': 10,
+            'status': 'Ready',
+            'type': 'TDEV',
+            'wwn': 'wwn' + volume_id,
+            'num_of_storage_groups': 1,
+            'storageGroupId': ['SG_001'],
+            'emulation': 'FBA'
+        }
+
+        def get_storage_group(array, version, sg):
+            # Other volumes of the storage group are got meanwhile
+            eventlet.sleep(0)
+            return {'srp': 'SRP_1', 'compression': False}
+        mock_sg.side_effect = get_storage_group
+
+        driver = VMAXStorageDriver(**kwargs)
+        self.assertEqual(2, driver.client.max_concurrent_requests)
+        ret = driver.list_volumes(context)
+
+        self.assertEqual(volume_ids,
+                         [vol['native_volume_id'] for vol in ret])
+        self.assertEqual(10, mock_vol.call_count)
+        mock_sg.assert_called_once_with('00112233', '90', 'SG_001')
+
+        # Volumes waiting for a storage group fail with it
+        def get_storage_group_failed(array, version, sg):
+            eventlet.sleep(0)
+            raise exception.StorageBackendException('sg error')
+        mock_sg.reset_mock()
+        mock_sg.side_effect = get_storage_group_failed
+        sg_cache = {}
+        threads = [eventlet.spawn(driver.client._get_storage_group,
+                                  'SG_001', sg_cache) for __ in range(2)]
+        for thread in threads:
+            self.assertRaises(exception.StorageBackendException, thread.wait)
+        mock_sg.assert_called_once_with('00112233', '90', 'SG_001')
+        self.assertEqual({}, sg_cache)
+
+    @mock.patch.object(VMaxRest, 'get_system_capacity')
+    @mock.patch.object(VMaxRest, 'get_resource')
+    @mock.patch.object(VMaxRest, 'get_volume')
+    @mock.patch.object(VMaxRest, 'get_array_detail')
+    @mock.patch.object(VMaxRest, 'get_uni_version')
+    @mock.patch.object(VMaxRest, 'get_unisphere_version')
+    def test_list_volumes_with_details(self, mock_unisphere_version,
+                                       mock_version, mock_array, mock_vol,
+                                       mock_resource, mock_capacity):
+        volume = {
+            'volumeId': '00001',
+            'cap_mb': 100,
+            'allocated_percent': 10,
+            'status': 'Ready',
+            'type': 'TDEV',
+            'wwn': 'wwn123',
+            'num_of_storage_groups': 0,
+            'storageGroupId': [],
+            'emulation': 'FBA'
+        }
+        kwargs = VMAX_STORAGE_CONF
+        mock_version.return_value = ['V9.2.0.1', '92']
+        mock_unisphere_version.return_value = ['V9.2.0.1', '92']
+        mock_array.return_value = {'symmetrixId': ['00112233']}
+        mock_capacity.return_value = {'default_fba_srp': 'SRP_1'}
+        mock_resource.return_value = [volume]
+
+        driver = VMAXStorageDriver(**kwargs)
+        ret = driver.list_volumes(context)
+        self.assertEqual('00001', ret[0]['native_volume_id'])
+        self.assertEqual('SRP_1', ret[0]['native_storage_pool_id'])
+        self.assertFalse(mock_vol.called)
+        mock_resource.assert_called_once_with(
+            '00112233', 'sloprovisioning', 'volume', version='92',
+            params={'data_volume': 'false', 'details': 'true'})
+
+        # Unisphere ignoring details, get volumes one by one
+        mock_resource.side_effect = [[{'volumeId': '00001'}],
+                                     [{'volumeId': '00001'}]]
+        mock_vol.return_value = volume
+        ret = driver.list_volumes(context)
+        self.assertEqual('00001', ret[0]['native_volume_id'])
+        mock_vol.assert_called_once_with('00112233', '92', '00001')
+
+        # Partial attributes, get volumes one by one
+        partial_volume = dict(volume)
+        partial_volume.pop('wwn')
+        in_sg_volume = dict(volume, num_of_storage_groups=1)
+        in_sg_volume.pop('storageGroupId')
+        for vol_dict in (partial_volume, in_sg_volume):
+            mock_vol.reset_mock()
+            mock_resource.side_effect = [[vol_dict],
+                                         [{'volumeId': '00001'}]]
+            ret = driver.list_volumes(context)
+            self.assertEqual('wwn123', ret[0]['wwn'])
+            mock_vol.assert_called_once_with('00112233', '92', '00001')
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(VMaxRest, 'get_request')
+    def test_list_pagination(self, mock_request, mock_sleep):
+        list_info = {
+            'id': 'iterator_1',
+            'count': 9,
+            'maxPageSize': 3,
+            'resultList': {'result': [0, 1, 2], 'from': 1, 'to': 3}
+        }
+
+        def get_page(target_uri, resource_type, params):
+            if params['from'] == 4 and mock_request.call_count == 1:
+                # First request of the second page fails
+                return None
+            return {'result': list(range(params['from'] - 1,
+                                         params['to']))}
+
+        mock_request.side_effect = get_page
+        rest = VMaxRest()
+        ret = rest.list_pagination(list_info)
+        self.assertEqual(list(range(9)), ret)
+        self.assertEqual(3, mock_request.call_count)
+        mock_request.assert_any_call('/common/Iterator/iterator_1/page',
+                                     'iterator', {'to': 9, 'from': 7})
+
+        mock_request.side_effect = None
+        mock_request.return_value = None
+        list_info['resultList']['result'] = [0, 1, 2]
+        with self.assertRaises(exception.StorageBackendException):
+            rest.list_pagination(list_info)
+
     @mock.patch.object(Session, 'request')
     @mock.patch.object(VMaxRest, 'get_array_detail')
     @mock.patch.object(VMaxRest, 'get_uni_version')
@@ -18,7 +18,7 @@ from delfin import exception
 from delfin import context
 from delfin.common import config # noqa
 from delfin.drivers.huawei.oceanstor.oceanstor import OceanStorDriver, consts
-from delfin.drivers.huawei.oceanstor.rest_client import RestClient
+from delfin.drivers.huawei.oceanstor.rest_client import CONF, RestClient
 from requests import Session
 
 
@@ -328,3 +328,110 @@ class TestOceanStorStorageDriver(TestCase):
                 driver.list_volumes(context)
             self.assertIn('Exception from Storage Backend',
                           str(exc.exception))
+
+    def test_list_volumes_with_pools(self):
+        driver = create_driver()
+        volumes = [{
+            'RUNNINGSTATUS': '27',
+            'CAPACITY': '100',
+            'ALLOCCAPACITY': '75',
+            'WWN': 'wwn12345',
+            'NAME': 'Volume_1',
+            'ID': '0001',
+            'PARENTNAME': 'OceanStor_1',
+            'ENABLECOMPRESSION': 'false',
+            'ENABLEDEDUP': 'false',
+            'ALLOCTYPE': '1',
+            'SECTORSIZE': '512',
+        }]
+        storage_pools = [{
+            'name': 'OceanStor_1',
+            'native_storage_pool_id': '012345',
+        }]
+        with mock.patch.object(RestClient, 'get_all_volumes',
+                               return_value=volumes), \
+                mock.patch.object(RestClient, 'get_all_pools') as get_pools:
+            ret = driver.list_volumes_with_pools(context, storage_pools)
+            self.assertEqual('012345', ret[0]['native_storage_pool_id'])
+            # Pools listed in the same sync are not got again
+            self.assertFalse(get_pools.called)
+
+    def test_concurrent_paginated_call(self):
+        driver = create_driver()
+        page_size = consts.QUERY_PAGE_SIZE
+        count = page_size * 2 + 10
+
+        def do_call(url, data, method, log_filter_flag=False):
+            if url == '/lun/count':
+                return {'data': {'COUNT': str(count)},
+                        'error': {'code': 0, 'description': '0'}}
+            start, end = url[len('/lun?range=['):-1].split('-')
+            return {'data': [{'ID': str(i)} for i in
+                             range(int(start), min(int(end), count))],
+                    'error': {'code': 0, 'description': '0'}}
+
+        CONF.set_override('max_concurrent_pages', 3, 'huawei_oceanstor')
+        self.addCleanup(CONF.clear_override, 'max_concurrent_pages',
+                        'huawei_oceanstor')
+        with mock.patch.object(RestClient, 'do_call',
+                               side_effect=do_call) as mock_call:
+            volumes = driver.client.get_all_volumes()
+            self.assertEqual([str(i) for i in range(count)],
+                             [volume['ID'] for volume in volumes])
+            self.assertEqual(4, mock_call.call_count)
+
+    def test_call_relogin_once(self):
+        driver = create_driver()
+        error = {'error': {'code': consts.ERROR_UNAUTHORIZED_TO_SERVER,
+                           'description': 'unauthorized'}}
+        success = {'data': [], 'error': {'code': 0, 'description': '0'}}
+        responses = [error, success]
+
+        def do_call(url, data, method, log_filter_flag=False):
+            if len(responses) == 2:
+                # Another request logs in again while this one is failing
+                driver.client.session = mock.Mock()
+            return responses.pop(0)
+
+        with mock.patch.object(RestClient, 'login') as mock_login:
+            with mock.patch.object(RestClient, 'do_call',
+                                   side_effect=[error, success]):
+                result = driver.client.call('/lun', method='GET')
+                self.assertEqual(0, result['error']['code'])
+                mock_login.assert_called_once_with()
+
+            mock_login.reset_mock()
+            with mock.patch.object(RestClient, 'do_call',
+                                   side_effect=do_call):
+                result = driver.client.call('/lun', method='GET')
+                self.assertEqual(0, result['error']['code'])
+                self.assertFalse(mock_login.called)
+
+    def test_login_keeps_session_until_logged_in(self):
+        driver = create_driver()
+        old_session = driver.client.session
+        login_url = 'https://10.0.0.1:8443/deviceManager/rest/xx/sessions'
+
+        m = mock.MagicMock()
+        m.raise_for_status.return_value = None
+        m.json.return_value = {'error': {'code': 123, 'description': '0'}}
+        with mock.patch.object(Session, 'post', return_value=m) as mock_post:
+            self.assertRaises(exception.StorageBackendException,
+                              driver.client.login)
+            # The login url is not relative to the logged in device
+            self.assertEqual(login_url, mock_post.call_args[0][0])
+        self.assertIs(old_session, driver.client.session)
+        self.assertEqual('https://10.0.0.1:8443/deviceManager/rest/123ABC456',
+                         driver.client.url)
+
+        m.json.return_value = {
+            'data': {'deviceid': '123ABC789', 'iBaseToken': 'FFFF1111',
+                     'accountstate': 1},
+            'error': {'code': 0, 'description': '0'}}
+        with mock.patch.object(Session, 'post', return_value=m):
+            self.assertEqual('123ABC789', driver.client.login())
+        self.assertIsNot(old_session, driver.client.session)
+        self.assertEqual('FFFF1111',
+                         driver.client.session.headers['iBaseToken'])
+        self.assertEqual('https://10.0.0.1:8443/deviceManager/rest/123ABC789',
+                         driver.client.url)
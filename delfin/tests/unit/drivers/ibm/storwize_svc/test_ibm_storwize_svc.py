@@ -134,120 +134,38 @@ enclosure_info = """id:status:type:managed:IO_id:IO_group_name:product_MTM
 1:online:control:yes:0:io_grp0:2076-124:78N16G4:2:2:2:2:24:0:0
 """
 
-pools_info = """id name      status mdisk_count vdisk_count capacity
-1  mdiskgrp0 online 1           101         8.13TB   1024        3.06TB
+pools_info = """id:name:status:mdisk_count:vdisk_count:capacity:extent_size:\
+free_capacity:virtual_capacity:used_capacity:real_capacity:overallocation:\
+warning:easy_tier:easy_tier_status
+1:mdiskgrp0:online:1:101:8939029533818:1024:3364505580994:6058309069045:\
+5552533720268:5563528836710:67:80:auto:balanced
 """
 
-pool_info = """id 1
-name mdiskgrp0
-status online
-mdisk_count 1
-vdisk_count 101
-capacity 8.13TB
-extent_size 1024
-free_capacity 3.06TB
-virtual_capacity 5.51TB
-used_capacity 5.05TB
-real_capacity 5.06TB
-overallocation 67
-warning 80
-easy_tier auto
-easy_tier_status balanced
-tier ssd
-tier_mdisk_count 0
-tier_capacity 0.00MB
-tier_free_capacity 0.00MB
-tier enterprise
-tier_mdisk_count 0
-tier_capacity 0.00MB
-tier_free_capacity 0.00MB
-tier nearline
-tier_mdisk_count 1
-tier_capacity 8.13TB
-tier_free_capacity 3.06TB
-compression_active no
-compression_virtual_capacity 0.00MB
-compression_compressed_capacity 0.00MB
-compression_uncompressed_capacity 0.00MB
-site_id
-site_name
-parent_mdisk_grp_id 1
-parent_mdisk_grp_name mdiskgrp0
-child_mdisk_grp_count 0
-child_mdisk_grp_capacity 0.00MB
-type parent
-encrypt no
+volumes_info = """id:name:IO_group_id:IO_group_name:status:mdisk_grp_id:\
+mdisk_grp_name:capacity:type:FC_id:FC_name:RC_id:RC_name:vdisk_UID:\
+fc_map_count:copy_count:fast_write_state:se_copy_count:RC_change:\
+compressed_copy_count
+0:V7000LUN_Mig:0:io_grp0:online:1:mdiskgrp0:53687091200:striped:::::\
+60050768028401F87C00000000000000:0:1:empty:0:no:0
+1:V7000LUN_Thin:0:io_grp0:online:1:mdiskgrp0:53687091200:striped:::::\
+60050768028401F87C00000000000001:0:1:empty:1:no:0
 """
 
-volumes_info = """id  name            IO_group_id IO_group_name status
-0   V7000LUN_Mig    0           io_grp0       online 1
+volume_copies_info = """vdisk_id:vdisk_name:copy_id:status:sync:primary:\
+mdisk_grp_id:mdisk_grp_name:capacity:type:se_copy:easy_tier:easy_tier_status:\
+compressed_copy
+0:V7000LUN_Mig:0:online:yes:yes:1:mdiskgrp0:53687091200:striped:no:on:\
+balanced:no
+1:V7000LUN_Thin:0:online:yes:yes:1:mdiskgrp0:53687091200:striped:yes:on:\
+balanced:no
 """
 
-volume_info = """id:0
-name:V7000LUN_Mig
-IO_group_id:0
-IO_group_name:io_grp0
-status:online
-mdisk_grp_id:1
-mdisk_grp_name:mdiskgrp0
-capacity:50.00GB
-type:striped
-formatted:no
-mdisk_id:
-mdisk_name:
-FC_id:
-FC_name:
-RC_id:
-RC_name:
-vdisk_UID:60050768028401F87C00000000000000
-throttling:0
-preferred_node_id:3
-fast_write_state:empty
-cache:readwrite
-udid:
-fc_map_count:0
-sync_rate:50
-copy_count:1
-se_copy_count:0
-filesystem:
-mirror_write_priority:latency
-RC_change:no
-compressed_copy_count:0
-access_IO_group_count:1
-last_access_time:190531130236
-parent_mdisk_grp_id:1
-parent_mdisk_grp_name:mdiskgrp0
-
-copy_id:0
-status:online
-sync:yes
-primary:yes
-mdisk_grp_id:1
-mdisk_grp_name:mdiskgrp0
-type:striped
-mdisk_id:
-mdisk_name:
-fast_write_state:empty
-used_capacity:50.00GB
-real_capacity:50.00GB
-free_capacity:0.00MB
-overallocation:100
-autoexpand:
-warning:
-grainsize:
-se_copy:no
-easy_tier:on
-easy_tier_status:balanced
-tier:ssd
-tier_capacity:0.00MB
-tier:enterprise
-tier_capacity:0.00MB
-tier:nearline
-tier_capacity:50.00GB
-compressed_copy:no
-uncompressed_used_capacity:50.00GB
-parent_mdisk_grp_id:1
-parent_mdisk_grp_name:mdiskgrp0
+se_volume_copies_info = """vdisk_id:vdisk_name:copy_id:mdisk_grp_id:\
+mdisk_grp_name:capacity:used_capacity:real_capacity:free_capacity:\
+overallocation:autoexpand:warning:grainsize:se_copy:compressed_copy:\
+uncompressed_used_capacity
+1:V7000LUN_Thin:0:1:mdiskgrp0:53687091200:1073741824:2147483648:1073741824:\
+2500:on:80:256:yes:no:1073741824
 """
 
 alerts_info = """sequence_number last_timestamp object_type object_id
@@ -362,6 +280,21 @@ volume_result = [
         'compressed': False,
         'name': 'V7000LUN_Mig',
         'storage_id': '12345'
+    },
+    {
+        'description': '',
+        'status': 'normal',
+        'total_capacity': 53687091200,
+        'used_capacity': 1073741824,
+        'type': 'thin',
+        'free_capacity': 1073741824,
+        'native_volume_id': '1',
+        'deduplicated': True,
+        'native_storage_pool_id': '1',
+        'wwn': '60050768028401F87C00000000000001',
+        'compressed': False,
+        'name': 'V7000LUN_Thin',
+        'storage_id': '12345'
     }
 ]
 
@@ -424,7 +357,7 @@ class TestStorwizeSvcStorageDriver(TestCase):
         SSHPool.get = mock.Mock(
             return_value={paramiko.SSHClient()})
         SSHHandler.do_exec = mock.Mock(
-            side_effect=[pools_info, pool_info])
+            side_effect=[pools_info])
         pool = self.driver.list_storage_pools(context)
         self.assertDictEqual(pool[0], pool_result[0])
 
@@ -432,9 +365,11 @@ class TestStorwizeSvcStorageDriver(TestCase):
         SSHPool.get = mock.Mock(
             return_value={paramiko.SSHClient()})
         SSHHandler.do_exec = mock.Mock(
-            side_effect=[volumes_info, volume_info])
+            side_effect=[volumes_info, volume_copies_info,
+                         se_volume_copies_info])
         volume = self.driver.list_volumes(context)
         self.assertDictEqual(volume[0], volume_result[0])
+        self.assertDictEqual(volume[1], volume_result[1])
 
     def test_list_alerts(self):
         query_para = {
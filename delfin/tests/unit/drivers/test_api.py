@@ -268,3 +268,19 @@ class TestDriverAPI(TestCase):
         mock_access_info.assert_called_once()
         driver_manager.assert_called_once()
         mock_fake.assert_called_once()
+
+    @mock.patch('delfin.drivers.manager.DriverManager.get_driver')
+    def test_uses_storage_pools(self, driver_manager):
+        driver_manager.return_value = FakeStorageDriver()
+        api = API()
+        self.assertFalse(api.uses_storage_pools(context, '12345'))
+        self.assertFalse(api.uses_storage_pools(context, '12345',
+                                                by_page=True))
+
+        class PoolsDriver(FakeStorageDriver):
+            def iter_volumes_with_pools(self, context, storage_pools):
+                return iter([])
+        driver_manager.return_value = PoolsDriver()
+        self.assertFalse(api.uses_storage_pools(context, '12345'))
+        self.assertTrue(api.uses_storage_pools(context, '12345',
+                                               by_page=True))
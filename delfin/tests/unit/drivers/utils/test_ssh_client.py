@@ -0,0 +1,182 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+from unittest import mock
+
+import eventlet
+from eventlet import event
+
+from delfin import exception
+from delfin import test
+from delfin.drivers.utils import ssh_client
+
+ACCESS_INFO = {
+    "storage_id": "12345",
+    "ssh": {
+        "host": "110.143.132.231",
+        "port": 22,
+        "username": "user",
+        "password": "cGFzc3dvcmQ="
+    }
+}
+
+
+def fake_ssh(output=b'ok'):
+    ssh = mock.Mock()
+    ssh.get_transport.return_value.is_active.return_value = True
+
+    def exec_command(command_str):
+        # Give other commands a chance to run on the connection
+        eventlet.sleep(0)
+        stdout = mock.Mock()
+        stdout.read.return_value = output + command_str.encode()
+        stderr = mock.Mock()
+        stderr.read.return_value = b''
+        return mock.Mock(), stdout, stderr
+
+    ssh.exec_command.side_effect = exec_command
+    return ssh
+
+
+class TestSSHExecutor(test.TestCase):
+
+    @mock.patch.object(ssh_client.SSHPool, 'create')
+    def test_execute_all(self, mock_create):
+        self.override_config('max_channels', 2, 'ssh')
+        self.override_config('max_connections_per_host',
+                             {'110.143.132.231': '2'}, 'ssh')
+        mock_create.side_effect = lambda: fake_ssh()
+        executor = ssh_client.SSHExecutor(**ACCESS_INFO)
+        self.assertEqual(2, executor.max_connections)
+
+        commands = ['cmd%s' % i for i in range(6)]
+        results = executor.execute_all(commands)
+
+        self.assertEqual(['ok' + command for command in commands], results)
+        self.assertEqual(2, mock_create.call_count)
+        metrics = executor.get_metrics()
+        self.assertEqual(6, metrics['commands'])
+        self.assertEqual(2, metrics['connections'])
+        self.assertEqual(0, metrics['active_channels'])
+
+    @mock.patch.object(ssh_client.SSHPool, 'create')
+    def test_evict_idle(self, mock_create):
+        self.override_config('idle_timeout', 60, 'ssh')
+        ssh = fake_ssh()
+        mock_create.return_value = ssh
+        executor = ssh_client.SSHExecutor(**ACCESS_INFO)
+        executor.execute('cmd')
+
+        executor.evict_idle()
+        self.assertEqual(1, len(executor.connections))
+
+        executor.connections[0].last_used -= 61
+        executor.evict_idle()
+        self.assertEqual([], executor.connections)
+        ssh.close.assert_called_once_with()
+        self.assertEqual(1, executor.get_metrics()['connections_evicted'])
+
+        # Dead connection is replaced by a new one
+        executor.execute('cmd')
+        ssh.get_transport.return_value.is_active.return_value = False
+        executor.execute('cmd')
+        self.assertEqual(3, mock_create.call_count)
+
+    @mock.patch.object(ssh_client.SSHPool, 'create')
+    def test_execute_failed(self, mock_create):
+        ssh = fake_ssh()
+        ssh.exec_command.side_effect = Exception('channel closed')
+        mock_create.return_value = ssh
+        executor = ssh_client.SSHExecutor(**ACCESS_INFO)
+        with self.assertRaises(exception.SSHException):
+            executor.execute('cmd')
+        self.assertEqual(1, executor.get_metrics()['failures'])
+        self.assertEqual(0, executor.get_metrics()['active_channels'])
+
+    @mock.patch.object(ssh_client.SSHPool, 'create')
+    def test_execute_while_opening_connection(self, mock_create):
+        self.override_config('max_connections', 2, 'ssh')
+        self.override_config('max_channels', 1, 'ssh')
+        held = event.Event()
+        opened = event.Event()
+        ssh = fake_ssh()
+        exec_command = ssh.exec_command.side_effect
+
+        def exec_held_command(command_str):
+            if command_str == 'held':
+                held.wait()
+            return exec_command(command_str)
+
+        def create():
+            if mock_create.call_count > 1:
+                opened.wait()
+            return ssh
+
+        ssh.exec_command.side_effect = exec_held_command
+        mock_create.side_effect = create
+        executor = ssh_client.SSHExecutor(**ACCESS_INFO)
+        held_thread = eventlet.spawn(executor.execute, 'held')
+        eventlet.sleep(0)
+        # Second connection is opened as the first one is busy
+        opening_thread = eventlet.spawn(executor.execute, 'opening')
+        eventlet.sleep(0)
+        held.send()
+        self.assertEqual('okheld', held_thread.wait())
+
+        # Free channel of the first connection is used meanwhile
+        self.assertEqual('okfree', executor.execute('free'))
+        self.assertEqual(2, mock_create.call_count)
+
+        opened.send()
+        self.assertEqual('okopening', opening_thread.wait())
+        self.assertEqual(2, executor.get_metrics()['connections_created'])
+
+    @mock.patch.object(ssh_client.SSHPool, 'create')
+    def test_open_connection_failed(self, mock_create):
+        mock_create.side_effect = exception.SSHConnectTimeout()
+        executor = ssh_client.SSHExecutor(**ACCESS_INFO)
+        self.assertRaises(exception.SSHConnectTimeout, executor.execute,
+                          'cmd')
+        self.assertEqual([], executor.connections)
+
+    def test_get_ssh_executor(self):
+        executor = ssh_client.get_ssh_executor(**ACCESS_INFO)
+        self.assertIs(executor, ssh_client.get_ssh_executor(**ACCESS_INFO))
+
+        # Executor is replaced when the password is updated
+        access_info = copy.deepcopy(ACCESS_INFO)
+        access_info['ssh']['password'] = 'bmV3X3Bhc3N3b3Jk'
+        with mock.patch.object(ssh_client.SSHExecutor, 'close') as close:
+            new_executor = ssh_client.get_ssh_executor(**access_info)
+            close.assert_called_once_with()
+        self.assertIsNot(executor, new_executor)
+        self.assertIs(new_executor,
+                      ssh_client.get_ssh_executor(**access_info))
+
+        # Executor is dropped with the storage
+        with mock.patch.object(ssh_client.SSHExecutor, 'close') as close:
+            ssh_client.remove_ssh_executors(ACCESS_INFO['storage_id'])
+            close.assert_called_once_with()
+        self.assertIsNot(new_executor,
+                         ssh_client.get_ssh_executor(**access_info))
+        ssh_client.remove_ssh_executors(ACCESS_INFO['storage_id'])
+
+    @mock.patch.object(ssh_client.SSHExecutor, 'evict_idle')
+    def test_evict_idle_connections(self, mock_evict_idle):
+        ssh_client.get_ssh_executor(**ACCESS_INFO)
+        self.addCleanup(ssh_client.remove_ssh_executors,
+                        ACCESS_INFO['storage_id'])
+        ssh_client.evict_idle_connections()
+        mock_evict_idle.assert_called_once_with()
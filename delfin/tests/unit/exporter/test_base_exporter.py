@@ -0,0 +1,94 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import eventlet
+
+from delfin import context
+from delfin import exception
+from delfin import test
+from delfin.exporter import base_exporter
+
+
+class TestExporterQueue(test.TestCase):
+
+    def setUp(self):
+        super(TestExporterQueue, self).setUp()
+        self.ctxt = context.get_admin_context()
+        self.exporter = mock.Mock()
+
+    def _get_exporter_queue(self, queue_size=10, batch_size=3,
+                            max_retries=0):
+        return base_exporter.ExporterQueue(
+            self.exporter, queue_size, batch_size, 0, max_retries, 0, 0)
+
+    def test_push_in_batches(self):
+        exporter_queue = self._get_exporter_queue()
+        exporter_queue.put(self.ctxt, [1, 2, 3, 4])
+        exporter_queue.put(self.ctxt, [5])
+        eventlet.sleep(0)
+
+        self.assertEqual([mock.call(self.ctxt, [1, 2, 3]),
+                          mock.call(self.ctxt, [4, 5])],
+                         self.exporter.dispatch.call_args_list)
+        metrics = exporter_queue.get_metrics()
+        self.assertEqual(2, metrics['batches'])
+        self.assertEqual(5, metrics['pushed'])
+        self.assertEqual(0, metrics['queue_depth'])
+        self.assertGreaterEqual(metrics['max_batch_latency_seconds'], 0)
+
+    def test_retry_and_drop(self):
+        self.exporter.dispatch.side_effect = [
+            exception.DelfinException(), Exception(), None,
+            Exception(), Exception(), Exception()]
+        exporter_queue = self._get_exporter_queue(max_retries=2)
+        exporter_queue.put(self.ctxt, [1])
+        eventlet.sleep(0.01)
+        exporter_queue.put(self.ctxt, [2])
+        eventlet.sleep(0.01)
+
+        # First one is pushed by the second retry, second one is dropped
+        self.assertEqual(6, self.exporter.dispatch.call_count)
+        metrics = exporter_queue.get_metrics()
+        self.assertEqual(1, metrics['pushed'])
+        self.assertEqual(5, metrics['failures'])
+        self.assertEqual(4, metrics['retries'])
+        self.assertEqual(1, metrics['dropped'])
+
+    def test_queue_full(self):
+        exporter_queue = self._get_exporter_queue(queue_size=2)
+        exporter_queue.put(self.ctxt, [1, 2, 3])
+        eventlet.sleep(0)
+
+        # Oldest one is dropped without waiting for the exporter
+        self.exporter.dispatch.assert_called_once_with(self.ctxt, [2, 3])
+        self.assertEqual(1, exporter_queue.get_metrics()['dropped'])
+
+    def test_dispatch_to_each_exporter(self):
+        slow_exporter = mock.Mock()
+        slow_exporter.dispatch.side_effect = lambda ctxt, data: \
+            eventlet.sleep(60)
+        manager = base_exporter.AlertExporterManager()
+        self.mock_object(manager, 'exporter_queues', [
+            self._get_exporter_queue(),
+            base_exporter.ExporterQueue(slow_exporter, 10, 3, 0, 0, 0, 0)])
+
+        # Neither the caller nor the other exporter wait for slow one
+        manager.dispatch(self.ctxt, {'alert_id': '1050'})
+        eventlet.sleep(0)
+        self.exporter.dispatch.assert_called_once_with(
+            self.ctxt, [{'alert_id': '1050'}])
+        slow_exporter.dispatch.assert_called_once_with(
+            self.ctxt, [{'alert_id': '1050'}])
@@ -0,0 +1,83 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+from eventlet import event
+
+from delfin import test
+from delfin.task_manager import executor
+
+
+class TestTaskExecutor(test.TestCase):
+
+    def test_vendor_limit(self):
+        task_executor = executor.TaskExecutor(
+            'sync', 3, 10, vendor_limits={'vendor_a': '1'})
+        done = event.Event()
+        started = []
+
+        def task(name):
+            started.append(name)
+            done.wait()
+
+        task_executor.submit('vendor_a', task, 'a1')
+        task_executor.submit('vendor_a', task, 'a2')
+        task_executor.submit('vendor_b', task, 'b1')
+        eventlet.sleep(0)
+
+        # a2 is held back while a1 runs, without taking a worker
+        self.assertEqual(['a1', 'b1'], started)
+        metrics = task_executor.get_metrics()
+        self.assertEqual(1, metrics['queue_depth'])
+        self.assertEqual(2, metrics['running'])
+
+        done.send()
+        eventlet.sleep(0)
+        self.assertEqual(['a1', 'b1', 'a2'], started)
+        metrics = task_executor.get_metrics()
+        self.assertEqual(0, metrics['queue_depth'])
+        self.assertEqual(0, metrics['running'])
+        self.assertEqual(3, metrics['completed'])
+        self.assertGreaterEqual(metrics['max_wait_seconds'], 0)
+
+    def test_bounded_queue(self):
+        task_executor = executor.TaskExecutor('remove', 1, 1)
+        done = event.Event()
+
+        def task():
+            done.wait()
+
+        # One running and one waiting task fill the executor
+        task_executor.submit(None, task)
+        eventlet.sleep(0)
+        task_executor.submit(None, task)
+        submitting = eventlet.spawn(task_executor.submit, None, task)
+        eventlet.sleep(0)
+        self.assertEqual(2, task_executor.get_metrics()['submitted'])
+
+        done.send()
+        submitting.wait()
+        self.assertEqual(3, task_executor.get_metrics()['submitted'])
+
+    def test_failed_task(self):
+        task_executor = executor.TaskExecutor('alert', 1, 1)
+
+        def task():
+            raise Exception('failed')
+
+        task_executor.submit(None, task)
+        eventlet.sleep(0)
+        metrics = task_executor.get_metrics()
+        self.assertEqual(1, metrics['failed'])
+        self.assertEqual(1, metrics['completed'])
@@ -0,0 +1,166 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+
+import eventlet
+from oslo_utils import timeutils
+
+from delfin import context
+from delfin import coordination
+from delfin import exception
+from delfin import test
+from delfin.common import constants
+from delfin.task_manager import manager
+from delfin.task_manager.tasks import resources
+
+
+def fake_storage(storage_id, vendor):
+    return {
+        'id': storage_id,
+        'vendor': vendor,
+        'created_at': timeutils.utcnow() - datetime.timedelta(days=1),
+    }
+
+
+def fake_sync_run(storage_id, age, status=constants.SyncRunStatus.SUCCEEDED):
+    return {
+        'storage_id': storage_id,
+        'resource_type': 'volumes',
+        'status': status,
+        'started_at': timeutils.utcnow() - datetime.timedelta(seconds=age),
+    }
+
+
+class TestTaskManager(test.TestCase):
+    def setUp(self):
+        super(TestTaskManager, self).setUp()
+        self.context = context.get_admin_context()
+        self.override_config('periodic_interval', 60)
+        self.task_manager = manager.TaskManager()
+
+    @mock.patch.object(coordination, 'LOCK_COORDINATOR')
+    def test_join_and_leave_group(self, mock_coordinator):
+        self.task_manager.host = 'host1'
+        self.task_manager.init_host()
+        mock_coordinator.join_group.assert_called_once_with(
+            'delfin-task', b'host1')
+
+        # Storages of a stopped node move to the other nodes at once
+        self.task_manager.cleanup_host()
+        mock_coordinator.leave_group.assert_called_once_with('delfin-task')
+
+        # Shutting down goes on when leaving fails
+        mock_coordinator.leave_group.side_effect = Exception
+        self.task_manager.cleanup_host()
+
+    @mock.patch('eventlet.spawn_after')
+    @mock.patch.object(resources, 'start_sync')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_schedule_resource_sync_disabled(self, mock_get_all,
+                                             mock_start_sync, mock_spawn):
+        self.task_manager.schedule_resource_sync(self.context)
+        mock_get_all.assert_not_called()
+        mock_spawn.assert_not_called()
+
+    @mock.patch('eventlet.spawn_after')
+    @mock.patch.object(resources, 'start_sync')
+    @mock.patch('delfin.db.sync_run_get_all')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_schedule_resource_sync(self, mock_get_all, mock_get_sync_runs,
+                                    mock_start_sync, mock_spawn):
+        self.override_config('resource_sync_interval', 120)
+        self.override_config('resource_sync_vendor_limits', {'vendor_b': '1'})
+        mock_get_all.return_value = [
+            fake_storage('fresh', 'vendor_a'),
+            fake_storage('old', 'vendor_a'),
+            fake_storage('older', 'vendor_a'),
+            fake_storage('syncing', 'vendor_b'),
+            fake_storage('capped', 'vendor_b'),
+        ]
+        mock_get_sync_runs.return_value = [
+            fake_sync_run('fresh', 60),
+            fake_sync_run('old', 500),
+            fake_sync_run('older', 1000),
+            fake_sync_run('syncing', 100,
+                          status=constants.SyncRunStatus.SYNCING),
+            fake_sync_run('capped', 2000),
+        ]
+        resource_tasks = [resources.StorageVolumeTask]
+        mock_start_sync.side_effect = [exception.StorageIsSyncing('older'),
+                                       resource_tasks]
+
+        self.task_manager.schedule_resource_sync(self.context)
+
+        # Storages due are claimed oldest first, up to the share of one
+        # periodic interval, skipping vendor_b which is at its limit
+        self.assertEqual(['older', 'old'],
+                         [call[0][1] for call in
+                          mock_start_sync.call_args_list])
+        mock_spawn.assert_called_once()
+        self.assertEqual('old', mock_spawn.call_args[0][3])
+        self.assertEqual(resource_tasks, mock_spawn.call_args[0][4])
+        self.assertLessEqual(mock_spawn.call_args[0][0], 60)
+
+    @mock.patch('delfin.task_manager.rpcapi.TaskAPI.sync_storage')
+    def test_sync_storage(self, mock_sync):
+        self.task_manager._sync_storage(
+            self.context, 'fake_id',
+            [resources.StoragePoolTask, resources.StorageVolumeTask])
+        mock_sync.assert_called_once_with(self.context, 'fake_id',
+                                          ['storage_pools', 'volumes'])
+
+    @mock.patch.object(resources, 'sync_storage')
+    @mock.patch('delfin.db.storage_get')
+    def test_sync_storage_in_executor(self, mock_get, mock_sync):
+        mock_get.return_value = fake_storage('fake_id', 'vendor_a')
+        sync_executor = self.task_manager.executors['sync']
+        with mock.patch.object(sync_executor, 'submit') as mock_submit:
+            self.task_manager.sync_storage(self.context, 'fake_id',
+                                           ['volumes'])
+        mock_submit.assert_called_once_with(
+            'vendor_a', resources.sync_storage, self.context, 'fake_id',
+            ['volumes'])
+
+        mock_get.side_effect = exception.StorageNotFound('fake_id')
+        self.task_manager.sync_storage(self.context, 'fake_id', ['volumes'])
+        eventlet.sleep(0)
+        mock_sync.assert_called_once_with(self.context, 'fake_id',
+                                          ['volumes'])
+        metrics = self.task_manager.get_executor_metrics(self.context)
+        self.assertEqual(['alert', 'remove', 'sync'], sorted(metrics))
+        self.assertEqual(1, metrics['sync']['completed'])
+
+    @mock.patch('delfin.db.storage_removal_update')
+    @mock.patch('delfin.db.storage_removal_get_all')
+    def test_resume_storage_removals(self, mock_get_all, mock_update):
+        now = timeutils.utcnow()
+        mock_get_all.return_value = [
+            {'storage_id': 'lost', 'status': 'removing',
+             'created_at': now - datetime.timedelta(days=1),
+             'updated_at': now - datetime.timedelta(seconds=601)},
+            {'storage_id': 'removing', 'status': 'removing',
+             'created_at': now - datetime.timedelta(days=1),
+             'updated_at': now - datetime.timedelta(seconds=10)},
+        ]
+        remove_executor = self.task_manager.executors['remove']
+        with mock.patch.object(remove_executor, 'submit') as mock_submit:
+            self.task_manager.resume_storage_removals(self.context)
+        mock_get_all.assert_called_once_with(
+            self.context, constants.StorageRemovalStatus.REMOVING)
+        mock_submit.assert_called_once_with(
+            None, resources.remove_storage, self.context, 'lost')
+        mock_update.assert_called_once_with(self.context, 'lost',
+                                            {'status': 'removing'})
@@ -15,11 +15,19 @@
 
 from unittest import mock
 
+import eventlet
+from eventlet import event
+
+from delfin import context as ctxt
+from delfin import db
+from delfin import exception
+from delfin.common import constants
+from delfin.common import resource_diff
 from delfin.drivers import fake_storage
 from delfin.task_manager.tasks import resources
 from delfin.task_manager.tasks.resources import StorageDeviceTask
 
-from delfin import test, context, coordination
+from delfin import test, context
 
 storage = {
     'id': '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6',
@@ -64,6 +72,11 @@ vols_list = [{
 ]
 
 
+def _hashed(resource):
+    return dict(resource,
+                resource_hash=resource_diff.get_resource_hash(resource))
+
+
 class TestStorageDeviceTask(test.TestCase):
     def setUp(self):
         super(TestStorageDeviceTask, self).setUp()
@@ -72,25 +85,21 @@ class TestStorageDeviceTask(test.TestCase):
             context, "12c2d52f-01bc-41f5-b73f-7abf6f38a2a6")
         self.mock_object(self.task_manager, 'driver_api', self.driver_api)
 
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.db.sync_run_end')
     @mock.patch('delfin.drivers.api.API.get_storage')
     @mock.patch('delfin.db.storage_update')
     @mock.patch('delfin.db.storage_get')
-    @mock.patch('delfin.db.storage_delete')
-    @mock.patch('delfin.db.access_info_delete')
-    @mock.patch('delfin.db.alert_source_delete')
-    def test_sync_successful(self, alert_source_delete, access_info_delete,
-                             mock_storage_delete, mock_storage_get,
-                             mock_storage_update, mock_get_storage, get_lock):
+    @mock.patch('delfin.db.storage_remove')
+    def test_sync_successful(self, mock_storage_remove, mock_storage_get,
+                             mock_storage_update, mock_get_storage,
+                             mock_sync_run_end):
         storage_obj = resources.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
 
         storage_obj.sync()
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_sync_run_end.called)
         self.assertTrue(mock_storage_get.called)
-        self.assertTrue(mock_storage_delete.called)
-        self.assertTrue(access_info_delete.called)
-        self.assertTrue(alert_source_delete.called)
+        self.assertTrue(mock_storage_remove.called)
         self.assertTrue(mock_storage_update.called)
         mock_get_storage.assert_called_with(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
@@ -99,36 +108,40 @@ class TestStorageDeviceTask(test.TestCase):
         mock_get_storage.return_value = fake_storage_obj.get_storage(context)
         storage_obj.sync()
 
-    @mock.patch('delfin.db.storage_delete')
-    @mock.patch('delfin.db.alert_source_delete')
-    def test_successful_remove(self, mock_alert_del, mock_strg_del):
+    @mock.patch('delfin.db.storage_remove')
+    def test_successful_remove(self, mock_strg_remove):
         storage_obj = resources.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         storage_obj.remove()
 
-        mock_strg_del.assert_called_with(
+        mock_strg_remove.assert_called_with(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
-        mock_alert_del.assert_called_with(
+
+    @mock.patch('delfin.db.storage_remove')
+    def test_remove_failed(self, mock_strg_remove):
+        mock_strg_remove.side_effect = exception.DelfinException()
+        storage_obj = resources.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        self.assertRaises(exception.DelfinException, storage_obj.remove)
 
 
 class TestStoragePoolTask(test.TestCase):
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.db.sync_run_end')
     @mock.patch('delfin.drivers.api.API.list_storage_pools')
-    @mock.patch('delfin.db.storage_pool_get_all')
+    @mock.patch('delfin.db.storage_pool_get_all_hashes')
     @mock.patch('delfin.db.storage_pools_delete')
     @mock.patch('delfin.db.storage_pools_update')
     @mock.patch('delfin.db.storage_pools_create')
     def test_sync_successful(self, mock_pool_create, mock_pool_update,
                              mock_pool_del, mock_pool_get_all,
-                             mock_list_pools, get_lock):
+                             mock_list_pools, mock_sync_run_end):
         pool_obj = resources.StoragePoolTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         pool_obj.sync()
 
         self.assertTrue(mock_list_pools.called)
         self.assertTrue(mock_pool_get_all.called)
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_sync_run_end.called)
 
         # collect the pools from fake_storage
         fake_storage_obj = fake_storage.FakeStorageDriver()
@@ -140,20 +153,54 @@ class TestStoragePoolTask(test.TestCase):
         pool_obj.sync()
         self.assertTrue(mock_pool_create.called)
 
+        # unchanged pool should not be updated
+        db_pools = [_hashed(pools_list[0])]
+        mock_list_pools.return_value = [dict(pools_list[0])]
+        mock_pool_get_all.return_value = db_pools
+        pool_obj.sync()
+        self.assertFalse(mock_pool_update.called)
+
         # update the new pool of DB
-        mock_list_pools.return_value = pools_list
-        mock_pool_get_all.return_value = pools_list
+        mock_list_pools.return_value = [dict(pools_list[0],
+                                             used_capacity=4096)]
         pool_obj.sync()
-        self.assertTrue(mock_pool_update.called)
+        mock_pool_update.assert_called_with(
+            context, [_hashed(dict(pools_list[0], used_capacity=4096))])
 
         # delete the new pool to DB
         mock_list_pools.return_value = list()
-        mock_pool_get_all.return_value = pools_list
         pool_obj.sync()
         self.assertTrue(mock_pool_del.called)
 
+    @mock.patch('delfin.db.sync_run_end')
+    @mock.patch('delfin.drivers.api.API.list_storage_pools')
+    @mock.patch('delfin.db.storage_pool_get_all_hashes')
+    @mock.patch('delfin.db.storage_pools_update')
+    def test_sync_unchanged(self, mock_pool_update, mock_pool_get_all,
+                            mock_list_pools, mock_sync_run_end):
+        pool_obj = resources.StoragePoolTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        mock_list_pools.return_value = [dict(pools_list[0])]
+        mock_pool_get_all.return_value = [pools_list[0]]
+        pool_obj.sync()
+        self.assertEqual(1, mock_pool_get_all.call_count)
+        self.assertEqual(1, mock_pool_update.call_count)
+
+        # Nothing is read from or written to db if nothing changed
+        mock_list_pools.return_value = [dict(pools_list[0])]
+        pool_obj.sync()
+        self.assertEqual(1, mock_pool_get_all.call_count)
+        self.assertEqual(1, mock_pool_update.call_count)
+
+        mock_list_pools.return_value = [dict(pools_list[0],
+                                             used_capacity=4096)]
+        pool_obj.sync()
+        self.assertEqual(2, mock_pool_get_all.call_count)
+        self.assertEqual(2, mock_pool_update.call_count)
+
     @mock.patch('delfin.db.storage_pool_delete_by_storage')
     def test_remove(self, mock_pool_del):
+        mock_pool_del.return_value = 0
         pool_obj = resources.StoragePoolTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         pool_obj.remove()
@@ -161,21 +208,21 @@ class TestStoragePoolTask(test.TestCase):
 
 
 class TestStorageVolumeTask(test.TestCase):
-    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.db.sync_run_end')
     @mock.patch('delfin.drivers.api.API.list_volumes')
-    @mock.patch('delfin.db.volume_get_all')
+    @mock.patch('delfin.db.volume_get_all_hashes')
     @mock.patch('delfin.db.volumes_delete')
     @mock.patch('delfin.db.volumes_update')
     @mock.patch('delfin.db.volumes_create')
     def test_sync_successful(self, mock_vol_create, mock_vol_update,
                              mock_vol_del, mock_vol_get_all, mock_list_vols,
-                             get_lock):
+                             mock_sync_run_end):
         vol_obj = resources.StorageVolumeTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         vol_obj.sync()
         self.assertTrue(mock_list_vols.called)
         self.assertTrue(mock_vol_get_all.called)
-        self.assertTrue(get_lock.called)
+        self.assertTrue(mock_sync_run_end.called)
 
         # collect the volumes from fake_storage
         fake_storage_obj = fake_storage.FakeStorageDriver()
@@ -186,21 +233,268 @@ class TestStorageVolumeTask(test.TestCase):
         vol_obj.sync()
         self.assertTrue(mock_vol_create.called)
 
+        # unchanged volumes should not be updated
+        mock_list_vols.return_value = [dict(vols_list[0])]
+        mock_vol_get_all.return_value = [_hashed(vols_list[0])]
+        vol_obj.sync()
+        self.assertFalse(mock_vol_update.called)
+
         # update the volumes to DB
-        mock_list_vols.return_value = vols_list
-        mock_vol_get_all.return_value = vols_list
+        mock_list_vols.return_value = [dict(vols_list[0], status='error')]
         vol_obj.sync()
-        self.assertTrue(mock_vol_update.called)
+        mock_vol_update.assert_called_with(
+            context, [_hashed(dict(vols_list[0], status='error'))])
 
         # delete the volumes to DB
         mock_list_vols.return_value = list()
-        mock_vol_get_all.return_value = vols_list
         vol_obj.sync()
         self.assertTrue(mock_vol_del.called)
 
+    @mock.patch('delfin.db.sync_run_end')
+    @mock.patch('delfin.drivers.api.API.iter_volumes')
+    @mock.patch('delfin.db.volume_get_all_hashes')
+    @mock.patch('delfin.db.volumes_delete')
+    @mock.patch('delfin.db.volumes_update')
+    @mock.patch('delfin.db.volumes_create')
+    def test_sync_by_page(self, mock_vol_create, mock_vol_update,
+                          mock_vol_del, mock_vol_get_all, mock_iter_vols,
+                          mock_sync_run_end):
+        self.override_config('sync_resource_by_page', True)
+        vol_obj = resources.StorageVolumeTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        new_vol = dict(vols_list[0], native_volume_id='fake_new_id')
+        new_vol.pop('id')
+        changed_vol = dict(vols_list[0], status='error')
+        mock_iter_vols.return_value = iter([[new_vol], [changed_vol]])
+        mock_vol_get_all.return_value = vols_list
+        vol_obj.sync()
+
+        mock_vol_create.assert_called_once_with(context, [new_vol])
+        self.assertEqual(resource_diff.get_resource_hash(new_vol),
+                         new_vol['resource_hash'])
+        mock_vol_update.assert_called_once_with(context, [changed_vol])
+        self.assertEqual(vols_list[0]['id'], changed_vol['id'])
+        self.assertFalse(mock_vol_del.called)
+
+        mock_iter_vols.return_value = iter([])
+        vol_obj.sync()
+        mock_vol_del.assert_called_once_with(context, [vols_list[0]['id']])
+
     @mock.patch('delfin.db.volume_delete_by_storage')
     def test_remove(self, mock_vol_del):
+        mock_vol_del.return_value = 0
         vol_obj = resources.StorageVolumeTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         vol_obj.remove()
         self.assertTrue(mock_vol_del.called)
+
+
+class TestSyncRun(test.TestCase):
+    def setUp(self):
+        super(TestSyncRun, self).setUp()
+        self.ctxt = ctxt.get_admin_context()
+        self.storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+
+    def _get_sync_runs(self):
+        return dict((sync_run['resource_type'], sync_run) for sync_run in
+                    db.sync_run_get_all(self.ctxt, self.storage_id))
+
+    def test_start_sync(self):
+        resource_tasks = resources.start_sync(self.ctxt, self.storage_id)
+        self.assertEqual(resources.StorageResourceTask.__subclasses__(),
+                         resource_tasks)
+        sync_runs = self._get_sync_runs()
+        self.assertEqual(len(resource_tasks), len(sync_runs))
+        for sync_run in sync_runs.values():
+            self.assertTrue(resources.is_sync_running(sync_run))
+
+        self.assertRaises(exception.StorageIsSyncing,
+                          resources.start_sync, self.ctxt, self.storage_id)
+
+        # Only the resources whose last sync ended are started again
+        db.sync_run_end(self.ctxt, self.storage_id, 'volumes',
+                        constants.SyncRunStatus.SUCCEEDED, 1.5)
+        self.assertEqual([resources.StorageVolumeTask],
+                         resources.start_sync(self.ctxt, self.storage_id))
+
+        # Expired sync runs are considered lost
+        self.override_config('sync_task_expiration', 0)
+        self.assertEqual(len(resource_tasks), len(
+            resources.start_sync(self.ctxt, self.storage_id)))
+
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.drivers.api.API.list_storage_pools')
+    def test_set_synced_after(self, mock_list_pools, mock_list_vols):
+        resources.start_sync(self.ctxt, self.storage_id)
+        mock_list_pools.side_effect = exception.StorageBackendException
+        resources.StoragePoolTask(self.ctxt, self.storage_id).sync()
+
+        mock_list_vols.return_value = []
+        resources.StorageVolumeTask(self.ctxt, self.storage_id).sync()
+
+        sync_runs = self._get_sync_runs()
+        self.assertEqual(constants.SyncRunStatus.FAILED,
+                         sync_runs['storage_pools']['status'])
+        self.assertEqual(constants.SyncRunStatus.SUCCEEDED,
+                         sync_runs['volumes']['status'])
+        self.assertIsNotNone(sync_runs['volumes']['ended_at'])
+        self.assertGreaterEqual(sync_runs['volumes']['duration'], 0)
+        self.assertEqual(constants.SyncRunStatus.SYNCING,
+                         sync_runs['storage']['status'])
+
+
+class TestSyncStorage(test.TestCase):
+    def setUp(self):
+        super(TestSyncStorage, self).setUp()
+        self.ctxt = ctxt.get_admin_context()
+        self.storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+
+    @mock.patch('delfin.drivers.api.API.uses_storage_pools',
+                mock.Mock(return_value=True))
+    @mock.patch.object(StorageDeviceTask, 'sync')
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.drivers.api.API.list_volumes_with_pools')
+    @mock.patch('delfin.drivers.api.API.list_storage_pools')
+    def test_sync_storage(self, mock_list_pools, mock_list_vols_with_pools,
+                          mock_list_vols, mock_device_sync):
+        mock_list_pools.return_value = pools_list
+        mock_list_vols_with_pools.return_value = vols_list
+        resources.sync_storage(self.ctxt, self.storage_id,
+                               ['storage', 'storage_pools', 'volumes'])
+
+        mock_device_sync.assert_called_once_with()
+        # Volumes are built with the storage pools listed by pool sync
+        mock_list_vols_with_pools.assert_called_once_with(
+            self.ctxt, self.storage_id, pools_list)
+        self.assertFalse(mock_list_vols.called)
+        self.assertEqual(1, len(db.storage_pool_get_all(self.ctxt)))
+        self.assertEqual(1, len(db.volume_get_all(self.ctxt)))
+
+    @mock.patch('delfin.drivers.api.API.uses_storage_pools',
+                mock.Mock(return_value=False))
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.drivers.api.API.list_storage_pools')
+    def test_sync_storage_without_pools(self, mock_list_pools,
+                                        mock_list_vols):
+        volumes_listed = event.Event()
+
+        def list_storage_pools(context, storage_id):
+            # Volumes are listed while storage pools are listed
+            volumes_listed.wait()
+            return pools_list
+
+        def list_volumes(context, storage_id):
+            volumes_listed.send()
+            return vols_list
+        mock_list_pools.side_effect = list_storage_pools
+        mock_list_vols.side_effect = list_volumes
+        resources.sync_storage(self.ctxt, self.storage_id,
+                               ['storage_pools', 'volumes'])
+
+        mock_list_vols.assert_called_once_with(self.ctxt, self.storage_id)
+        self.assertEqual(1, len(db.storage_pool_get_all(self.ctxt)))
+        self.assertEqual(1, len(db.volume_get_all(self.ctxt)))
+
+    @mock.patch('delfin.drivers.api.API.uses_storage_pools',
+                mock.Mock(return_value=True))
+    @mock.patch('delfin.db.storage_pools_create')
+    @mock.patch('delfin.drivers.api.API.iter_volumes_with_pools')
+    @mock.patch('delfin.drivers.api.API.iter_storage_pools')
+    def test_sync_storage_by_page(self, mock_iter_pools,
+                                  mock_iter_vols_with_pools,
+                                  mock_pools_create):
+        self.override_config('sync_resource_by_page', True)
+        pool_pages = [[dict(pools_list[0], native_storage_pool_id=str(i))]
+                      for i in range(2)]
+        mock_iter_pools.return_value = iter(pool_pages)
+        volumes_listed = event.Event()
+
+        def iter_volumes_with_pools(context, storage_id, storage_pools):
+            volumes_listed.send(storage_pools)
+            return iter([])
+        mock_iter_vols_with_pools.side_effect = iter_volumes_with_pools
+        listed_when_saved = []
+
+        def storage_pools_create(context, storage_pools):
+            eventlet.sleep(0)
+            listed_when_saved.append(volumes_listed.ready())
+        mock_pools_create.side_effect = storage_pools_create
+
+        resources.sync_storage(self.ctxt, self.storage_id,
+                               ['storage_pools', 'volumes'])
+
+        self.assertEqual(pool_pages[0] + pool_pages[1],
+                         volumes_listed.wait())
+        # Volumes are listed once the last page of storage pools is got,
+        # without waiting for it to be saved
+        self.assertEqual([False, True], listed_when_saved)
+
+    @mock.patch.object(StorageDeviceTask, 'sync')
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.drivers.api.API.list_storage_pools')
+    def test_sync_storage_pools_failed(self, mock_list_pools, mock_list_vols,
+                                       mock_device_sync):
+        mock_list_pools.side_effect = exception.StorageBackendException
+        mock_list_vols.return_value = vols_list
+        resources.sync_storage(self.ctxt, self.storage_id,
+                               ['storage_pools', 'volumes'])
+
+        self.assertFalse(mock_device_sync.called)
+        # Volumes are still synced when listing storage pools failed
+        mock_list_vols.assert_called_once_with(self.ctxt, self.storage_id)
+        self.assertEqual(1, len(db.volume_get_all(self.ctxt)))
+
+
+class TestRemoveStorage(test.TestCase):
+    def setUp(self):
+        super(TestRemoveStorage, self).setUp()
+        self.ctxt = ctxt.get_admin_context()
+        self.storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+
+    @mock.patch('delfin.db.storage_removal_update')
+    def test_remove_storage(self, mock_update):
+        self.override_config('storage_removal_batch_size', 2)
+        db.storage_create(self.ctxt, {'id': self.storage_id})
+        db.volumes_create(self.ctxt, [
+            {'id': 'fake_id_%s' % i, 'storage_id': self.storage_id,
+             'native_volume_id': 'fake_native_id_%s' % i}
+            for i in range(5)])
+        db.storage_pools_create(self.ctxt, [
+            {'id': 'fake_id', 'storage_id': self.storage_id,
+             'native_storage_pool_id': 'fake_native_id'}])
+        db.storage_removal_start(self.ctxt, self.storage_id)
+
+        resources.remove_storage(self.ctxt, self.storage_id)
+
+        self.assertEqual([], db.volume_get_all(self.ctxt))
+        self.assertEqual([], db.storage_pool_get_all(self.ctxt))
+        # Progress is recorded after each batch
+        self.assertEqual([
+            mock.call(self.ctxt, self.storage_id,
+                      {'resource_type': 'volumes', 'removed_count': 2}),
+            mock.call(self.ctxt, self.storage_id,
+                      {'resource_type': 'volumes', 'removed_count': 4}),
+            mock.call(self.ctxt, self.storage_id,
+                      {'resource_type': 'volumes', 'removed_count': 5}),
+            mock.call(self.ctxt, self.storage_id,
+                      {'resource_type': 'storage_pools',
+                       'removed_count': 1}),
+        ], mock_update.call_args_list)
+        # Removal is ended with the storage device
+        self.assertEqual([], db.storage_removal_get_all(self.ctxt))
+
+    @mock.patch('delfin.db.storage_remove')
+    def test_remove_storage_failed(self, mock_storage_remove):
+        mock_storage_remove.side_effect = exception.DelfinException()
+        db.storage_create(self.ctxt, {'id': self.storage_id})
+        db.storage_removal_start(self.ctxt, self.storage_id)
+
+        self.assertRaises(exception.DelfinException,
+                          resources.remove_storage,
+                          self.ctxt, self.storage_id)
+
+        # Removal is left to be resumed
+        removals = db.storage_removal_get_all(
+            self.ctxt, constants.StorageRemovalStatus.REMOVING)
+        self.assertEqual([self.storage_id],
+                         [removal['storage_id'] for removal in removals])
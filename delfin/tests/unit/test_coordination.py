@@ -118,3 +118,45 @@ class CoordinationTestCase(test.TestCase):
         bar.__getitem__.return_value = 8
         func(foo, bar)
         get_lock.assert_called_with('lock-func-7-8')
+
+
+class ConsistentHashRingTestCase(test.TestCase):
+    def setUp(self):
+        super(ConsistentHashRingTestCase, self).setUp()
+        self.override_config('membership_refresh_interval', 0,
+                             group='coordination')
+        self.agents = []
+        for host in ('host1', 'host2', 'host3'):
+            agent = coordination.Coordinator(prefix='delfin-')
+            agent.start()
+            self.addCleanup(agent.stop)
+            agent.join_group('group', host.encode('utf-8'))
+            self.agents.append(agent)
+
+    def test_get_host(self):
+        ring = coordination.ConsistentHashRing('group')
+        keys = ['storage%s' % i for i in range(30)]
+        owners = dict((key, ring.get_host(key)) for key in keys)
+        self.assertEqual({'host1', 'host2', 'host3'}, set(owners.values()))
+
+        # Only the keys of the leaving member move
+        self.agents.pop().stop()
+        for key in keys:
+            if owners[key] != 'host3':
+                self.assertEqual(owners[key], ring.get_host(key))
+            else:
+                self.assertIn(ring.get_host(key), ('host1', 'host2'))
+
+    def test_leave_group(self):
+        ring = coordination.ConsistentHashRing('group')
+        keys = ['storage%s' % i for i in range(30)]
+        self.agents[2].leave_group('group')
+        self.assertEqual({'host1', 'host2'},
+                         set(ring.get_host(key) for key in keys))
+
+        # Leaving again is a no-op
+        self.agents[2].leave_group('group')
+
+    def test_get_host_without_members(self):
+        ring = coordination.ConsistentHashRing('empty_group')
+        self.assertIsNone(ring.get_host('storage'))